@@ -0,0 +1,170 @@
+"""
+Join-heavy audit and report queries on synthetic data, plus the on-disk size of the tables
+and indexes that carry course references. Written for the move from "SUBJ-CRSE" string keys to
+integer Course ids; it only uses interfaces both layouts share, so the same script can be run
+on a checkout from before the migration for comparison.
+
+    python -m benchmarks.bench_course_keys --scale medium
+    python -m benchmarks.bench_course_keys --scale medium --compare benchmarks/results/course_keys_<earlier>.json
+
+Each query runs `--repeat` times on a warm connection; the best time is reported. Results go
+to benchmarks/results/course_keys_<timestamp>_<commit>.json, which is kept out of git.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_suite import RESULTS_DIR, SCALES, git_commit
+
+SIZE_TABLES = ("src_course", "src_studentrecord", "src_archivedstudentrecord", "src_nodecourse")
+ROLLUP_STUDENTS = 200
+
+
+def load_data(scale, workdir):
+    from benchmarks.bench_storage_profiles import reset_database
+    from benchmarks.synthetic import generate
+    from src.archive import archive_closed_terms
+    from src.data import import_student_data_from_csv, populate_catalog_from_payloads
+    from src.requirement_tree import invalidate_requirement_trees
+    from src.utils import load_major_code_lookup
+
+    students, years, n_majors = SCALES[scale]
+    data = generate(os.path.join(workdir, scale), students=students, years=years, n_majors=n_majors)
+    reset_database()
+    invalidate_requirement_trees()  # ids restart in the new database
+    with open(data["paths"]["catalog.json"]) as f:
+        payloads = json.load(f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate_catalog_from_payloads(payloads)
+        result = import_student_data_from_csv(
+            data["paths"]["extract.csv"], major_lookup_df=load_major_code_lookup(data["paths"]["major_codes.csv"])
+        )
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        # Older terms go to the archive, so transcript reads join both record tables.
+        archive_closed_terms(data["last_term"], keep_years=2)
+    return data
+
+
+def queries(term):
+    from django.db.models import Count, F
+    from src.eligibility import PASSING_GRADES, credits_by_requirement_group, run_audit
+    from src.models import MajorMapping, Student, StudentRecord
+    from src.output import create_dataframe
+    from src.transcripts import TranscriptStore
+
+    term_students = StudentRecord.objects.filter(term=term, student__major__isnull=False).values("student_id")
+    sample = list(
+        Student.objects.filter(student_id__in=term_students).select_related("major").order_by("student_id")[:ROLLUP_STUDENTS]
+    )
+
+    def degree_applicable_by_major():
+        # Passed records whose course is listed in the student's current requirement tree.
+        return list(
+            StudentRecord.objects
+            .filter(grade__in=PASSING_GRADES, course__nodecourse__node__tree=F("student__major__requirement_tree"))
+            .values("student__major__major_code")
+            .annotate(records=Count("id", distinct=True))
+        )
+
+    def requirement_courses_per_major():
+        return list(MajorMapping.objects.values("major_code").annotate(courses=Count("requirement_tree__nodes__courses")))
+
+    return {
+        "transcripts": lambda: len(TranscriptStore.build(term_students)),
+        "group_rollups": lambda: [credits_by_requirement_group(s.major, s.student_id) for s in sample],
+        "degree_applicable_report": degree_applicable_by_major,
+        "requirement_courses": requirement_courses_per_major,
+        "audit": lambda: run_audit(term),
+        "export": lambda: len(create_dataframe(term)),
+    }
+
+
+def storage_sizes():
+    """Bytes per table and per index (dbstat) for the tables holding course references."""
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT m.tbl_name, m.name, SUM(d.pgsize) FROM dbstat d JOIN sqlite_master m ON m.name = d.name "
+            f"WHERE m.tbl_name IN ({', '.join(['%s'] * len(SIZE_TABLES))}) GROUP BY m.name ORDER BY m.tbl_name, m.name",
+            SIZE_TABLES,
+        )
+        sizes = {}
+        for table, name, size in cursor.fetchall():
+            sizes.setdefault(table, {"table": 0, "indexes": 0})
+            sizes[table]["table" if name == table else "indexes"] += size
+    return sizes
+
+
+def run(scale, workdir, repeat):
+    data = load_data(scale, workdir)
+    results = {}
+    for name, func in queries(data["last_term"]).items():
+        best = None
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                func()
+                seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        results[name] = round(best, 4)
+    return {"records": data["records"], "queries": results, "sizes": storage_sizes()}
+
+
+def print_results(results, baseline=None):
+    for scale, result in results["scales"].items():
+        before = (baseline or {}).get("scales", {}).get(scale, {})
+        print(f"\n{scale}: {result['records']} records")
+        for name, seconds in result["queries"].items():
+            line = f"{name:>26} {seconds:>8.3f}s"
+            old = before.get("queries", {}).get(name)
+            if old:
+                line += f"   was {old:>8.3f}s ({(seconds - old) / old * 100:+.1f}%)"
+            print(line)
+        for table, size in result["sizes"].items():
+            line = f"{table:>26} {size['table'] / 1024:>8.0f} KiB table, {size['indexes'] / 1024:>6.0f} KiB indexes"
+            old = before.get("sizes", {}).get(table)
+            if old:
+                line += f"   was {old['table'] / 1024:.0f} / {old['indexes'] / 1024:.0f} KiB"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Join-heavy audit/report queries and course-key storage sizes.")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["small"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", metavar="RESULTS_JSON", help="earlier results to compare against")
+    parser.add_argument("--no-record", action="store_true", help="don't write a results file")
+    args = parser.parse_args(argv)
+
+    from benchmarks.bench_storage_profiles import configure
+    workdir = tempfile.mkdtemp(prefix="bench_course_keys_")
+    configure(os.path.join(workdir, "bench.sqlite3"))
+
+    results = {
+        "commit": git_commit(),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "scales": {scale: run(scale, workdir, args.repeat) for scale in args.scale},
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if not args.no_record:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"course_keys_{datetime.now():%Y%m%d_%H%M%S}_{results['commit']}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark for src.utils.prepare_django_inserts on synthetic requirement trees.
+
+Compares the single-pass builder with the previous implementation, which looked up every
+course's metadata by re-walking the whole tree (O(courses x course entries)), and checks
+that both produce the same payload. The previous builder also emitted one course row per
+node listing the course (its `break` only left the inner loop); the comparison keeps the
+first of those rows, which is the metadata both versions intend to use.
+
+    python -m benchmarks.bench_prepare_inserts
+"""
+import random
+import timeit
+
+from src.course_parser import CourseData, RequirementNodeData, walk_tree
+from src.utils import prepare_django_inserts
+
+MATCH = {"major_code": "BENCH", "base_major_code": "BENCH", "major_name_registrar": "Benchmark"}
+SUBJECTS = ["BIOL", "CHEM", "ENGL", "HIST", "KIN", "MATH", "PHYS", "PSY"]
+
+
+def synthetic_tree(n_courses, groups=12, subgroups=6, entries_per_course=3, seed=0):
+    """
+    A general-education shaped tree: `groups` h2 nodes, each with `subgroups` choose nodes
+    holding leaf nodes. Every course is listed `entries_per_course` times in random nodes,
+    with varying names/credits so "first seen" metadata actually matters.
+    """
+    rng = random.Random(seed)
+    roots = []
+    leaves = []
+    for g in range(groups):
+        root = RequirementNodeData(name=f"Group {g} (30 Credits)", type="credits", required_credits=30)
+        for s in range(subgroups):
+            sub = RequirementNodeData(name=f"Area {g}.{s}", type="choose", required_credits=None)
+            for leaf_idx in range(2):
+                leaf = RequirementNodeData(name=f"Option {g}.{s}.{leaf_idx}", type="credits", required_credits=6)
+                sub.children.append(leaf)
+                leaves.append(leaf)
+            root.children.append(sub)
+            leaves.append(sub)
+        roots.append(root)
+        leaves.append(root)
+
+    for i in range(n_courses):
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        number = f"{1000 + i // len(SUBJECTS):04d}"
+        for entry in range(entries_per_course):
+            rng.choice(leaves).courses.append(
+                CourseData(subject, number, f"Course {i} v{entry}", rng.choice([1, 3, 4]))
+            )
+    return roots
+
+
+def reference_prepare_django_inserts(parsed_tree, match_result, major_name_web, total_credits_required, catalog_year):
+    # The implementation prior to the single-pass builder, kept for comparison.
+    from collections import deque
+    requirement_nodes, node_courses, course_set = [], [], set()
+    id_counter = 0
+    queue = deque([(node, None) for node in parsed_tree])
+    while queue:
+        node, parent_id = queue.popleft()
+        node_id = id_counter
+        id_counter += 1
+        requirement_nodes.append({
+            "id": node_id, "parent_id": parent_id, "name": node.name,
+            "type": node.type, "required_credits": node.required_credits
+        })
+        for course in node.courses:
+            course_id = f"{course.subject}-{course.number}"
+            course_set.add(course_id)
+            node_courses.append({"node_id": node_id, "course_id": course_id})
+        for child in node.children:
+            queue.append((child, node_id))
+
+    course_data = []
+    for cid in sorted(course_set):
+        subj, num = cid.split("-")
+        for node in walk_tree(parsed_tree):
+            for course in node.courses:
+                if course.subject == subj and course.number == num:
+                    course_data.append({
+                        "course_id": cid, "subject": course.subject, "course_number": course.number,
+                        "course_name": course.name, "credits": course.credits
+                    })
+                    break
+    return {
+        "major": {
+            "major_code": match_result["major_code"], "base_major_code": match_result["base_major_code"],
+            "major_name_web": major_name_web, "major_name_registrar": match_result["major_name_registrar"],
+            "total_credits_required": total_credits_required, "catalog_year": catalog_year
+        },
+        "courses": course_data,
+        "requirement_nodes": requirement_nodes,
+        "node_courses": node_courses
+    }
+
+
+def main(sizes=(250, 1000, 4000), repeat=3):
+    print(f"{'courses':>8} {'entries':>8} {'single-pass':>12} {'reference':>12} {'speedup':>8}")
+    for n_courses in sizes:
+        tree = synthetic_tree(n_courses)
+        args = (tree, MATCH, "Benchmark (B.S.)", 120, 202430)
+        new_payload = prepare_django_inserts(*args)
+        reference = reference_prepare_django_inserts(*args)
+        first_rows = {}
+        for row in reference["courses"]:
+            first_rows.setdefault(row["course_id"], row)
+        assert new_payload == {**reference, "courses": list(first_rows.values())}, "payload mismatch"
+
+        fast = min(timeit.repeat(lambda: prepare_django_inserts(*args), number=1, repeat=repeat))
+        slow = min(timeit.repeat(lambda: reference_prepare_django_inserts(*args), number=1, repeat=repeat))
+        entries = len(new_payload["node_courses"])
+        print(f"{n_courses:>8} {entries:>8} {fast * 1000:>10.1f}ms {slow * 1000:>10.1f}ms {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
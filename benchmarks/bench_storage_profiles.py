@@ -0,0 +1,132 @@
+"""
+Benchmark for the SQLite storage profiles in src.storage on a scaled synthetic dataset.
+
+Builds a throwaway database, loads one synthetic catalog, then imports a generated registrar
+extract and runs the audit and the export twice: first with every profile emptied (plain
+SQLite defaults, indexes kept during the import) and then with the "bulk_load" and "read"
+profiles and deferred indexes. Each pass starts from a freshly migrated database file.
+
+    python -m benchmarks.bench_storage_profiles [students]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+TERMS = [202230, 202310, 202330, 202410, 202430]
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D", "F", "W"]
+MAJOR_CODE = "ACCT"
+
+
+def configure(db_path):
+    import settings as project_settings
+    settings.configure(
+        INSTALLED_APPS=project_settings.INSTALLED_APPS,
+        DEFAULT_AUTO_FIELD=project_settings.DEFAULT_AUTO_FIELD,
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": db_path}},
+        SQLITE_STORAGE_PROFILE="default",
+    )
+    django.setup()
+
+
+def write_extract(path, n_students, course_ids, courses_per_term=5, seed=0):
+    """Registrar-shaped CSV: every student takes `courses_per_term` courses in each term."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "ID", "HS_GRAD", "FT_TERM", "MAJOR", "CONC", "CATALOG", "TERM", "SUBJ", "CRSE",
+            "GRADE", "CREDITS", "CRSE_ATTR", "INSTITUTION", "FT_TERM_CNT"
+        ])
+        for s in range(n_students):
+            sid = f"T{s:08d}"
+            for term_cnt, term in enumerate(TERMS, start=1):
+                for course_id in rng.sample(course_ids, courses_per_term):
+                    subject, number = course_id.split("-")
+                    writer.writerow([
+                        sid, 2022, TERMS[0], MAJOR_CODE, "", TERMS[0], term, subject, number,
+                        rng.choice(GRADES), 3, "", "SUU", term_cnt
+                    ])
+    return n_students * len(TERMS) * courses_per_term
+
+
+def reset_database():
+    from django.core.management import call_command
+    from django.db import connection
+    connection.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(settings.DATABASES["default"]["NAME"] + suffix):
+            os.remove(settings.DATABASES["default"]["NAME"] + suffix)
+    call_command("migrate", verbosity=0)
+
+
+def load_catalog():
+    from benchmarks.bench_prepare_inserts import synthetic_tree
+    from src.data import populate_catalog_from_payload
+    from src.utils import prepare_django_inserts
+
+    match = {"major_code": MAJOR_CODE, "base_major_code": MAJOR_CODE, "major_name_registrar": "Major in Accounting"}
+    payload = prepare_django_inserts(synthetic_tree(400), match, "Accounting (B.A., B.S.)", 120, TERMS[0])
+    populate_catalog_from_payload(payload)
+    return [row["course_id"] for row in payload["courses"]]
+
+
+def run_pass(csv_path, tuned):
+    from src import storage
+    from src.data import import_student_data_from_csv
+    from src.eligibility import run_audit
+    from src.output import create_dataframe
+
+    saved = dict(storage.PROFILES)
+    if not tuned:
+        storage.PROFILES.update({name: {} for name in storage.PROFILES})
+    timings = {}
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        start = time.perf_counter()
+        result = import_student_data_from_csv(csv_path, defer_indexes=tuned)
+        timings["import"] = time.perf_counter() - start
+        assert result["success"], result["message"]
+
+        start = time.perf_counter()
+        run_audit(TERMS[-1])
+        timings["audit"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        create_dataframe(TERMS[-1])
+        timings["export"] = time.perf_counter() - start
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+        storage.PROFILES.clear()
+        storage.PROFILES.update(saved)
+    return timings
+
+
+def main(n_students=2000):
+    workdir = tempfile.mkdtemp(prefix="bench_storage_")
+    configure(os.path.join(workdir, "bench.sqlite3"))
+    csv_path = os.path.join(workdir, "extract.csv")
+
+    results = {}
+    for label, tuned in (("default", False), ("profiles", True)):
+        reset_database()
+        course_ids = load_catalog()
+        rows = write_extract(csv_path, n_students, course_ids)
+        results[label] = run_pass(csv_path, tuned)
+
+    print(f"{n_students} students, {rows} records")
+    print(f"{'phase':>8} {'default':>10} {'profiles':>10} {'speedup':>8}")
+    for phase in ("import", "audit", "export"):
+        base, tuned = results["default"][phase], results["profiles"][phase]
+        print(f"{phase:>8} {base:>9.2f}s {tuned:>9.2f}s {base / tuned:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
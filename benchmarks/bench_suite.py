@@ -0,0 +1,160 @@
+"""
+End-to-end benchmark suite on synthetic data (see benchmarks/synthetic.py).
+
+For every scale, a fresh database is migrated and the generated data is pushed through the
+pipeline: scrape parsing (the saved program page in tests/data, once per synthetic major),
+catalog population, CSV import, audit and export of the newest term. Each phase runs under
+src.metrics, so its SQL query count is recorded next to its wall time.
+
+    python -m benchmarks.bench_suite --scale small medium
+    python -m benchmarks.bench_suite --scale small --compare benchmarks/results/<earlier>.json
+
+Results are written to benchmarks/results/<timestamp>_<commit>.json for comparison between
+commits. That directory is git-ignored; quote the numbers in commit messages instead.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCALES = {
+    # name: (students, academic years, majors)
+    "small": (500, 4, 8),
+    "medium": (5000, 6, 20),
+    "large": (50000, 10, 40),
+}
+PHASES = ("parse", "populate", "import", "audit", "export")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SAVED_PAGE = os.path.join("tests", "data", "exercise_science.html")
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "src"]).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def run_phase(name, func, log_dir):
+    """Runs func() quietly under metrics_run(); returns its result and {seconds, queries}."""
+    from src.metrics import metrics_run
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        with metrics_run(name, log_dir=log_dir) as recorder:
+            result = func()
+        seconds = time.perf_counter() - start
+    return result, {"seconds": round(seconds, 4), "queries": recorder.stages[name]["queries"]}
+
+
+def run_scale(name, workdir):
+    from benchmarks.bench_storage_profiles import reset_database
+    from benchmarks.synthetic import generate
+    from src.data import import_student_data_from_csv, populate_catalog_from_payloads
+    from src.eligibility import run_audit
+    from src.output import create_dataframe
+    from src.parse_worker import parse_program_html
+    from src.requirement_tree import invalidate_requirement_trees
+    from src.utils import load_major_code_lookup
+
+    students, years, n_majors = SCALES[name]
+    data_dir = os.path.join(workdir, name)
+    start = time.perf_counter()
+    data = generate(data_dir, students=students, years=years, n_majors=n_majors)
+    generate_seconds = time.perf_counter() - start
+    reset_database()
+    invalidate_requirement_trees()  # ids restart in the new database
+
+    with open(SAVED_PAGE, encoding="utf-8") as f:
+        html = f.read()
+    meta = {"major_code": "EXSC", "base_major_code": "EXSC", "major_name_registrar": "Exercise Science"}
+    with open(data["paths"]["catalog.json"]) as f:
+        payloads = json.load(f)
+    major_codes = load_major_code_lookup(data["paths"]["major_codes.csv"])
+    term = data["last_term"]
+
+    steps = {
+        "parse": lambda: [
+            parse_program_html(html, meta, "Exercise Science (B.S.)", term) for _ in range(n_majors)
+        ],
+        "populate": lambda: populate_catalog_from_payloads(payloads),
+        "import": lambda: import_student_data_from_csv(data["paths"]["extract.csv"], major_lookup_df=major_codes),
+        "audit": lambda: run_audit(term),
+        "export": lambda: create_dataframe(term),
+    }
+    phases = {}
+    for phase in PHASES:
+        result, phases[phase] = run_phase(phase, steps[phase], log_dir=os.path.join(workdir, "logs"))
+        if phase == "import" and not result["success"]:
+            raise RuntimeError(result["message"])
+
+    return {
+        "students": students,
+        "years": years,
+        "majors": n_majors,
+        "records": data["records"],
+        "payloads": data["payloads"],
+        "generate_seconds": round(generate_seconds, 4),
+        "phases": phases,
+    }
+
+
+def print_results(results, baseline=None):
+    for scale, result in results["scales"].items():
+        print(f"\n{scale}: {result['students']} students, {result['records']} records, {result['payloads']} catalogs")
+        before = (baseline or {}).get("scales", {}).get(scale, {}).get("phases", {})
+        header = f"{'phase':>9} {'seconds':>9} {'queries':>8}"
+        print(header + (f" {'baseline':>9} {'change':>8}" if before else ""))
+        for phase, measured in result["phases"].items():
+            line = f"{phase:>9} {measured['seconds']:>8.3f}s {measured['queries']:>8}"
+            if phase in before:
+                old = before[phase]["seconds"]
+                line += f" {old:>8.3f}s {(measured['seconds'] - old) / old * 100 if old else 0:>+7.1f}%"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks on synthetic data.")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["small"])
+    parser.add_argument("--compare", metavar="RESULTS_JSON", help="earlier results to compare against")
+    parser.add_argument("--no-record", action="store_true", help="don't write a results file")
+    args = parser.parse_args(argv)
+
+    from benchmarks.bench_storage_profiles import configure
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    configure(os.path.join(workdir, "bench.sqlite3"))
+
+    results = {
+        "commit": git_commit(),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scales": {scale: run_scale(scale, workdir) for scale in args.scale},
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if not args.no_record:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{results['commit']}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,185 @@
+"""
+Deterministic synthetic data at configurable scale: registrar extracts in the current column
+layout, a matching major_codes.csv, and scraped-catalog payloads (prepare_django_inserts()
+output) for every major and catalog year. The same arguments always produce byte-identical
+files.
+
+    python -m benchmarks.synthetic out/ --students 50000 --years 10 --majors 40
+
+writes out/extract.csv, out/major_codes.csv and out/catalog.json.
+
+Students enter in a fall term of one of the `years` academic years, keep one major and take
+four to six courses per spring and fall term for up to eight terms, about half of them from
+their major's requirement tree. Each major's tree is revised every third catalog year, so
+catalog imports see both new and reused tree structures.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+
+from src.course_parser import CourseData, RequirementNodeData
+from src.utils import prepare_django_inserts
+
+SUBJECTS = [
+    "ACCT", "ART", "BIOL", "CHEM", "COMM", "CS", "ECON", "ENGL", "FIN", "HIST",
+    "KIN", "MATH", "MGMT", "MUSC", "NURS", "PHYS", "POLS", "PSY", "SOC", "THEA",
+]
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "F", "W", "P"]
+GRADE_WEIGHTS = [14, 10, 10, 14, 8, 7, 9, 5, 3, 3, 5, 8, 4]
+EXTRACT_COLUMNS = [
+    "ID", "HS_GRAD", "FT_TERM", "MAJOR", "CONC", "MINORS", "CATALOG", "TERM", "SUBJ", "CRSE",
+    "GRADE", "CREDITS", "CRSE_ATTR", "INSTITUTION", "FT_TERM_CNT",
+]
+MAX_TERMS = 8
+
+
+def course_pool(n_courses=800, seed=0):
+    """[(subject, number, credits)], spread evenly over SUBJECTS."""
+    rng = random.Random(seed)
+    return [
+        (SUBJECTS[i % len(SUBJECTS)], f"{1000 + (i // len(SUBJECTS)) * 10:04d}", rng.choice([1, 2, 3, 3, 3, 4]))
+        for i in range(n_courses)
+    ]
+
+
+def majors(n_majors):
+    """[(major code, registrar name, web name)] in major_codes.csv terms."""
+    return [(f"SY{i:03d}", f"Major in Synthetic Studies {i}", f"Synthetic Studies {i} (B.S.)") for i in range(n_majors)]
+
+
+def catalog_years(first_year, n_years):
+    return [(first_year + y) * 100 + 30 for y in range(n_years)]
+
+
+def requirement_tree(courses, revision, groups=4, subgroups=3):
+    """A parsed tree over `courses`: credit groups of choose nodes whose leaves list the courses."""
+    rng = random.Random(revision)
+    courses = list(courses)
+    rng.shuffle(courses)
+    leaves = []
+    roots = []
+    for g in range(groups):
+        root = RequirementNodeData(name=f"Group {g} (15 Credits)", type="credits", required_credits=15)
+        for s in range(subgroups):
+            sub = RequirementNodeData(name=f"Area {g}.{s}", type="choose", required_credits=None)
+            leaf = RequirementNodeData(name=f"Option {g}.{s}", type="credits", required_credits=6)
+            sub.children.append(leaf)
+            root.children.append(sub)
+            leaves.append(leaf)
+        roots.append(root)
+    for i, (subject, number, credits) in enumerate(courses):
+        leaves[i % len(leaves)].courses.append(CourseData(subject, number, f"{subject} {number}", credits))
+    return roots
+
+
+def catalog_payloads(n_majors=10, first_year=2015, n_years=10, courses_per_major=40, pool=None, seed=0):
+    """prepare_django_inserts() payloads for every major in every catalog year, and each major's course ids."""
+    pool = pool or course_pool(seed=seed)
+    rng = random.Random(seed)
+    payloads = []
+    major_courses = {}
+    for index, (code, registrar, web) in enumerate(majors(n_majors)):
+        courses = rng.sample(pool, courses_per_major)
+        major_courses[code] = [f"{subject}-{number}" for subject, number, _ in courses]
+        match = {"major_code": code, "base_major_code": code, "major_name_registrar": registrar}
+        for y, catalog_year in enumerate(catalog_years(first_year, n_years)):
+            # A new revision every third year; the years in between reuse the same structure.
+            tree = requirement_tree(courses, revision=f"{seed}:{index}:{y // 3}")
+            payloads.append(prepare_django_inserts(tree, match, web, 120, catalog_year))
+    return payloads, major_courses
+
+
+def write_major_codes(path, n_majors):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Major Code", "Major Name Registrar", "Major Name Web"])
+        writer.writerows(majors(n_majors))
+
+
+def student_terms(entry_year, last_term):
+    """Fall of the entry year, then alternating spring/fall terms, up to MAX_TERMS or last_term."""
+    terms = []
+    term = entry_year * 100 + 30
+    while len(terms) < MAX_TERMS and term <= last_term:
+        terms.append(term)
+        term += 80 if term % 100 == 30 else 20
+    return terms
+
+
+def write_registrar_csv(path, n_students, major_courses, first_year=2015, n_years=10, pool=None, seed=0):
+    """Writes the extract row by row (constant memory). Returns the number of rows written."""
+    pool = pool or course_pool(seed=seed)
+    credits = {f"{subject}-{number}": c for subject, number, c in pool}
+    pool_ids = list(credits)
+    codes = sorted(major_courses)
+    last_term = (first_year + n_years - 1) * 100 + 30
+    rng = random.Random(seed + 1)
+    rows = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXTRACT_COLUMNS)
+        for s in range(n_students):
+            sid = f"T{s + 1:08d}"
+            code = codes[s % len(codes)]
+            entry_year = first_year + rng.randrange(n_years)
+            first_term = entry_year * 100 + 30
+            taken = set()
+            for term_cnt, term in enumerate(student_terms(entry_year, last_term), start=1):
+                for _ in range(rng.randint(4, 6)):
+                    pick = major_courses[code] if rng.random() < 0.5 else pool_ids
+                    course_id = rng.choice(pick)
+                    if course_id in taken:
+                        continue
+                    taken.add(course_id)
+                    subject, number = course_id.split("-")
+                    writer.writerow([
+                        sid, entry_year * 100 + 20, first_term, code, "", "", first_term, term, subject, number,
+                        rng.choices(GRADES, GRADE_WEIGHTS)[0], credits[course_id], "", "3678", term_cnt,
+                    ])
+                    rows += 1
+    return rows
+
+
+def generate(out_dir, students=1000, years=4, n_majors=8, courses_per_major=40, first_year=None, seed=0):
+    """
+    Writes extract.csv, major_codes.csv and catalog.json into out_dir. The academic years end
+    with 2024-2025 unless first_year is given. Returns a summary dict including the paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    first_year = first_year or 2025 - years
+    pool = course_pool(seed=seed)
+    payloads, major_courses = catalog_payloads(n_majors, first_year, years, courses_per_major, pool, seed)
+
+    paths = {name: os.path.join(out_dir, name) for name in ("extract.csv", "major_codes.csv", "catalog.json")}
+    write_major_codes(paths["major_codes.csv"], n_majors)
+    with open(paths["catalog.json"], "w") as f:
+        json.dump(payloads, f)
+    rows = write_registrar_csv(paths["extract.csv"], students, major_courses, first_year, years, pool, seed)
+    return {
+        "students": students,
+        "years": years,
+        "majors": n_majors,
+        "records": rows,
+        "payloads": len(payloads),
+        "last_term": (first_year + years - 1) * 100 + 30,
+        "paths": paths,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--majors", type=int, default=8)
+    parser.add_argument("--courses-per-major", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    summary = generate(args.out_dir, args.students, args.years, args.majors, args.courses_per_major, seed=args.seed)
+    print(f"{summary['records']} records for {summary['students']} students, {summary['payloads']} catalog payloads")
+
+
+if __name__ == "__main__":
+    main()
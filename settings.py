@@ -11,4 +11,13 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': "db.sqlite3",
     }
-}
\ No newline at end of file
+}
+
+# Sends reads to an in-memory snapshot while one is active (see src/snapshot.py).
+DATABASE_ROUTERS = ['src.snapshot.SnapshotRouter']
+
+# SQLite PRAGMA profile applied to every new connection (see src/storage.py).
+# Imports and audits switch to the "bulk_load" and "read" profiles on their own.
+SQLITE_STORAGE_PROFILE = "default"
+# Set on every new connection; WAL persists in the database file, so readers don't block on imports.
+SQLITE_JOURNAL_MODE = "WAL"
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class SrcConfig(AppConfig):
+    name = "src"
+
+    def ready(self):
+        from src.storage import apply_default_profile
+        connection_created.connect(apply_default_profile, dispatch_uid="src.storage.apply_default_profile")
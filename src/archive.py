@@ -0,0 +1,128 @@
+"""
+Archival of closed terms.
+
+StudentRecord only needs the terms an audit's academic-year window can reach; older terms are
+moved to ArchivedStudentRecord and listed in ArchivedTerm. Both tables share their columns, so
+archive_terms() and restore_terms() are single INSERT ... SELECT / DELETE pairs (nothing refers
+to record ids, so each table numbers its rows itself). Readers go through load_transcripts(),
+which only touches the archive for students whose history reaches back into an archived term.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from src.models import ArchivedStudentRecord, ArchivedTerm, StudentRecord
+
+# An audit reads back at most one academic year before its term; two keeps a margin.
+KEEP_YEARS = 2
+
+
+def archived_terms():
+    return set(ArchivedTerm.objects.values_list("term", flat=True))
+
+
+def closed_terms(current_term, keep_years=KEEP_YEARS):
+    """Live terms older than `keep_years` academic years before current_term."""
+    return sorted(
+        StudentRecord.objects
+        .filter(term__lt=current_term - keep_years * 100)
+        .values_list("term", flat=True)
+        .distinct()
+    )
+
+
+def _move_rows(source, target, terms):
+    columns = ", ".join(
+        connection.ops.quote_name(f.column) for f in source._meta.concrete_fields if not f.primary_key
+    )
+    placeholders = ", ".join(["%s"] * len(terms))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {target._meta.db_table} ({columns}) "
+            f"SELECT {columns} FROM {source._meta.db_table} WHERE term IN ({placeholders})",
+            list(terms)
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"DELETE FROM {source._meta.db_table} WHERE term IN ({placeholders})", list(terms))
+    return moved
+
+
+def refresh_archived_counts(terms):
+    counts = dict(
+        ArchivedStudentRecord.objects
+        .filter(term__in=terms)
+        .values_list("term")
+        .annotate(n=Count("id"))
+    )
+    ArchivedTerm.objects.bulk_create(
+        [ArchivedTerm(term=term, record_count=counts.get(term, 0)) for term in terms],
+        update_conflicts=True,
+        unique_fields=["term"],
+        update_fields=["record_count"]
+    )
+
+
+def archive_terms(terms):
+    """Moves every StudentRecord row of `terms` into the archive. Returns the number of rows moved."""
+    terms = sorted(set(terms))
+    if not terms:
+        return 0
+    with transaction.atomic():
+        moved = _move_rows(StudentRecord, ArchivedStudentRecord, terms)
+        refresh_archived_counts(terms)
+    return moved
+
+
+def restore_terms(terms):
+    """Moves archived terms back into StudentRecord. Returns the number of rows moved."""
+    terms = sorted(set(terms))
+    if not terms:
+        return 0
+    with transaction.atomic():
+        moved = _move_rows(ArchivedStudentRecord, StudentRecord, terms)
+        ArchivedTerm.objects.filter(term__in=terms).delete()
+    return moved
+
+
+def archive_closed_terms(current_term, keep_years=KEEP_YEARS):
+    terms = closed_terms(current_term, keep_years)
+    moved = archive_terms(terms)
+    print(f"Archived {moved} records from {len(terms)} closed terms")
+    return terms
+
+
+def load_transcripts(student_ids, select_related=("course",)):
+    """
+    Every record of the given students, grouped by student id and ordered by (term, id).
+    The archive is only queried for students whose first term is at or before the newest
+    archived term, i.e. whose cumulative history (GPA) actually reaches into it.
+
+    Term order, not id order: archiving renumbers rows, so ids from the two tables don't compare.
+    Audits fill requirements in this order, so a record imported after a later term's record
+    still counts first; before archiving existed, records filled requirements in import (id) order.
+    """
+    transcripts = defaultdict(list)
+    for record in StudentRecord.objects.filter(student_id__in=student_ids).select_related(*select_related):
+        transcripts[record.student_id].append(record)
+
+    archived = archived_terms()
+    if archived:
+        newest_archived = max(archived)
+        reaching_back = [
+            sid for sid, records in transcripts.items()
+            if min(r.first_term for r in records) <= newest_archived
+        ]
+        # Students with no live records at all can only be in the archive.
+        reaching_back += [sid for sid in student_ids if sid not in transcripts]
+        if reaching_back:
+            for record in (
+                ArchivedStudentRecord.objects
+                .filter(student_id__in=reaching_back)
+                .select_related(*select_related)
+            ):
+                transcripts[record.student_id].append(record)
+
+    for records in transcripts.values():
+        records.sort(key=lambda r: (r.term, r.id))
+    return transcripts
@@ -1,18 +1,36 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextvars import copy_context
 
 import requests
 
-from src.course_parser import parse_course_structure_as_tree
-from src.data import populate_catalog_from_payload
+from src.data import populate_catalog_from_payload, populate_catalog_from_payloads
 from src.log_utils import CatalogBatchLogger
-from src.models import MajorMapping
+from src.metrics import stage
+from src.models import MajorMapping, ProgramFingerprint
+from src.parse_worker import init_parse_worker, parse_program_html
+from src.storage import storage_profile
 from src.suu_scraper import get_catalog_years
-from src.suu_scraper import pull_catalog_year, find_all_programs_link, find_degree, fetch_total_credits
+from src.suu_scraper import pull_catalog_year, find_all_programs_link, find_degree, program_summary_fingerprint
 from src.utils import load_major_code_lookup
-from src.utils import match_major_name_web_to_registrar, prepare_django_inserts
 
+EXECUTOR_MODES = ("thread", "hybrid")
+
+
+def scrape_catalog_year(year, majors, major_code_df, threshold=85, dry_run=False, max_threads=10,
+                        executor_mode="thread", max_processes=None):
+    """
+    Scrapes every program in `majors` for one catalog year.
+
+    executor_mode="thread" downloads and parses each page inside the thread pool.
+    executor_mode="hybrid" keeps downloads on the thread pool but hands the CPU-bound
+    HTML -> payload conversion to a ProcessPoolExecutor (max_processes workers,
+    defaults to the number of cores) so parsing is not serialized on the GIL.
+    """
+    if executor_mode not in EXECUTOR_MODES:
+        raise ValueError(f"Unknown executor_mode '{executor_mode}'. Expected one of {EXECUTOR_MODES}.")
 
-def scrape_catalog_year(year, majors, major_code_df, threshold=85, dry_run=False, max_threads=10):
     results = []
     catalog_url = pull_catalog_year(year)
     all_programs_link = find_all_programs_link(catalog_url)
@@ -37,73 +55,159 @@ def scrape_catalog_year(year, majors, major_code_df, threshold=85, dry_run=False
         for _, row in major_code_df.iterrows()
     }
 
-    def scrape_major(major_name_web):
+    # Preload what we already know about this year so worker threads don't hit the DB per program.
+    known_fingerprints = {
+        fp.program_url: fp.content_hash
+        for fp in ProgramFingerprint.objects.filter(catalog_year=catalog_year)
+    }
+    imported_codes = set(
+        MajorMapping.objects.filter(catalog_year=catalog_year).values_list("major_code", flat=True)
+    )
+
+    def fetch_major(major_name_web):
         try:
             if major_name_web not in major_code_map:
                 return {"status": "skipped", "major_name_web": major_name_web, "reason": "Not in major_codes.csv"}
 
             meta = major_code_map[major_name_web]
-            if MajorMapping.objects.filter(major_code=meta["major_code"], catalog_year=catalog_year).exists():
-                return {"status": "skipped", "major_name_web": major_name_web, "reason": "Already imported"}
-
             program_url = find_degree(all_programs_link, major_name_web)
             if not program_url:
                 return {"status": "failed", "major_name_web": major_name_web, "reason": "Could not find program URL"}
 
-            html = requests.get(program_url + "&print").text
-            total_credits = fetch_total_credits(html)
-            structure = parse_course_structure_as_tree(html)
+            with stage("fetch"):
+                html = requests.get(program_url + "&print").text
+            fingerprint = program_summary_fingerprint(html)
+            previous = known_fingerprints.get(program_url)
+            if previous == fingerprint and meta["major_code"] in imported_codes:
+                return {"status": "unchanged", "major_name_web": major_name_web, "reason": "Program summary unchanged"}
 
-            payload = prepare_django_inserts(
-                parsed_tree=structure,
-                match_result=meta,
-                major_name_web=major_name_web,
-                total_credits_required=total_credits,
-                catalog_year=catalog_year
-            )
+            # A mapping without a stored fingerprint predates change detection; re-import it in place.
+            change = "changed" if previous or meta["major_code"] in imported_codes else "new"
 
             return {
-                "status": "scraped",
+                "status": "fetched",
                 "major_name_web": major_name_web,
-                "payload": payload
+                "meta": meta,
+                "html": html,
+                "program_url": program_url,
+                "fingerprint": fingerprint,
+                "change": change
             }
 
         except Exception as e:
             return {"status": "failed", "major_name_web": major_name_web, "reason": str(e)}
 
-    with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        future_to_major = {executor.submit(scrape_major, m): m for m in majors}
-        for future in as_completed(future_to_major):
-            result = future.result()
-            if result["status"] == "scraped":
-                scraped_payloads.append(result)
-            else:
-                results.append(result)
-
-    for scraped in scraped_payloads:
+    def scrape_major(major_name_web):
+        fetched = fetch_major(major_name_web)
+        if fetched["status"] != "fetched":
+            return fetched
         try:
-            if not dry_run:
-                populate_catalog_from_payload(scraped["payload"])
-            results.append({
-                "status": "parsed" if dry_run else "imported",
-                "major_name_web": scraped["major_name_web"]
-            })
+            with stage("parse"):
+                payload = parse_program_html(fetched["html"], fetched["meta"], major_name_web, catalog_year)
+            return _scraped(fetched, payload)
         except Exception as e:
-            results.append({
-                "status": "failed",
-                "major_name_web": scraped["major_name_web"],
-                "reason": str(e)
-            })
+            return {"status": "failed", "major_name_web": major_name_web, "reason": str(e)}
+
+    if executor_mode == "thread":
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            future_to_major = {executor.submit(copy_context().run, scrape_major, m): m for m in majors}
+            for future in as_completed(future_to_major):
+                result = future.result()
+                if result["status"] == "scraped":
+                    scraped_payloads.append(result)
+                else:
+                    results.append(result)
+    else:
+        with ThreadPoolExecutor(max_workers=max_threads) as io_pool, \
+                ProcessPoolExecutor(max_workers=max_processes or os.cpu_count(),
+                                    initializer=init_parse_worker) as cpu_pool:
+            fetch_futures = [io_pool.submit(copy_context().run, fetch_major, m) for m in majors]
+            parse_futures = {}
+            for future in as_completed(fetch_futures):
+                fetched = future.result()
+                if fetched["status"] != "fetched":
+                    results.append(fetched)
+                    continue
+                parse_future = cpu_pool.submit(
+                    parse_program_html, fetched["html"], fetched["meta"], fetched["major_name_web"], catalog_year
+                )
+                parse_futures[parse_future] = fetched
+
+            for future in as_completed(parse_futures):
+                fetched = parse_futures[future]
+                try:
+                    scraped_payloads.append(_scraped(fetched, future.result()))
+                except Exception as e:
+                    results.append({"status": "failed", "major_name_web": fetched["major_name_web"], "reason": str(e)})
+
+    if dry_run:
+        imported = scraped_payloads
+    else:
+        with stage("populate"):
+            imported = _import_scraped_payloads(scraped_payloads, results)
+        ProgramFingerprint.objects.bulk_create(
+            [
+                ProgramFingerprint(
+                    program_url=scraped["program_url"],
+                    catalog_year=catalog_year,
+                    major_code=scraped["payload"]["major"]["major_code"],
+                    content_hash=scraped["fingerprint"]
+                )
+                for scraped in imported
+            ],
+            update_conflicts=True,
+            unique_fields=["program_url", "catalog_year"],
+            update_fields=["major_code", "content_hash", "updated_at"]
+        )
+
+    for scraped in imported:
+        results.append({
+            "status": "parsed" if dry_run else "imported",
+            "major_name_web": scraped["major_name_web"],
+            "change": scraped["change"]
+        })
 
     return results
 
 
+def _import_scraped_payloads(scraped_payloads, results):
+    """
+    Loads all scraped payloads of a catalog year in one transaction. If that fails, falls back
+    to one transaction per program so a single bad page only fails itself (recorded in results).
+    """
+    try:
+        populate_catalog_from_payloads([scraped["payload"] for scraped in scraped_payloads], defer_indexes=True)
+        return scraped_payloads
+    except Exception:
+        imported = []
+        for scraped in scraped_payloads:
+            try:
+                populate_catalog_from_payload(scraped["payload"])
+                imported.append(scraped)
+            except Exception as e:
+                results.append({"status": "failed", "major_name_web": scraped["major_name_web"], "reason": str(e)})
+        return imported
+
+
+def _scraped(fetched, payload):
+    return {
+        "status": "scraped",
+        "major_name_web": fetched["major_name_web"],
+        "payload": payload,
+        "program_url": fetched["program_url"],
+        "fingerprint": fetched["fingerprint"],
+        "change": fetched["change"]
+    }
+
+
 def batch_scrape_all_catalogs(
     base_url="https://www.suu.edu/academics/catalog/",
     majors_file="majors.txt",
     dry_run=False,
     selected_years=None,
-    max_threads=4
+    max_threads=4,
+    executor_mode="thread",
+    max_processes=None
 ):
     logger = CatalogBatchLogger()
     catalog_year_map = get_catalog_years(base_url)
@@ -116,27 +220,38 @@ def batch_scrape_all_catalogs(
 
     major_code_df = load_major_code_lookup("major_codes.csv")
 
-    for year_str in sorted(catalog_year_map.keys(), reverse=True):
-        print(f"\n📅 Catalog Year: {year_str}")
-        try:
-            results = scrape_catalog_year(
-                year=year_str,
-                majors=majors,
-                major_code_df=major_code_df,
-                dry_run=dry_run,
-                max_threads=max_threads
-            )
-            for r in results:
-                match r["status"]:
-                    case "parsed":
-                        logger.parsed(r["major_name_web"])
-                    case "imported":
-                        logger.imported(r["major_name_web"])
-                    case "skipped":
-                        logger.skipped(r["major_name_web"], r.get("reason"))
-                    case "failed":
-                        logger.failed(r["major_name_web"], r.get("reason"))
-        except Exception as e:
-            print(f"❌ ERROR in catalog year {year_str}: {e}")
+    # Catalog imports run on this thread's connection, so the whole run uses the bulk-load
+    # profile. Indexes are only deferred inside each year's import transaction (see
+    # _import_scraped_payloads), never across the network scrape.
+    with ExitStack() as bulk_load:
+        if not dry_run:
+            bulk_load.enter_context(storage_profile("bulk_load"))
+        for year_str in sorted(catalog_year_map.keys(), reverse=True):
+            print(f"\n📅 Catalog Year: {year_str}")
+            try:
+                with stage(year_str):
+                    results = scrape_catalog_year(
+                        year=year_str,
+                        majors=majors,
+                        major_code_df=major_code_df,
+                        dry_run=dry_run,
+                        max_threads=max_threads,
+                        executor_mode=executor_mode,
+                        max_processes=max_processes
+                    )
+                for r in results:
+                    match r["status"]:
+                        case "parsed":
+                            logger.parsed(r["major_name_web"], change=r["change"])
+                        case "imported":
+                            logger.imported(r["major_name_web"], change=r["change"])
+                        case "unchanged":
+                            logger.unchanged(r["major_name_web"], r.get("reason"))
+                        case "skipped":
+                            logger.skipped(r["major_name_web"], r.get("reason"))
+                        case "failed":
+                            logger.failed(r["major_name_web"], r.get("reason"))
+            except Exception as e:
+                print(f"❌ ERROR in catalog year {year_str}: {e}")
 
     logger.close()
@@ -0,0 +1,216 @@
+"""
+Command-line entry point.
+
+    python main.py scrape --years 2023-2024 2024-2025
+    python main.py import Bogus_data_2.csv
+    python main.py audit 202430
+    python main.py export 202430 --format xlsx
+    python main.py run-all --csv Bogus_data_2.csv --term 202410 202430
+    python main.py serve --port 8765 --warm-term 202430
+    python main.py watch inbox/ --settle 10
+    python main.py --metrics audit 202430     # also writes logs/metrics_audit_<timestamp>.json
+    python main.py --profile export 202430    # cProfile + tracemalloc under logs/profile_export_<timestamp>/
+    python main.py --debug-log logs/audit.jsonl audit 202430   # per-student detail as JSON lines
+
+Only argparse is imported up front. Each subcommand sets up Django and imports the modules
+it needs inside its handler, so `audit` never loads pandas, BeautifulSoup, requests or
+RapidFuzz, and `export` never loads the scraper.
+"""
+import argparse
+import os
+import sys
+from contextlib import ExitStack
+
+DEFAULT_CATALOG_URL = "https://www.suu.edu/academics/catalog/"
+
+
+def setup_django():
+    # Must run before any src.* module that touches the ORM is imported.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+    import django
+    django.setup()
+
+
+def cmd_scrape(args):
+    from src.batch import batch_scrape_all_catalogs
+    batch_scrape_all_catalogs(
+        base_url=args.base_url,
+        majors_file=args.majors_file,
+        dry_run=args.dry_run,
+        selected_years=args.years,
+        max_threads=args.threads,
+        executor_mode=args.executor,
+        max_processes=args.processes
+    )
+
+
+def cmd_import(args):
+    from src.data import import_student_data_from_csv
+    result = import_student_data_from_csv(args.csv, defer_indexes=args.defer_indexes)
+    print(result["message"])
+    return 0 if result["success"] else 1
+
+
+def cmd_audit(args):
+    from src.eligibility import run_audit
+    run_audit(args.term, snapshot=args.snapshot)
+
+
+def cmd_export(args):
+    from src.output import output_to_csv, output_to_xlsx
+    export = output_to_xlsx if args.format == "xlsx" else output_to_csv
+    export(args.term, snapshot=args.snapshot)
+
+
+def cmd_run_all(args):
+    from src.pipeline import build_stages, run_pipeline
+    scrape = None if args.skip_scrape else {
+        "base_url": args.base_url,
+        "majors_file": args.majors_file,
+        "dry_run": args.dry_run,
+        "selected_years": args.years,
+        "max_threads": args.threads,
+        "executor_mode": args.executor,
+        "max_processes": args.processes,
+    }
+    stages = build_stages(
+        args.csv, args.terms, scrape=scrape, export_format=args.format, snapshot=args.snapshot,
+        defer_indexes=args.defer_indexes
+    )
+    # tracemalloc is process-wide: profile one stage at a time so its figures are the stage's own.
+    status = run_pipeline(stages, force=args.force, max_workers=1 if args.profile else args.workers)
+    return 1 if any(s in ("failed", "blocked") for s in status.values()) else 0
+
+
+def cmd_serve(args):
+    from src.service import serve
+    serve(host=args.host, port=args.port, warm_terms=args.warm_term)
+
+
+def cmd_watch(args):
+    from src.utils import load_major_code_lookup
+    from src.watcher import InboxWatcher
+    watcher = InboxWatcher(
+        args.inbox, pattern=args.pattern, settle_seconds=args.settle, poll_interval=args.interval,
+        major_code_df=load_major_code_lookup(args.major_codes)
+    )
+    if args.once:
+        reports = watcher.poll_once()
+        return 1 if any(not r["success"] for r in reports) else 0
+    watcher.run_forever()
+
+
+def _add_scrape_arguments(parser):
+    parser.add_argument("--years", nargs="+", metavar="YEAR",
+                        help='catalog years to scrape, e.g. "2024-2025" (default: all listed)')
+    parser.add_argument("--majors-file", default="majors.txt")
+    parser.add_argument("--base-url", default=DEFAULT_CATALOG_URL)
+    parser.add_argument("--threads", type=int, default=12, help="download threads")
+    parser.add_argument("--executor", choices=["thread", "hybrid"], default="hybrid",
+                        help="hybrid parses pages on a process pool")
+    parser.add_argument("--processes", type=int, help="parser processes in hybrid mode (default: cores)")
+    parser.add_argument("--dry-run", action="store_true", help="scrape and parse without writing")
+
+
+def _add_import_arguments(parser, positional=True):
+    if positional:
+        parser.add_argument("csv", help="registrar extract to import")
+    else:
+        parser.add_argument("--csv", required=True, help="registrar extract to import")
+    parser.add_argument("--defer-indexes", action=argparse.BooleanOptionalAction, default=None,
+                        help="rebuild StudentRecord indexes after the load (default: when the file is large)")
+
+
+def _add_read_arguments(parser, positional=True):
+    if positional:
+        parser.add_argument("term", type=int, help="term code, e.g. 202430")
+    else:
+        parser.add_argument("--term", dest="terms", type=int, nargs="+", required=True, metavar="TERM",
+                            help="term codes to audit and export, e.g. 202430")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="read from an in-memory copy of the database")
+
+
+def _add_export_arguments(parser):
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Automatic athletic eligibility audit.")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record per-stage wall/CPU time and SQL counts to logs/metrics_<command>_<time>.json")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        type=str.upper, help="console verbosity")
+    parser.add_argument("--debug-log", metavar="PATH",
+                        help="write debug records and per-student/per-row detail to PATH as JSON lines")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each stage with cProfile and tracemalloc into logs/profile_<command>_<time>/")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    scrape = commands.add_parser("scrape", help="scrape catalog years into the database")
+    _add_scrape_arguments(scrape)
+    scrape.set_defaults(handler=cmd_scrape)
+
+    import_ = commands.add_parser("import", help="import a registrar CSV extract")
+    _add_import_arguments(import_)
+    import_.set_defaults(handler=cmd_import)
+
+    audit = commands.add_parser("audit", help="run the eligibility audit for a term")
+    _add_read_arguments(audit)
+    audit.set_defaults(handler=cmd_audit)
+
+    export = commands.add_parser("export", help="write a term's audit results to a spreadsheet")
+    _add_read_arguments(export)
+    _add_export_arguments(export)
+    export.set_defaults(handler=cmd_export)
+
+    run_all = commands.add_parser(
+        "run-all", help="scrape, import, audit and export, skipping stages whose inputs are unchanged"
+    )
+    _add_scrape_arguments(run_all)
+    _add_import_arguments(run_all, positional=False)
+    _add_read_arguments(run_all, positional=False)
+    _add_export_arguments(run_all)
+    run_all.add_argument("--skip-scrape", action="store_true", help="reuse the catalogs already in the database")
+    run_all.add_argument("--force", action="store_true", help="re-run every stage even if nothing changed")
+    run_all.add_argument("--workers", type=int, default=4, help="stages run concurrently when independent")
+    run_all.set_defaults(handler=cmd_run_all)
+
+    serve = commands.add_parser("serve", help="serve audits over HTTP/JSON with warm caches")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--warm-term", type=int, nargs="*", default=[], metavar="TERM",
+                       help="terms to load into memory at start-up")
+    serve.set_defaults(handler=cmd_serve)
+
+    watch = commands.add_parser("watch", help="import and re-audit extracts dropped into an inbox folder")
+    watch.add_argument("inbox", help="folder to watch; finished files move to processed/ or failed/")
+    watch.add_argument("--pattern", default="*.csv")
+    watch.add_argument("--interval", type=float, default=2.0, help="seconds between polls")
+    watch.add_argument("--settle", type=float, default=5.0,
+                       help="seconds a file's size and mtime must stay unchanged before it is imported")
+    watch.add_argument("--major-codes", default="major_codes.csv")
+    watch.add_argument("--once", action="store_true",
+                       help="process the files that are already settled and exit (use --settle 0)")
+    watch.set_defaults(handler=cmd_watch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_django()
+    from src.progress import configure_logging
+    configure_logging(args.log_level, debug_log=args.debug_log)
+    with ExitStack() as instrumentation:
+        if args.metrics:
+            from src.metrics import metrics_run
+            instrumentation.enter_context(metrics_run(args.command))
+        if args.profile:
+            from src.profiling import profile_run
+            instrumentation.enter_context(profile_run(args.command))
+        return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,6 @@ import re
 from typing import List, Optional, Generator
 from dataclasses import dataclass, field
 
-from src.models import RequirementNode
-
 
 @dataclass
 class CourseData:
@@ -139,20 +137,20 @@ def parse_course_structure_as_tree(html: str) -> List[RequirementNodeData]:
 
 
 def print_requirement_tree(major):
-    roots = RequirementNode.objects.filter(major=major, parent__isnull=True)
+    from src.requirement_tree import get_requirement_tree  # keeps the parser itself free of Django
+    tree = get_requirement_tree(major)
 
     def print_node(node, depth=0):
         indent = "  " * depth
         print(f"{indent}- {node.name} [{node.type}] ({node.required_credits} credits)")
 
         # Show courses under this node
-        courses = node.courses.all()
-        for course in courses:
-            print(f"{indent}  - {course.course_id}")
+        for course_id in node.course_ids:
+            print(f"{indent}  - {tree.course_codes[course_id]}")
 
         # Recurse to children
-        for child in node.children.all():
+        for child in node.children:
             print_node(child, depth + 1)
 
-    for root in roots:
+    for root in tree.roots:
         print_node(root)
@@ -0,0 +1,38 @@
+"""
+Course code -> id lookups for bulk writers.
+
+Courses are keyed by an integer id; the "SUBJ-CRSE" code (Course.course_id) is what extracts
+and catalog payloads carry. The importer and catalog population resolve every code through
+one CourseLookup: a single query for (code, id) pairs, no model instances, and missing
+courses are created in one bulk insert.
+
+    courses = CourseLookup()
+    courses.create([Course(course_id="KIN-3050", ...)])
+    NodeCourse(node=node, course_id=courses["KIN-3050"])
+"""
+from src.models import Course
+
+
+class CourseLookup:
+    def __init__(self, codes=None):
+        """Loads every course, or only those with the given codes."""
+        courses = Course.objects.all()
+        if codes is not None:
+            courses = courses.filter(course_id__in=list(codes))
+        self.ids = dict(courses.values_list("course_id", "id"))
+
+    def __contains__(self, code):
+        return code in self.ids
+
+    def __getitem__(self, code):
+        return self.ids[code]
+
+    def get(self, code, default=None):
+        return self.ids.get(code, default)
+
+    def create(self, courses):
+        """Bulk-inserts new Course objects (ids are set on them) and adds them to the lookup."""
+        courses = list(courses)
+        Course.objects.bulk_create(courses, batch_size=2000)
+        self.ids.update((course.course_id, course.id) for course in courses)
+        return courses
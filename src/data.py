@@ -1,11 +1,32 @@
+import logging
+from collections import defaultdict
+from contextlib import nullcontext
+
 import pandas as pd
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Max
+
+from src.archive import archived_terms, refresh_archived_counts
+from src.courses import CourseLookup
+from src.eligibility import refresh_term_summaries
+from src.maintenance import delete_requirement_nodes
+from src.metrics import stage
+from src.progress import DETAIL, Progress
+from src.requirement_tree import get_requirement_tree, invalidate_requirement_trees, sync_requirement_trees
+from src.storage import deferred_indexes, storage_profile
+from src.models import Student, StudentRecord, MajorMapping, Course, NodeCourse, RequirementNode, CatalogTree
+from src.models import ArchivedStudentRecord, CatalogSnapshot
+from src.utils import load_major_code_lookup, normalize_catalog_term, requirement_tree_hash
 
-from src.models import Student, StudentRecord, MajorMapping, Course, NodeCourse, RequirementNode
-from src.utils import load_major_code_lookup, normalize_catalog_term
+log = logging.getLogger(__name__)
 
 
 # Data Import Functions
+def _int_or(value, default):
+    """int(value), or default for blanks (NaN) in the extract."""
+    return int(value) if pd.notna(value) else default
+
+
 def is_duplicate_record(student_id, term, course_id):
     return StudentRecord.objects.filter(
         student__student_id=student_id,
@@ -14,9 +35,17 @@ def is_duplicate_record(student_id, term, course_id):
     ).exists()
 
 
-def import_student_data_from_csv(file_path):
+def import_student_data_from_csv(file_path, defer_indexes=None, major_lookup_df=None):
+    """
+    Imports a registrar extract. Runs under the "bulk_load" storage profile; the StudentRecord
+    secondary indexes are dropped and rebuilt afterwards when defer_indexes is True, or by
+    default (None) when the file is at least as large as the existing table.
+    major_lookup_df is the major_codes.csv lookup, loaded from disk unless a caller has it warm.
+    """
+    sync_requirement_trees()
     try:
-        df = pd.read_csv(file_path)
+        with stage("read_csv"):
+            df = pd.read_csv(file_path)
 
         col_map = {
             "ID": "student_id",
@@ -42,101 +71,157 @@ def import_student_data_from_csv(file_path):
 
         # Load major and course mappings from DB
         major_map = {(m.major_code, m.catalog_year): m for m in MajorMapping.objects.all()}
-        course_map = {c.course_id: c for c in Course.objects.all()}
+        courses = CourseLookup()
 
         # Load web name → major code mapping
-        major_lookup_df = load_major_code_lookup("major_codes.csv")
-        name_to_code = dict(zip(major_lookup_df["Major Name Web"], major_lookup_df["Major Code"]))
+        if major_lookup_df is None:
+            major_lookup_df = load_major_code_lookup("major_codes.csv")
+        known_codes = set(major_lookup_df["Major Code"])
 
         students_created = 0
         records_created = 0
         unmatched_majors: dict[str, list[str]] = {}
 
-        with transaction.atomic():
-            for _, row in df.iterrows():
-                student_id = str(row["ID"])
-                major_code = str(row["MAJOR"]).strip()
-                conc_code = str(row["CONC"]).strip() if "CONC" in row and pd.notna(row["CONC"]) else None
-                effective_code = conc_code or major_code
-                catalog_year = normalize_catalog_term(int(row["CATALOG"]))
-                term = int(row["TERM"])
-                course_id = f"{row['SUBJ']}-{row['CRSE']}"
-
-                # Verify that the major exists in scraped data
-                matched_web_names = major_lookup_df.loc[
-                    major_lookup_df["Major Code"] == effective_code, "Major Name Web"
-                ]
-                if matched_web_names.empty:
-                    unmatched_majors.setdefault(effective_code, []).append(student_id)
-                    continue
-
-                major_obj = major_map.get((effective_code, catalog_year))
-                if not major_obj:
-                    unmatched_majors.setdefault(effective_code, []).append(student_id)
-                    continue
-
-                # Create or update Student
-                student, _ = Student.objects.get_or_create(student_id=student_id)
-                updated = False
-                if student.major != major_obj:
-                    student.major = major_obj
-                    updated = True
-                if student.declared_major_code != major_code:
-                    student.declared_major_code = major_code
-                    updated = True
-                if updated:
-                    student.save(update_fields=["major", "declared_major_code"])
-
-                # Create or find Course
-                if course_id not in course_map:
-                    course = Course.objects.create(
-                        course_id=course_id,
-                        subject=row["SUBJ"],
-                        course_number=row["CRSE"],
-                        course_name="",  # Optional field
-                        credits=row["CREDITS"]
-                    )
-                    course_map[course_id] = course
-                else:
-                    course = course_map[course_id]
-
-                if StudentRecord.objects.filter(student=student, term=term, course=course).exists():
-                    continue  # skip duplicate records
-
-                if not pd.notna(row.get("CREDITS")):
-                    continue  # skip any rows without CREDITS since those are likely incomplete.
-
-                record = StudentRecord(
-                    student=student,
-                    high_school_grad=row.get("HS_GRAD", row.get("FT_TERM")),
-                    first_term=row["FT_TERM"],
-                    term=term,
-                    course=course,
-                    grade=row["GRADE"],
-                    credits=int(row["CREDITS"]),
-                    course_attributes=row.get("CRSE_ATTR", "") if pd.notna(row.get("CRSE_ATTR", "")) else "",
-                    institution=row["INSTITUTION"],
-                    counts_toward_major=False,
-                    ft_term_cnt=int(row.get("FT_TERM_CNT", 0))
+        if defer_indexes is None:
+            defer_indexes = len(df) >= StudentRecord.objects.count()
+
+        with storage_profile("bulk_load"), transaction.atomic(), \
+                (deferred_indexes(StudentRecord) if defer_indexes else nullcontext()):
+            # Rows of archived (closed) terms are checked against and written to the archive.
+            file_terms = {int(t) for t in df["TERM"].dropna().unique()}
+            archived = archived_terms() & file_terms
+            # (student, term, course) keys already stored for the terms in this file
+            existing_keys = set(
+                StudentRecord.objects
+                .filter(term__in=file_terms - archived)
+                .values_list("student_id", "term", "course_id")
+            )
+            if archived:
+                existing_keys.update(
+                    ArchivedStudentRecord.objects
+                    .filter(term__in=archived)
+                    .values_list("student_id", "term", "course_id")
                 )
+            new_records = []
+            new_archived_records = []
+
+            with stage("records"):
+                # Students of this file, loaded once; new and changed ones are written in bulk below.
+                students = Student.objects.in_bulk([str(sid) for sid in df["ID"].unique()])
+                new_students = {}
+                changed_students = {}
+                new_courses = {}
+
+                progress = Progress("Rows read", total=len(df), logger=log)
+                for row in df.to_dict("records"):
+                    progress.advance()
+                    student_id = str(row["ID"])
+                    major_code = str(row["MAJOR"]).strip()
+                    conc_code = str(row["CONC"]).strip() if "CONC" in row and pd.notna(row["CONC"]) else None
+                    effective_code = conc_code or major_code
+                    catalog_year = normalize_catalog_term(int(row["CATALOG"]))
+                    term = int(row["TERM"]) if pd.notna(row["TERM"]) else None
+                    course_id = f"{row['SUBJ']}-{row['CRSE']}"
+
+                    # Verify that the major exists in scraped data
+                    if effective_code not in known_codes:
+                        unmatched_majors.setdefault(effective_code, []).append(student_id)
+                        continue
+
+                    major_obj = major_map.get((effective_code, catalog_year))
+                    if not major_obj:
+                        unmatched_majors.setdefault(effective_code, []).append(student_id)
+                        continue
+
+                    # Create or update Student
+                    student = students.get(student_id)
+                    if student is None:
+                        student = students[student_id] = new_students[student_id] = Student(student_id=student_id)
+                    if student.major_id != major_obj.id or student.declared_major_code != major_code:
+                        student.major = major_obj
+                        student.declared_major_code = major_code
+                        if student_id not in new_students:
+                            changed_students[student_id] = student
+
+                    # Find or create the Course. Keys hold course ids, or the code of a course first
+                    # seen in this file: it has no id until the write below and no stored records yet.
+                    course_pk = courses.get(course_id)
+                    if course_pk is None:
+                        course = new_courses.get(course_id)
+                        if course is None:
+                            course = new_courses[course_id] = Course(
+                                course_id=course_id,
+                                subject=row["SUBJ"],
+                                course_number=row["CRSE"],
+                                course_name="",  # Optional field
+                                credits=_int_or(row["CREDITS"], 0)
+                            )
+                        course_ref = {"course": course}
+                        key = (student.student_id, term, course_id)
+                    else:
+                        course_ref = {"course_id": course_pk}
+                        key = (student.student_id, term, course_pk)
+
+                    if key in existing_keys:
+                        continue  # skip duplicate records
+
+                    if term is None or not pd.notna(row.get("CREDITS")):
+                        continue  # skip any rows without TERM or CREDITS since those are likely incomplete.
+
+                    record_model = ArchivedStudentRecord if term in archived else StudentRecord
+                    record = record_model(
+                        student=student,
+                        high_school_grad=_int_or(row.get("HS_GRAD"), _int_or(row.get("FT_TERM"), 0)),
+                        first_term=row["FT_TERM"],
+                        term=term,
+                        **course_ref,
+                        grade=row["GRADE"],
+                        credits=int(row["CREDITS"]),
+                        course_attributes=row.get("CRSE_ATTR", "") if pd.notna(row.get("CRSE_ATTR", "")) else "",
+                        institution=row["INSTITUTION"],
+                        counts_toward_major=False,
+                        ft_term_cnt=_int_or(row.get("FT_TERM_CNT"), 0)
+                    )
 
-                # Determine degree applicability
-                if course.nodecourse_set.filter(node__major=major_obj).exists():
-                    record.counts_toward_major = True
+                    # Determine degree applicability
+                    if course_pk in get_requirement_tree(major_obj).course_ids:
+                        record.counts_toward_major = True
 
-                record.save()
-                records_created += 1
+                    existing_keys.add(key)
+                    (new_archived_records if term in archived else new_records).append(record)
+                progress.finish()
 
+            with stage("write"):
+                Student.objects.bulk_create(new_students.values(), batch_size=2000)
+                Student.objects.bulk_update(
+                    changed_students.values(), ["major", "declared_major_code"], batch_size=500
+                )
+                courses.create(new_courses.values())
+                StudentRecord.objects.bulk_create(new_records, batch_size=2000)
+                if new_archived_records:
+                    ArchivedStudentRecord.objects.bulk_create(new_archived_records, batch_size=2000)
+                    refresh_archived_counts(archived)
+            records_created = len(new_records) + len(new_archived_records)
+            # {term: [student ids]} that received new records, for incremental re-audits
+            affected = defaultdict(set)
+            for record in new_records + new_archived_records:
+                affected[record.term].add(record.student_id)
+            affected = {term: sorted(ids) for term, ids in sorted(affected.items())}
+            refresh_term_summaries({sid for ids in affected.values() for sid in ids}, file_terms)
             students_created = Student.objects.count()
 
         if unmatched_majors:
-            print("\n⚠️ Unmatched majors found in CSV (no corresponding scraped catalog):")
+            # Counts on the console; the student IDs only go to the debug log.
+            log.warning("⚠️ Unmatched majors found in CSV (no corresponding scraped catalog):")
             for major, students in unmatched_majors.items():
-                print(f" - {major}: {', '.join(list(set(students)))}")
+                unique = sorted(set(students))
+                log.warning(" - %s: %d students, %d rows", major, len(unique), len(students))
+                DETAIL.debug("unmatched_major", extra={"data": {"major": major, "student_ids": unique}})
 
         return {
             "success": True,
-            "message": f"Imported {records_created} student records across {students_created} students."
+            "message": f"Imported {records_created} student records across {students_created} students.",
+            "affected": affected
         }
 
     except Exception as e:
@@ -144,60 +229,176 @@ def import_student_data_from_csv(file_path):
 
 
 def populate_catalog_from_payload(payload):
-    with transaction.atomic():
-        major_data = payload["major"]
-
-        # Create or update MajorMapping
-        major, _ = MajorMapping.objects.update_or_create(
-            major_code=major_data["major_code"],
-            catalog_year=major_data["catalog_year"],
-            defaults={
-                "base_major_code": major_data.get("base_major_code"),
-                "major_name_web": major_data["major_name_web"],
-                "major_name_registrar": major_data["major_name_registrar"],
-                "total_credits_required": major_data["total_credits_required"]
-            }
-        )
-
-        # Create missing courses
-        course_ids = [c["course_id"] for c in payload["courses"]]
-        existing_ids = set(
-            Course.objects.filter(course_id__in=course_ids).values_list("course_id", flat=True)
-        )
-        new_courses = [Course(**c) for c in payload["courses"] if c["course_id"] not in existing_ids]
+    """
+    Writes a prepare_django_inserts() payload to the database.
+    Requirement trees are content-addressed: if a CatalogTree with the same structure hash
+    already exists (e.g. the same program in another catalog year) it is reused, otherwise a
+    new one is created. The MajorMapping is then pointed at that tree, which also replaces a
+    previously imported tree for the same major in place.
+    """
+    return populate_catalog_from_payloads([payload])[0]
+
+
+def populate_catalog_from_payloads(payloads, defer_indexes=False):
+    """
+    Bulk version of populate_catalog_from_payload() that loads many payloads in one transaction.
+    Requirement nodes of all new trees are inserted level by level with one bulk_create per
+    depth, so the number of INSERT statements depends on tree depth, not on node count.
+    With defer_indexes the RequirementNode/NodeCourse secondary indexes are dropped for the
+    write and rebuilt before commit; a failure rolls the DROP back with everything else.
+    Returns one result dict per payload, in order.
+    """
+    with transaction.atomic(), \
+            (deferred_indexes(RequirementNode, NodeCourse) if defer_indexes else nullcontext()):
+        # Create missing courses (the first payload to mention a course supplies its metadata)
+        course_rows = {}
+        for payload in payloads:
+            for course in payload["courses"]:
+                course_rows.setdefault(course["course_id"], course)
+        courses = CourseLookup(course_rows)
+        new_courses = [Course(**c) for cid, c in course_rows.items() if cid not in courses]
         if new_courses:
-            Course.objects.bulk_create(new_courses)
-
-        # Refresh the course map to include new inserts
-        course_map = {
-            c.course_id: c for c in Course.objects.filter(course_id__in=course_ids)
-        }
+            courses.create(new_courses)
+        new_course_ids = {c.course_id for c in new_courses}
+
+        # Resolve or create one CatalogTree per distinct structure
+        hashes = [requirement_tree_hash(payload) for payload in payloads]
+        trees = {t.content_hash: t for t in CatalogTree.objects.filter(content_hash__in=set(hashes))}
+        tree_payloads = {}
+        for tree_hash, payload in zip(hashes, payloads):
+            if tree_hash not in trees and tree_hash not in tree_payloads:
+                tree_payloads[tree_hash] = payload
+        if tree_payloads:
+            for tree in CatalogTree.objects.bulk_create([CatalogTree(content_hash=h) for h in tree_payloads]):
+                trees[tree.content_hash] = tree
+
+        node_objs = _bulk_create_tree_nodes(
+            [(trees[tree_hash], payload["requirement_nodes"]) for tree_hash, payload in tree_payloads.items()]
+        )
 
-        # Insert RequirementNodes and preserve parent structure
-        id_to_node_obj = {}
-        for i, node_data in enumerate(payload["requirement_nodes"]):
-            parent_obj = id_to_node_obj.get(node_data["parent_id"])
-            db_node = RequirementNode.objects.create(
-                major=major,
+        node_course_objs = {tree_hash: [] for tree_hash in tree_payloads}
+        for tree_hash, payload in tree_payloads.items():
+            tree_id = trees[tree_hash].id
+            for nc in payload["node_courses"]:
+                node_course_objs[tree_hash].append(
+                    NodeCourse(node=node_objs[(tree_id, nc["node_id"])], course_id=courses[nc["course_id"]])
+                )
+        NodeCourse.objects.bulk_create([nc for objs in node_course_objs.values() for nc in objs])
+
+        majors = _bulk_upsert_majors(payloads, [trees[h] for h in hashes])
+
+        # Nodes owned directly by a major predate shared trees and are superseded now.
+        delete_requirement_nodes(RequirementNode.objects.filter(major__in=majors))
+
+        # Drop cached trees now and again once committed, in case another thread reloaded meanwhile.
+        stale = {"major_ids": [m.pk for m in majors], "tree_ids": [trees[h].id for h in tree_payloads]}
+        invalidate_requirement_trees(**stale)
+        transaction.on_commit(lambda: invalidate_requirement_trees(**stale))
+
+        results = []
+        created_hashes = set()
+        for tree_hash, payload, major in zip(hashes, payloads, majors):
+            created = tree_hash in tree_payloads and tree_hash not in created_hashes
+            created_hashes.add(tree_hash)
+            results.append({
+                "major": major,
+                "tree": trees[tree_hash],
+                "tree_reused": not created,
+                "nodes_created": len(payload["requirement_nodes"]) if created else 0,
+                "courses_created": sum(1 for c in payload["courses"] if c["course_id"] in new_course_ids),
+                "node_courses_created": len(node_course_objs[tree_hash]) if created else 0
+            })
+        return results
+
+
+def _bulk_create_tree_nodes(trees_with_nodes):
+    """
+    Inserts payload requirement nodes for several trees with one bulk_create per tree depth.
+    Parents must appear before their children in each node list (prepare_django_inserts emits
+    nodes breadth-first). Materialized paths are built from the payload node ids, which are
+    unique within a tree. Returns {(tree_id, payload node id): RequirementNode}.
+    """
+    levels = defaultdict(list)
+    for tree, nodes in trees_with_nodes:
+        depth = {}
+        for node_data in nodes:
+            parent_id = node_data["parent_id"]
+            depth[node_data["id"]] = 0 if parent_id is None else depth[parent_id] + 1
+            levels[depth[node_data["id"]]].append((tree, node_data))
+
+    node_objs = {}
+    preassign = not connection.features.can_return_rows_from_bulk_insert
+    next_id = (RequirementNode.objects.aggregate(Max("id"))["id__max"] or 0) + 1 if preassign else None
+
+    for depth in sorted(levels):
+        level_objs = []
+        for tree, node_data in levels[depth]:
+            parent_obj = node_objs.get((tree.id, node_data["parent_id"]))
+            node_obj = RequirementNode(
+                tree=tree,
                 parent=parent_obj,
                 name=node_data["name"],
                 type=node_data["type"],
-                required_credits=node_data["required_credits"]
+                required_credits=node_data["required_credits"],
+                path=(parent_obj.path if parent_obj else "") + RequirementNode.path_segment(node_data["id"]),
+                depth=depth
             )
-            id_to_node_obj[i] = db_node
-
-        # Create NodeCourse mappings
-        node_course_objs = []
-        for nc in payload["node_courses"]:
-            node_obj = id_to_node_obj[nc["node_id"]]
-            course_obj = course_map[nc["course_id"]]
-            node_course_objs.append(NodeCourse(node=node_obj, course=course_obj))
-
-        NodeCourse.objects.bulk_create(node_course_objs)
+            if preassign:
+                node_obj.id = next_id
+                next_id += 1
+            level_objs.append(node_obj)
+            node_objs[(tree.id, node_data["id"])] = node_obj
+        RequirementNode.objects.bulk_create(level_objs)
+
+    return node_objs
+
+
+def _bulk_upsert_majors(payloads, trees):
+    """
+    Creates or updates the MajorMapping of every payload; returns them in payload order.
+    A major whose requirement tree changes gets its catalog_version bumped and a new
+    CatalogSnapshot; the old tree stays in place for collect_catalog_garbage().
+    """
+    keys = [(p["major"]["major_code"], p["major"]["catalog_year"]) for p in payloads]
+    existing = {
+        (m.major_code, m.catalog_year): m
+        for m in MajorMapping.objects.filter(
+            major_code__in={code for code, _ in keys},
+            catalog_year__in={year for _, year in keys}
+        )
+    }
 
-        return {
-            "major": major,
-            "nodes_created": len(id_to_node_obj),
-            "courses_created": len(new_courses),
-            "node_courses_created": len(node_course_objs)
-        }
+    to_create = {}
+    to_update = {}
+    swapped = []
+    for key, payload, tree in zip(keys, payloads, trees):
+        major_data = payload["major"]
+        major = existing.get(key) or to_create.get(key) or MajorMapping(
+            major_code=major_data["major_code"], catalog_year=major_data["catalog_year"]
+        )
+        major.base_major_code = major_data.get("base_major_code")
+        major.major_name_web = major_data["major_name_web"]
+        major.major_name_registrar = major_data["major_name_registrar"]
+        major.total_credits_required = major_data["total_credits_required"]
+        if major.requirement_tree_id != tree.id:
+            major.requirement_tree = tree
+            major.catalog_version += 1
+            swapped.append((major, major.catalog_version, tree))
+        if key in existing:
+            to_update[key] = major
+        else:
+            to_create[key] = major
+
+    if to_create:
+        MajorMapping.objects.bulk_create(list(to_create.values()))
+    if to_update:
+        MajorMapping.objects.bulk_update(list(to_update.values()), [
+            "base_major_code", "major_name_web", "major_name_registrar", "total_credits_required",
+            "requirement_tree", "catalog_version"
+        ])
+    if swapped:
+        CatalogSnapshot.objects.bulk_create([
+            CatalogSnapshot(major=major, version=version, tree=tree) for major, version, tree in swapped
+        ])
+
+    return [existing.get(key) or to_create[key] for key in keys]
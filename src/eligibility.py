@@ -1,6 +1,20 @@
+import logging
+from collections import defaultdict
+from contextlib import nullcontext
+
 from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Substr
 from typing import List
+from src.metrics import stage
+from src.progress import DETAIL, Progress, detail_enabled
 from src.models import *
+from src.requirement_tree import get_requirement_tree, sync_requirement_trees
+from src.snapshot import memory_snapshot
+from src.storage import storage_profile
+from src.transcripts import TranscriptStore
+
+log = logging.getLogger(__name__)
 
 GRADE_POINTS = {
     'A': 4.0, 'A-': 3.7, 'B+': 3.3, 'B': 3.0, 'B-': 2.7,
@@ -20,11 +34,13 @@ def passed(grade: str) -> bool:
     points = get_grade_points(grade)
     return points is not None and points >= 2.0
 
+PASSING_GRADES = [grade for grade in GRADE_POINTS if passed(grade)]
+
 class Requirement:
-    def __init__(self, req: RequirementNode):
+    def __init__(self, required_credits: int, course_ids: frozenset):
         self.__complete = False
-        self.__courses = NodeCourse.objects.filter(node=req)
-        self.__required_credits = req.required_credits
+        self.__course_ids = course_ids
+        self.__required_credits = required_credits
         self.credits = 0
 
     def is_complete(self) -> bool:
@@ -33,153 +49,320 @@ class Requirement:
     def completed(self):
         self.__complete = True
 
-    def is_required_course(self, stu_rec_course: Course) -> bool:
-        for c in self.__courses:
-            if c.course.course_id == stu_rec_course.course_id:
-                self.credits += stu_rec_course.credits
-                if self.__required_credits <= self.credits:
-                    self.completed()
-                return True
+    def is_required_course(self, course_id: int, course_credits: int) -> bool:
+        if course_id in self.__course_ids:
+            self.credits += course_credits
+            if self.__required_credits <= self.credits:
+                self.completed()
+            return True
         return False
 
-def create_req_list(major_id):
-    requirements = RequirementNode.objects.filter(major=major_id)
-    return [Requirement(r) for r in requirements if r.required_credits is not None]
+def create_req_list(major):
+    return [Requirement(credits, course_ids) for credits, course_ids in get_requirement_tree(major).requirements()]
+
+def check_if_required(req_list: List[Requirement], course_id: int, course_credits: int) -> bool:
+    return any(not r.is_complete() and r.is_required_course(course_id, course_credits) for r in req_list)
+
+def credits_by_requirement_group(major, student_id):
+    """
+    Passed credits per top-level requirement group, rolled up in SQL through the materialized
+    node paths (one query per record table). A record counts toward the first group (in catalog
+    order) that lists its course anywhere beneath it. Returns {group name: credits}.
+    """
+    width = RequirementNode.PATH_SEGMENT_WIDTH + 1
+    group_path = (
+        major.node_courses()
+        .filter(course_id=OuterRef("course_id"))
+        .annotate(group_path=Substr("node__path", 1, width))
+        .order_by("node__path")
+        .values("group_path")[:1]
+    )
+    # Closed terms live in the archive; only look there if anything has been archived.
+    record_models = [StudentRecord, ArchivedStudentRecord] if ArchivedTerm.objects.exists() else [StudentRecord]
+    totals = defaultdict(int)
+    for model in record_models:
+        rollup = (
+            model.objects
+            .filter(student_id=student_id, grade__in=PASSING_GRADES)
+            .annotate(group_path=Subquery(group_path))
+            .exclude(group_path__isnull=True)
+            .values("group_path")
+            .annotate(credits=Sum("credits"))
+        )
+        for row in rollup:
+            totals[row["group_path"]] += row["credits"]
+    group_names = dict(major.requirement_nodes().filter(depth=0).values_list("path", "name"))
+    return {group_names[path]: credits for path, credits in totals.items()}
+
+SUMMARY_CHUNK = 500  # student ids per query, well under SQLite's bound-parameter limit
+
+def compute_term_summaries(student_ids, terms=None):
+    """
+    Unsaved StudentTermSummary rows for `student_ids` (at most SUMMARY_CHUNK of them), computed
+    from their live and archived records, limited to `terms` when given.
+    """
+    record_models = [StudentRecord, ArchivedStudentRecord] if ArchivedTerm.objects.exists() else [StudentRecord]
+    majors = dict(Student.objects.filter(student_id__in=student_ids).values_list("student_id", "major_id"))
+    summaries = {}
+    for model in record_models:
+        records = model.objects.filter(student_id__in=student_ids)
+        if terms is not None:
+            records = records.filter(term__in=terms)
+        for sid, term, grade, credits, counts_toward_major, ft_term_cnt in records.values_list(
+            "student_id", "term", "grade", "credits", "counts_toward_major", "ft_term_cnt"
+        ):
+            summary = summaries.get((sid, term))
+            if summary is None:
+                summary = summaries[(sid, term)] = StudentTermSummary(
+                    student_id=sid, term=term, major_id=majors.get(sid)
+                )
+            summary.attempted_credits += credits
+            summary.ft_term_cnt = max(summary.ft_term_cnt, ft_term_cnt)
+            points = get_grade_points(grade)
+            if points is not None:
+                summary.gpa_points += points * credits
+                summary.gpa_credits += credits
+            if passed(grade):
+                summary.passed_credits += credits
+                if counts_toward_major:
+                    summary.da_credits += credits
+    return list(summaries.values())
+
+def refresh_term_summaries(student_ids, terms=None):
+    """
+    Recomputes the StudentTermSummary rows of the given students from their records, limited
+    to `terms` when given (the importer passes the terms in its file). Returns the number of
+    summaries written.
+    """
+    student_ids = sorted(set(student_ids))
+    terms = sorted(set(terms)) if terms is not None else None
+    written = 0
+    for start in range(0, len(student_ids), SUMMARY_CHUNK):
+        with stage("summary_chunk"):
+            written += _refresh_summary_chunk(student_ids[start:start + SUMMARY_CHUNK], terms)
+    return written
+
+def _refresh_summary_chunk(chunk, terms):
+    summaries = compute_term_summaries(chunk, terms)
+    with transaction.atomic():
+        stale = StudentTermSummary.objects.filter(student_id__in=chunk)
+        if terms is not None:
+            stale = stale.filter(term__in=terms)
+        stale.delete()
+        StudentTermSummary.objects.bulk_create(summaries)
+    return len(summaries)
 
-def check_if_required(req_list: List[Requirement], course_id) -> bool:
-    return any(not r.is_complete() and r.is_required_course(course_id) for r in req_list)
+def rebuild_term_summaries():
+    """Drops every StudentTermSummary and recomputes them all from the transcript tables."""
+    with transaction.atomic():
+        StudentTermSummary.objects.all().delete()
+        return refresh_term_summaries(Student.objects.values_list("student_id", flat=True))
+
+def gpa_from_summaries(summaries):
+    gpa_points = sum(summary.gpa_points for summary in summaries)
+    gpa_credits = sum(summary.gpa_credits for summary in summaries)
+    return round(gpa_points / gpa_credits, 2) if gpa_credits else 0.0
 
 def calculate_gpa(sid):
-    total_points = 0.0
-    total_credits = 0
-    for record in StudentRecord.objects.filter(student_id=sid):
-        points = get_grade_points(record.grade)
-        if points is not None:
-            total_points += points * record.credits
-            total_credits += record.credits
-    return round(total_points / total_credits, 2) if total_credits else 0.0
-
-def run_audit(current_term: int):
-    print(f"\nStarting eligibility audit for term {current_term}...\n")
-
-    student_ids = (
-        StudentRecord.objects
-        .filter(term=current_term)
+    return gpa_from_summaries(StudentTermSummary.objects.filter(student_id=sid))
+
+AUDIT_FIELDS = [
+    'total_term_credits', 'da_credits', 'total_academic_year_credits', 'ptc_major',
+    'satisfactory_ptc_major', 'eligible', 'gpa', 'satisfactory_gpa'
+]
+
+def audit_student(student, summaries, records, current_term):
+    """
+    Computes one student's audit. Credit totals and GPA come from the student's term
+    summaries; only the degree-applicable credits need the records themselves (the student's
+    Transcript from a TranscriptStore), since each requirement stops counting once complete.
+    Returns the unsaved StudentAudit and a list of (code, level, message) flags to attach to it.
+    """
+    major = student.major
+    gpa = gpa_from_summaries(summaries)
+
+    if not major:
+        audit = StudentAudit(
+            student=student,
+            term=current_term,
+            total_term_credits=0,
+            da_credits=0,
+            total_academic_year_credits=0,
+            ptc_major=0,
+            satisfactory_ptc_major=False,
+            eligible=False,
+            gpa=gpa,
+            satisfactory_gpa=gpa >= 2.0
+        )
+        flags = [(
+            "missing_major",
+            AuditFlag.ERROR,
+            "Student has no associated major in the database. Manual review required."
+        )]
+        return audit, flags
+
+    num_terms = max(summary.ft_term_cnt for summary in summaries)
+
+    if num_terms <= 2:
+        latest_full_academic_year = sorted(summary.term for summary in summaries)
+    elif current_term % 100 == 30:
+        latest_full_academic_year = [current_term - 100, current_term - 20]
+    elif current_term % 100 == 10:
+        latest_full_academic_year = [current_term - 80, current_term]
+    else:
+        latest_full_academic_year = [current_term - 90, current_term - 10]
+
+    credits_c_term = sum(s.passed_credits for s in summaries if s.term == current_term)
+    total_credits_academic_year = sum(s.passed_credits for s in summaries if s.term in latest_full_academic_year)
+
+    major_requirements = create_req_list(major)
+    da_credits_c_term = 0
+    total_da_credits = 0
+    for term, course_id, credits, course_credits in records.passed():
+        if check_if_required(major_requirements, course_id, course_credits):
+            if term == current_term:
+                da_credits_c_term += credits
+            total_da_credits += credits
+
+    ptc = (total_da_credits / major.total_credits_required) * 100 if major.total_credits_required else 0
+
+    current_term_credits = credits_c_term if num_terms < 5 else da_credits_c_term
+
+    satisfactory_gpa = (
+        gpa >= 1.8 if num_terms < 3 else
+        gpa >= 1.9 if num_terms < 5 else
+        gpa >= 2.0
+    )
+    satisfactory_ptc = (
+        ptc > 40.0 if num_terms == 4 else
+        ptc > 60.0 if num_terms == 6 else
+        ptc > 80.0 if num_terms == 8 else
+        True
+    )
+    satisfactory_term_credits = current_term_credits >= 6
+    satisfactory_year_credits = (
+        True if num_terms == 1 else
+        total_credits_academic_year >= 24 if num_terms == 2 else
+        total_credits_academic_year >= 18
+    )
+
+    eligible = all([
+        satisfactory_gpa,
+        satisfactory_ptc,
+        satisfactory_term_credits,
+        satisfactory_year_credits
+    ])
+
+    audit = StudentAudit(
+        student=student,
+        term=current_term,
+        total_term_credits=current_term_credits,
+        da_credits=total_da_credits,
+        total_academic_year_credits=total_credits_academic_year,
+        ptc_major=round(ptc, 2),
+        satisfactory_ptc_major=satisfactory_ptc,
+        eligible=eligible,
+        gpa=gpa,
+        satisfactory_gpa=satisfactory_gpa
+    )
+    return audit, []
+
+def run_audit(current_term: int, snapshot: bool = False, student_ids=None):
+    """
+    Audits every student with records in current_term, or only those of them listed in
+    student_ids. All reads happen up front under the "read" storage profile; the audits and
+    their flags are then written in a few bulk statements. With snapshot=True the reads are
+    served from an in-memory copy of the database, so the run only contends with imports
+    while copying and while writing its results. Returns the number of audits written.
+    """
+    log.info("Starting eligibility audit for term %s...", current_term)
+    sync_requirement_trees()  # another process may have loaded catalogs since the last run
+
+    term_records = StudentRecord.objects.filter(term=current_term)
+    if student_ids is not None:
+        term_records = term_records.filter(student_id__in=list(student_ids))
+
+    # Records written outside the importer have no summary yet; build those first.
+    unsummarized = (
+        term_records
+        .exclude(student__term_summaries__term=current_term)
         .values_list('student_id', flat=True)
         .distinct()
     )
+    with stage("refresh_summaries"):
+        refresh_term_summaries(unsummarized)
 
-    if not student_ids:
-        print("No Students found.")
-
-    for sid in student_ids:
-        print(f"\nAuditing student ID: {sid}")
-        student = Student.objects.filter(student_id=sid).first()
-        if not student:
-            continue
-
-        major = student.major
-        if not major:
-            gpa = calculate_gpa(sid)
-            audit = StudentAudit.objects.create(
-                student=student,
-                term=current_term,
-                total_term_credits=0,
-                da_credits=0,
-                total_academic_year_credits=0,
-                ptc_major=0,
-                satisfactory_ptc_major=False,
-                eligible=False,
-                gpa=gpa,
-                satisfactory_gpa=gpa >= 2.0
-            )
-            audit.add_flag(
-                code="missing_major",
-                level=AuditFlag.ERROR,
-                message="Student has no associated major in the database. Manual review required."
+    reads = memory_snapshot() if snapshot else nullcontext("default")
+    with reads as alias, storage_profile("read", using=alias):
+        with stage("load"):
+            student_ids = list(term_records.values_list('student_id', flat=True).distinct())
+
+            if not student_ids:
+                log.info("No Students found.")
+                return 0
+
+            # Load every student with their major up front: this pins each major's catalog version
+            # (requirement tree) for the whole run even if a catalog re-import swaps trees meanwhile.
+            students = Student.objects.select_related("major").in_bulk(student_ids)
+
+            summaries_by_student = defaultdict(list)
+            for summary in StudentTermSummary.objects.filter(student_id__in=student_ids):
+                summaries_by_student[summary.student_id].append(summary)
+            # Only degree-applicable credits need course-level records, and only for students with a major.
+            records_by_student = TranscriptStore.build(
+                term_records.filter(student__major__isnull=False).values("student_id")
             )
-            print(f"❌ Missing major for student {sid}. Audit flagged.")
-            continue
-
-        first_record = StudentRecord.objects.filter(student=sid).first()
-        if not first_record:
-            continue
-
-        num_terms = student.ft_term_cnt
-        print(f"Full-time semester number: {num_terms}")
-
-        records = StudentRecord.objects.filter(student=sid)
-        major_requirements = create_req_list(major)
-
-        credits_c_term = 0
-        total_credits_academic_year = 0
-        da_credits_c_term = 0
-        total_da_credits = 0
-
-        if num_terms <= 2:
-            terms = records.values_list("term", flat=True).distinct()
-            latest_full_academic_year = sorted(list(terms))
-        elif current_term % 100 == 30:
-            latest_full_academic_year = [current_term - 100, current_term - 20]
-        elif current_term % 100 == 10:
-            latest_full_academic_year = [current_term - 80, current_term]
-        else:
-            latest_full_academic_year = [current_term - 90, current_term - 10]
-
-        for record in records:
-            if passed(record.grade):
-                if record.term == current_term:
-                    credits_c_term += record.credits
-                if record.term in latest_full_academic_year:
-                    total_credits_academic_year += record.credits
-                if check_if_required(major_requirements, record.course):
-                    if record.term == current_term:
-                        da_credits_c_term += record.credits
-                    total_da_credits += record.credits
-
-        gpa = calculate_gpa(sid)
-        ptc = (total_da_credits / major.total_credits_required) * 100 if major.total_credits_required else 0
-
-        current_term_credits = credits_c_term if num_terms < 5 else da_credits_c_term
-
-        satisfactory_gpa = (
-            gpa >= 1.8 if num_terms < 3 else
-            gpa >= 1.9 if num_terms < 5 else
-            gpa >= 2.0
+
+        audits = {}
+        flags = {}
+        progress = Progress(f"Audited (term {current_term})", total=len(student_ids), logger=log)
+        detail = detail_enabled()
+        for sid in student_ids:
+            student = students.get(sid)
+            if not student:
+                progress.advance()
+                continue
+            with stage("student"):
+                audits[sid], flags[sid] = audit_student(
+                    student, summaries_by_student[sid], records_by_student[sid], current_term
+                )
+            if detail:
+                DETAIL.debug("student_audit", extra={"data": {
+                    "student_id": sid,
+                    "term": current_term,
+                    "major": student.major.major_code if student.major else None,
+                    "ft_terms": max((s.ft_term_cnt for s in summaries_by_student[sid]), default=0),
+                    **{field: getattr(audits[sid], field) for field in AUDIT_FIELDS},
+                    "flags": [code for code, _, _ in flags[sid]],
+                }})
+            progress.advance()
+        progress.finish()
+
+        missing_major = sum(
+            1 for student_flags in flags.values() if any(code == "missing_major" for code, _, _ in student_flags)
         )
-        satisfactory_ptc = (
-            ptc > 40.0 if num_terms == 4 else
-            ptc > 60.0 if num_terms == 6 else
-            ptc > 80.0 if num_terms == 8 else
-            True
+        if missing_major:
+            log.warning("❌ %d students have no major in the database; their audits are flagged for review.",
+                        missing_major)
+
+    with stage("write"), transaction.atomic():
+        StudentAudit.objects.bulk_create(
+            audits.values(),
+            update_conflicts=True,
+            unique_fields=['student', 'term'],
+            update_fields=AUDIT_FIELDS
         )
-        satisfactory_term_credits = current_term_credits >= 6
-        satisfactory_year_credits = (
-            True if num_terms == 1 else
-            total_credits_academic_year >= 24 if num_terms == 2 else
-            total_credits_academic_year >= 18
+        audit_ids = dict(
+            StudentAudit.objects
+            .filter(term=current_term, student_id__in=audits.keys())
+            .values_list('student_id', 'id')
+        )
+        AuditFlag.objects.filter(student_audit_id__in=audit_ids.values()).delete()
+        AuditFlag.objects.bulk_create(
+            AuditFlag(student_audit_id=audit_ids[sid], code=code, level=level, message=message)
+            for sid, student_flags in flags.items()
+            for code, level, message in student_flags
         )
 
-        eligible = all([
-            satisfactory_gpa,
-            satisfactory_ptc,
-            satisfactory_term_credits,
-            satisfactory_year_credits
-        ])
-
-        with transaction.atomic():
-            audit, created = StudentAudit.objects.update_or_create(
-                student=student,
-                term=current_term,
-                defaults={
-                    'total_term_credits': current_term_credits,
-                    'da_credits': total_da_credits,
-                    'total_academic_year_credits': total_credits_academic_year,
-                    'ptc_major': ptc,
-                    'satisfactory_ptc_major': satisfactory_ptc,
-                    'eligible': eligible,
-                    'gpa': gpa,
-                    'satisfactory_gpa': satisfactory_gpa
-                }
-            )
-            print(f"StudentAudit {'created' if created else 'updated'}: {audit}")
+    log.info("StudentAudits written: %d", len(audits))
+    return len(audits)
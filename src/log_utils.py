@@ -1,5 +1,6 @@
 import os
 import logging
+from collections import Counter
 from datetime import datetime
 
 
@@ -15,13 +16,21 @@ class CatalogBatchLogger:
         self.handler.setFormatter(logging.Formatter("%(message)s"))
         self.logger.addHandler(self.handler)
 
+        self.changes = Counter()  # unchanged / changed / new programs, by content fingerprint
+
         self.logger.info(f"📝 Catalog Scraping Log Started: {timestamp}")
 
-    def parsed(self, major_name_web, **kwargs):
-        self._log("PARSED", major_name_web, **kwargs)
+    def parsed(self, major_name_web, change=None, **kwargs):
+        self._count(change)
+        self._log("PARSED", major_name_web, extra=change, **kwargs)
+
+    def imported(self, major_name_web, change=None, **kwargs):
+        self._count(change)
+        self._log("IMPORTED", major_name_web, extra=change, **kwargs)
 
-    def imported(self, major_name_web, **kwargs):
-        self._log("IMPORTED", major_name_web, **kwargs)
+    def unchanged(self, major_name_web, reason=None, extra=None):
+        self._count("unchanged")
+        self._log("UNCHANGED", major_name_web, reason, extra)
 
     def skipped(self, major_name_web, reason=None, extra=None):
         self._log("SKIPPED", major_name_web, reason, extra)
@@ -37,7 +46,15 @@ class CatalogBatchLogger:
             line += f" [{extra}]"
         self.logger.info(line)
 
+    def _count(self, change):
+        if change:
+            self.changes[change] += 1
+
     def close(self):
+        self.logger.info(
+            f"📊 Programs — unchanged: {self.changes['unchanged']}, "
+            f"changed: {self.changes['changed']}, new: {self.changes['new']}"
+        )
         self.logger.info("✅ Batch scrape complete.")
         self.logger.removeHandler(self.handler)
         self.handler.close()
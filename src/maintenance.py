@@ -1,22 +1,86 @@
-from src.models import MajorMapping, Student, StudentRecord, StudentAudit
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from src.requirement_tree import invalidate_requirement_trees
+from src.models import ArchivedTerm, MajorMapping, ProgramFingerprint, Student, StudentRecord, StudentAudit
+from src.models import CatalogSnapshot, CatalogTree, NodeCourse, RequirementNode
 
 
 def delete_majors(catalog_year: int = None):
     """
     Deletes all majors and their associated nodes/courses.
     Optionally filter by catalog year (e.g., 202430).
+    Their program fingerprints go too, so the next scrape re-imports every program.
     """
     if catalog_year:
         majors = MajorMapping.objects.filter(catalog_year=catalog_year)
         count = majors.count()
+        delete_requirement_nodes(RequirementNode.objects.filter(major__in=majors))
         majors.delete()
+        ProgramFingerprint.objects.filter(catalog_year=catalog_year).delete()
         print(f"Deleted {count} majors from catalog year {catalog_year}")
     else:
         count = MajorMapping.objects.count()
+        delete_requirement_nodes(RequirementNode.objects.filter(major__isnull=False))
         MajorMapping.objects.all().delete()
+        ProgramFingerprint.objects.all().delete()
         print(f"Deleted ALL {count} majors from all catalog years")
+    collect_catalog_garbage(keep_versions=0, grace=timedelta(0))
 
 def delete_students():
     Student.objects.all().delete()
     StudentRecord.objects.all().delete()
     StudentAudit.objects.all().delete()
+    ArchivedTerm.objects.all().delete()
+
+
+def delete_requirement_nodes(nodes):
+    """
+    Set-based delete of a RequirementNode queryset and its NodeCourse rows.
+    Avoids the ORM deletion collector, which walks the tree one level at a time.
+    """
+    node_sql, params = nodes.values("id").query.sql_with_params()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {NodeCourse._meta.db_table} WHERE node_id IN ({node_sql})", params
+        )
+        cursor.execute(
+            f"DELETE FROM {RequirementNode._meta.db_table} WHERE id IN ({node_sql})", params
+        )
+        return cursor.rowcount
+
+
+def collect_catalog_garbage(keep_versions: int = 1, grace: timedelta = timedelta(hours=1)):
+    """
+    Retires old catalog snapshots and deletes requirement trees no major uses anymore.
+    Each major keeps its newest `keep_versions` superseded snapshots; older ones go once they
+    have been superseded for longer than `grace`, so audits that pinned a version when they
+    started can finish reading it. Returns the number of trees deleted.
+    """
+    cutoff = timezone.now() - grace
+    successor_created = CatalogSnapshot.objects.filter(
+        major=OuterRef("major"), version=OuterRef("version") + 1
+    ).values("created_at")[:1]
+
+    with transaction.atomic():
+        stale_ids = list(
+            CatalogSnapshot.objects
+            .filter(version__lte=F("major__catalog_version") - keep_versions)
+            .annotate(superseded_at=Subquery(successor_created))
+            .filter(superseded_at__lte=cutoff)
+            .values_list("id", flat=True)
+        )
+        CatalogSnapshot.objects.filter(id__in=stale_ids).delete()
+
+        orphans = CatalogTree.objects.filter(majors__isnull=True, snapshots__isnull=True)
+        orphan_ids = list(orphans.values_list("id", flat=True))
+        if not orphan_ids:
+            return 0
+        delete_requirement_nodes(RequirementNode.objects.filter(tree_id__in=orphan_ids))
+        CatalogTree.objects.filter(id__in=orphan_ids).delete()
+
+    invalidate_requirement_trees(tree_ids=orphan_ids)
+    return len(orphan_ids)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from src.eligibility import rebuild_term_summaries
+
+
+class Command(BaseCommand):
+    help = "Recomputes every StudentTermSummary from the live and archived transcript tables."
+
+    def handle(self, *args, **options):
+        written = rebuild_term_summaries()
+        self.stdout.write(f"Rebuilt {written} term summaries.")
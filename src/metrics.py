@@ -0,0 +1,137 @@
+"""
+Per-stage timing and SQL instrumentation.
+
+    with metrics_run("audit"):            # or: python main.py --metrics audit 202430
+        with stage("load"):
+            ...
+        for sid in student_ids:
+            with stage("student"):
+                ...
+
+Each stage records wall time, CPU time of its thread, and the number and total time of the
+SQL statements it ran on this thread's default connection (through connection.execute_wrapper).
+Stages nest: "audit/student" is the per-student step inside "audit", and a parent's figures
+include its children. Repeated stages with the same path are summed, so per-student steps add
+up to one entry. When the run ends, logs/metrics_<name>_<timestamp>.json is written.
+
+Outside metrics_run(), stage() returns a shared no-op context manager, so instrumented code
+pays one global lookup per stage. Reads served from a memory_snapshot() go through the
+snapshot's own connection and aren't counted.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.db import connection
+
+_recorder = None
+_path = ContextVar("metrics_stage_path", default=())
+_DISABLED = nullcontext()
+
+
+class MetricsRecorder:
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, path, wall, cpu, queries, sql_seconds):
+        with self._lock:
+            totals = self.stages.get(path)
+            if totals is None:
+                totals = self.stages[path] = {
+                    "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "queries": 0, "sql_seconds": 0.0
+                }
+            totals["calls"] += 1
+            totals["wall_seconds"] += wall
+            totals["cpu_seconds"] += cpu
+            totals["queries"] += queries
+            totals["sql_seconds"] += sql_seconds
+
+    def as_dict(self):
+        with self._lock:
+            stages = {
+                path: {key: round(value, 6) if isinstance(value, float) else value for key, value in totals.items()}
+                for path, totals in sorted(self.stages.items())
+            }
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round((datetime.now() - self.started_at).total_seconds(), 6),
+            "stages": stages,
+        }
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "path", "token", "wrapper", "queries", "sql_seconds", "wall", "cpu")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def _count(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+    def __enter__(self):
+        self.path = _path.get() + (self.name,)
+        self.token = _path.set(self.path)
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.wrapper = connection.execute_wrapper(self._count)
+        self.wrapper.__enter__()
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        self.wrapper.__exit__(*exc_info)
+        _path.reset(self.token)
+        self.recorder.add("/".join(self.path), wall, cpu, self.queries, self.sql_seconds)
+        return False
+
+
+def stage(name):
+    """Context manager measuring one stage; a no-op unless a metrics_run() is active."""
+    recorder = _recorder
+    if recorder is None:
+        return _DISABLED
+    return _Stage(recorder, name)
+
+
+@contextmanager
+def metrics_run(name, log_dir="logs"):
+    """
+    Records every stage entered (on any thread) until the block exits, then writes the metrics
+    file. Yields the MetricsRecorder; its path is stored on it as `.path` after the run.
+    """
+    global _recorder
+    if _recorder is not None:
+        # Nested runs (e.g. a pipeline stage calling an instrumented command) fold into the outer one.
+        with stage(name):
+            yield _recorder
+        return
+
+    recorder = _recorder = MetricsRecorder(name)
+    try:
+        with stage(name):
+            yield recorder
+    finally:
+        _recorder = None
+        os.makedirs(log_dir, exist_ok=True)
+        timestamp = recorder.started_at.strftime("%Y%m%d_%H%M%S")
+        recorder.path = os.path.join(log_dir, f"metrics_{name.replace(':', '_')}_{timestamp}.json")
+        with open(recorder.path, "w", encoding="utf-8") as f:
+            json.dump(recorder.as_dict(), f, indent=2)
+        print(f"📈 Metrics written to {recorder.path}")
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0003_studentrecord_ft_term_cnt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('program_url', models.CharField(max_length=500)),
+                ('catalog_year', models.IntegerField()),
+                ('major_code', models.CharField(max_length=20)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('program_url', 'catalog_year')},
+            },
+        ),
+    ]
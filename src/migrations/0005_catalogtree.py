@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0004_programfingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogTree',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='requirementnode',
+            name='major',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='src.majormapping'),
+        ),
+        migrations.AddField(
+            model_name='majormapping',
+            name='requirement_tree',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='majors', to='src.catalogtree'),
+        ),
+        migrations.AddField(
+            model_name='requirementnode',
+            name='tree',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='nodes', to='src.catalogtree'),
+        ),
+    ]
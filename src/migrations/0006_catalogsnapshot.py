@@ -0,0 +1,43 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_current_trees(apps, schema_editor):
+    MajorMapping = apps.get_model("src", "MajorMapping")
+    CatalogSnapshot = apps.get_model("src", "CatalogSnapshot")
+    majors = MajorMapping.objects.filter(requirement_tree__isnull=False)
+    CatalogSnapshot.objects.bulk_create([
+        CatalogSnapshot(major_id=m.id, version=1, tree_id=m.requirement_tree_id) for m in majors
+    ])
+    majors.update(catalog_version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0005_catalogtree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='majormapping',
+            name='catalog_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CatalogSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('major', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='src.majormapping')),
+                ('tree', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='snapshots', to='src.catalogtree')),
+            ],
+            options={
+                'unique_together': {('major', 'version')},
+            },
+        ),
+        migrations.RunPython(snapshot_current_trees, migrations.RunPython.noop),
+    ]
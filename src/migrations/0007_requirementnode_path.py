@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:07
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    # Parents were always inserted before their children, so id order visits them first.
+    RequirementNode = apps.get_model("src", "RequirementNode")
+    paths = {}
+    nodes = list(RequirementNode.objects.order_by("id"))
+    for node in nodes:
+        node.path = paths.get(node.parent_id, "") + f"{node.id:06d}/"
+        node.depth = node.path.count("/") - 1
+        paths[node.id] = node.path
+    RequirementNode.objects.bulk_update(nodes, ["path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0006_catalogsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requirementnode',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='requirementnode',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='requirementnode',
+            index=models.Index(fields=['tree', 'path'], name='src_require_tree_id_2872b0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requirementnode',
+            index=models.Index(fields=['major', 'path'], name='src_require_major_i_12c539_idx'),
+        ),
+    ]
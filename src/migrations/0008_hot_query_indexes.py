@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:13
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicate_records(apps, schema_editor):
+    # The importer only skipped duplicates within its own checks; keep the first row of each.
+    StudentRecord = apps.get_model("src", "StudentRecord")
+    keep = (
+        StudentRecord.objects
+        .values("student", "term", "course")
+        .annotate(keep_id=Min("id"))
+        .values("keep_id")
+    )
+    StudentRecord.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0007_requirementnode_path'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='studentrecord',
+            name='src_student_student_7ad857_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='studentrecord',
+            name='src_student_term_f5a6d8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='majormapping',
+            index=models.Index(fields=['catalog_year'], name='src_majorma_catalog_47555a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nodecourse',
+            index=models.Index(fields=['course', 'node'], name='src_nodecou_course__5815e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentaudit',
+            index=models.Index(fields=['term'], name='src_student_term_3162c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentrecord',
+            index=models.Index(fields=['term', 'student'], name='src_student_term_ef62c8_idx'),
+        ),
+        migrations.RunPython(drop_duplicate_records, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentrecord',
+            constraint=models.UniqueConstraint(fields=('student', 'term', 'course'), name='unique_student_term_course'),
+        ),
+    ]
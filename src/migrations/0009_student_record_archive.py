@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField(unique=True)),
+                ('record_count', models.IntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedStudentRecord',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('high_school_grad', models.IntegerField()),
+                ('first_term', models.IntegerField()),
+                ('term', models.IntegerField()),
+                ('grade', models.CharField(max_length=2)),
+                ('credits', models.IntegerField()),
+                ('course_attributes', models.CharField(blank=True, max_length=255, null=True)),
+                ('institution', models.CharField(max_length=255)),
+                ('student_attributes', models.BigIntegerField(blank=True, null=True)),
+                ('counts_toward_major', models.BooleanField(default=False, null=True)),
+                ('ft_term_cnt', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='src.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='src.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'term', 'course'), name='unique_archived_student_term_course')],
+            },
+        ),
+    ]
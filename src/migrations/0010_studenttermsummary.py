@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0009_student_record_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentTermSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField()),
+                ('attempted_credits', models.IntegerField(default=0)),
+                ('passed_credits', models.IntegerField(default=0)),
+                ('gpa_points', models.FloatField(default=0)),
+                ('gpa_credits', models.IntegerField(default=0)),
+                ('da_credits', models.IntegerField(default=0)),
+                ('ft_term_cnt', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('major', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='src.majormapping')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to='src.student')),
+            ],
+            options={
+                'unique_together': {('student', 'term')},
+            },
+        ),
+    ]
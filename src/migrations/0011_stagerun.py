@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0010_studenttermsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StageRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=100, unique=True)),
+                ('input_fingerprint', models.CharField(max_length=64)),
+                ('output_fingerprint', models.CharField(max_length=64)),
+                ('finished_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:10
+#
+# Course moves from its "SUBJ-CRSE" string primary key to an integer id, in two migrations:
+# this one numbers the courses and fills an integer copy of every course reference next to the
+# existing string foreign keys; 0013 drops the string keys and promotes the integer columns.
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+REFERENCING_MODELS = ("StudentRecord", "ArchivedStudentRecord", "NodeCourse")
+
+
+def number_courses(apps, schema_editor):
+    Course = apps.get_model("src", "Course")
+    courses = list(Course.objects.order_by("course_id"))
+    for new_id, course in enumerate(courses, start=1):
+        course.new_id = new_id
+    Course.objects.bulk_update(courses, ["new_id"], batch_size=500)
+
+
+def fill_course_references(apps, schema_editor):
+    Course = apps.get_model("src", "Course")
+    new_id = Course.objects.filter(course_id=OuterRef("course_id")).values("new_id")
+    for model_name in REFERENCING_MODELS:
+        apps.get_model("src", model_name).objects.update(course_new=Subquery(new_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0011_stagerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='new_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.RunPython(number_courses, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='studentrecord',
+            name='course_new',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedstudentrecord',
+            name='course_new',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='nodecourse',
+            name='course_new',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.RunPython(fill_course_references, migrations.RunPython.noop),
+    ]
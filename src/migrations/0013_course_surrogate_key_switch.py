@@ -0,0 +1,104 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:10
+#
+# Second step of the Course surrogate key (see 0012): the string foreign keys and the
+# constraints built on them are dropped, Course.new_id becomes the primary key, and the
+# integer course references become the foreign keys. Constraints and indexes are then rebuilt
+# on the integer columns.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0012_course_surrogate_key'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='studentrecord',
+            name='unique_student_term_course',
+        ),
+        migrations.RemoveConstraint(
+            model_name='archivedstudentrecord',
+            name='unique_archived_student_term_course',
+        ),
+        migrations.RemoveIndex(
+            model_name='nodecourse',
+            name='src_nodecou_course__5815e1_idx',
+        ),
+        migrations.RemoveField(
+            model_name='studentrecord',
+            name='course',
+        ),
+        migrations.RemoveField(
+            model_name='archivedstudentrecord',
+            name='course',
+        ),
+        migrations.RemoveField(
+            model_name='nodecourse',
+            name='course',
+        ),
+        migrations.RenameField(
+            model_name='course',
+            old_name='new_id',
+            new_name='id',
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='id',
+            field=models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='course_id',
+            field=models.CharField(max_length=12, unique=True),
+        ),
+        migrations.RenameField(
+            model_name='studentrecord',
+            old_name='course_new',
+            new_name='course',
+        ),
+        migrations.AlterField(
+            model_name='studentrecord',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='src.course'),
+        ),
+        migrations.RenameField(
+            model_name='archivedstudentrecord',
+            old_name='course_new',
+            new_name='course',
+        ),
+        migrations.AlterField(
+            model_name='archivedstudentrecord',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='src.course'),
+        ),
+        migrations.RenameField(
+            model_name='nodecourse',
+            old_name='course_new',
+            new_name='course',
+        ),
+        migrations.AlterField(
+            model_name='nodecourse',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='src.course'),
+        ),
+        migrations.AddConstraint(
+            model_name='course',
+            constraint=models.UniqueConstraint(fields=('subject', 'course_number'), name='unique_course_subject_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentrecord',
+            constraint=models.UniqueConstraint(fields=('student', 'term', 'course'), name='unique_student_term_course'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedstudentrecord',
+            constraint=models.UniqueConstraint(fields=('student', 'term', 'course'), name='unique_archived_student_term_course'),
+        ),
+        migrations.AddIndex(
+            model_name='nodecourse',
+            index=models.Index(fields=['course', 'node'], name='src_nodecou_course__5815e1_idx'),
+        ),
+    ]
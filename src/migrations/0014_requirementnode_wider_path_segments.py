@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:40
+#
+# Widens RequirementNode path segments from 6 to 10 digits (PATH_SEGMENT_WIDTH) so node ids
+# past 999999 keep every segment the same width.
+
+from django.db import migrations
+
+
+def repad_paths(width):
+    def repad(apps, schema_editor):
+        # Segments keep their keys (node ids, or payload ids for bulk-loaded trees); only the padding changes.
+        RequirementNode = apps.get_model("src", "RequirementNode")
+        nodes = list(RequirementNode.objects.exclude(path="").only("id", "path"))
+        for node in nodes:
+            node.path = "".join(f"{int(key):0{width}d}/" for key in node.path.split("/")[:-1])
+        RequirementNode.objects.bulk_update(nodes, ["path"], batch_size=500)
+    return repad
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0013_course_surrogate_key_switch'),
+    ]
+
+    operations = [
+        migrations.RunPython(repad_paths(10), repad_paths(6)),
+    ]
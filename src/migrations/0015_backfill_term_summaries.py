@@ -0,0 +1,65 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:50
+#
+# 0010 created StudentTermSummary empty, so students imported before it had no summaries until
+# their next import. This rebuilds every summary from the records, as
+# eligibility.rebuild_term_summaries() does. The aggregation is copied here, on the historical
+# models, so later changes to the app code don't change what this migration does.
+
+from django.db import migrations
+
+CHUNK = 500  # student ids per query, well under SQLite's bound-parameter limit
+
+GRADE_POINTS = {
+    'A': 4.0, 'A-': 3.7, 'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7, 'D+': 1.3, 'D': 1.0, 'D-': 0.7,
+    'F': 0.0, 'TA': 4.0, 'TA-': 3.7, 'TB+': 3.3, 'TB': 3.0, 'TB-': 2.7,
+    'TC+': 2.3, 'TC': 2.0, 'TC-': 1.7, 'TD+': 1.3, 'TD': 1.0, 'TD-': 0.7,
+    'TF': 0.0, 'F*': 0.0, 'NP': 0.0,
+}  # every other grade (P, W, I, AU, starred grades) carries no grade points
+
+
+def backfill_term_summaries(apps, schema_editor):
+    Student = apps.get_model("src", "Student")
+    StudentTermSummary = apps.get_model("src", "StudentTermSummary")
+    record_models = [apps.get_model("src", "StudentRecord")]
+    if apps.get_model("src", "ArchivedTerm").objects.exists():
+        record_models.append(apps.get_model("src", "ArchivedStudentRecord"))
+
+    StudentTermSummary.objects.all().delete()
+    student_ids = sorted(Student.objects.values_list("student_id", flat=True))
+    for start in range(0, len(student_ids), CHUNK):
+        chunk = student_ids[start:start + CHUNK]
+        majors = dict(Student.objects.filter(student_id__in=chunk).values_list("student_id", "major_id"))
+        summaries = {}
+        for model in record_models:
+            for sid, term, grade, credits, counts_toward_major, ft_term_cnt in (
+                model.objects.filter(student_id__in=chunk)
+                .values_list("student_id", "term", "grade", "credits", "counts_toward_major", "ft_term_cnt")
+            ):
+                summary = summaries.get((sid, term))
+                if summary is None:
+                    summary = summaries[(sid, term)] = StudentTermSummary(
+                        student_id=sid, term=term, major_id=majors.get(sid)
+                    )
+                summary.attempted_credits += credits
+                summary.ft_term_cnt = max(summary.ft_term_cnt, ft_term_cnt)
+                points = GRADE_POINTS.get(grade.strip().upper())
+                if points is not None:
+                    summary.gpa_points += points * credits
+                    summary.gpa_credits += credits
+                    if points >= 2.0:
+                        summary.passed_credits += credits
+                        if counts_toward_major:
+                            summary.da_credits += credits
+        StudentTermSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0014_requirementnode_wider_path_segments'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_term_summaries, migrations.RunPython.noop),
+    ]
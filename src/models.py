@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Substr
 
 
 class Student(models.Model):
@@ -11,6 +12,18 @@ class Student(models.Model):
         return str(self.student_id)
 
 
+class CatalogTree(models.Model):
+    """
+    A requirement tree stored once per distinct structure, keyed by a canonical hash of the
+    prepare_django_inserts() payload. Every MajorMapping with the same structure shares it.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"CatalogTree {self.content_hash[:12]}"
+
+
 class MajorMapping(models.Model):
     major_code = models.CharField(max_length=20)
     base_major_code = models.CharField(max_length=20, null=True, blank=True)
@@ -18,27 +31,107 @@ class MajorMapping(models.Model):
     major_name_web = models.CharField(max_length=255)
     major_name_registrar = models.CharField(max_length=255)
     total_credits_required = models.IntegerField()
+    requirement_tree = models.ForeignKey(
+        CatalogTree, null=True, blank=True, on_delete=models.PROTECT, related_name="majors"
+    )
+    catalog_version = models.PositiveIntegerField(default=0)  # bumped each time requirement_tree is swapped
 
     class Meta:
         unique_together = ("major_code", "catalog_year")
+        indexes = [
+            models.Index(fields=["catalog_year"]),  # per-year catalog scrapes and deletes
+        ]
 
     def __str__(self):
         return f"{self.major_code} ({self.catalog_year})"
 
+    def requirement_nodes(self):
+        # Majors imported before trees were shared still own their nodes directly.
+        if self.requirement_tree_id:
+            return RequirementNode.objects.filter(tree_id=self.requirement_tree_id)
+        return RequirementNode.objects.filter(major=self)
+
+    def node_courses(self):
+        if self.requirement_tree_id:
+            return NodeCourse.objects.filter(node__tree_id=self.requirement_tree_id)
+        return NodeCourse.objects.filter(node__major=self)
+
+    def top_level_groups_for_course(self, course_code):
+        """The top-level (h2) requirement groups that list the course (e.g. "KIN-3050") anywhere beneath them."""
+        width = RequirementNode.PATH_SEGMENT_WIDTH + 1
+        group_paths = (
+            self.node_courses()
+            .filter(course__course_id=course_code)
+            .annotate(group_path=Substr("node__path", 1, width))
+            .values("group_path")
+        )
+        return self.requirement_nodes().filter(depth=0, path__in=group_paths)
+
+
+class ProgramFingerprint(models.Model):
+    program_url = models.CharField(max_length=500)
+    catalog_year = models.IntegerField()
+    major_code = models.CharField(max_length=20)
+    content_hash = models.CharField(max_length=64)  # sha256 of the normalized "Program Summary" text
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("program_url", "catalog_year")
+
+    def __str__(self):
+        return f"{self.major_code} ({self.catalog_year}): {self.content_hash[:12]}"
+
+
+class StageRun(models.Model):
+    """The last successful run of a pipeline stage (see src/pipeline.py)."""
+    stage = models.CharField(max_length=100, unique=True)  # e.g. "import", "audit:202430"
+    input_fingerprint = models.CharField(max_length=64)  # sha256 of the stage's inputs + upstream outputs
+    output_fingerprint = models.CharField(max_length=64)  # sha256 of what the stage produced
+    finished_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.stage}: {self.output_fingerprint[:12]}"
+
+
+class CatalogSnapshot(models.Model):
+    """
+    One version of a major's requirement tree. A re-import builds (or reuses) a CatalogTree
+    first and then swaps MajorMapping.requirement_tree over to it in a single transaction;
+    superseded snapshots are kept until maintenance.collect_catalog_garbage() retires them.
+    """
+    major = models.ForeignKey(MajorMapping, on_delete=models.CASCADE, related_name="snapshots")
+    version = models.PositiveIntegerField()
+    tree = models.ForeignKey(CatalogTree, on_delete=models.PROTECT, related_name="snapshots")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("major", "version")
+
+    def __str__(self):
+        return f"{self.major} v{self.version}"
+
 
 class Course(models.Model):
-    course_id = models.CharField(max_length=12, primary_key=True)
+    # Keyed by the implicit integer id, which is what records and requirement nodes reference;
+    # course_id is the "SUBJ-CRSE" code (e.g. "KIN-3050") used in extracts and catalog payloads.
+    course_id = models.CharField(max_length=12, unique=True)
     subject = models.CharField(max_length=8)
     course_number = models.CharField(max_length=8)
     course_name = models.CharField(max_length=255)
     credits = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["subject", "course_number"], name="unique_course_subject_number"),
+        ]
+
     def __str__(self):
         return f"{self.course_id}: {self.course_name}"
 
 
 class RequirementNode(models.Model):
-    major = models.ForeignKey(MajorMapping, on_delete=models.CASCADE)
+    tree = models.ForeignKey(CatalogTree, null=True, blank=True, on_delete=models.CASCADE, related_name="nodes")
+    major = models.ForeignKey(MajorMapping, null=True, blank=True, on_delete=models.CASCADE)  # legacy, pre-CatalogTree
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="children")
     name = models.CharField(max_length=255)
     type = models.CharField(max_length=20, choices=[
@@ -48,23 +141,84 @@ class RequirementNode(models.Model):
         ("group", "General Group"),
     ])
     required_credits = models.IntegerField(null=True, blank=True)
+    # Materialized path: one fixed-width segment per ancestor plus the node itself, e.g.
+    # "0000000000/0000000004/". A node's subtree is every node of its tree whose path starts with it.
+    path = models.CharField(max_length=255, blank=True, default="")
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    # Wide enough for any id SQLite will hand out in practice; segments must never grow, or
+    # fixed-width prefixes (Substr in the group rollups) and the subtree ranges stop lining up.
+    PATH_SEGMENT_WIDTH = 10
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            models.Index(fields=["tree", "path"]),
+            models.Index(fields=["major", "path"]),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
 
+    @classmethod
+    def path_segment(cls, key):
+        segment = f"{key:0{cls.PATH_SEGMENT_WIDTH}d}/"
+        if len(segment) != cls.PATH_SEGMENT_WIDTH + 1:
+            raise ValueError(f"Path segment key {key} does not fit in {cls.PATH_SEGMENT_WIDTH} digits")
+        return segment
+
+    def save(self, *args, **kwargs):
+        # Bulk catalog loads assign paths up front; nodes created one at a time get theirs here.
+        super().save(*args, **kwargs)
+        if not self.path:
+            parent_path = self.parent.path if self.parent_id else ""
+            self.path = parent_path + self.path_segment(self.id)
+            self.depth = self.path.count("/") - 1
+            super().save(update_fields=["path", "depth"])
+
+    def owner_filter(self, prefix=""):
+        # Paths are unique per tree (or per major for legacy nodes), never globally.
+        if self.tree_id:
+            return {f"{prefix}tree_id": self.tree_id}
+        return {f"{prefix}major_id": self.major_id}
+
+    def subtree_path_range(self):
+        # Segments are digits and end in "/", so every descendant path sorts in
+        # [path, path with its last "/" bumped to "0"). A range, unlike LIKE, can use the index.
+        return {"path__gte": self.path, "path__lt": self.path[:-1] + "0"}
+
+    def subtree(self):
+        """This node and all of its descendants, in one indexed query."""
+        return RequirementNode.objects.filter(**self.owner_filter(), **self.subtree_path_range())
+
+    def ancestors(self):
+        """The chain of parents up to the top-level group, outermost first."""
+        width = self.PATH_SEGMENT_WIDTH + 1
+        prefixes = [self.path[:end] for end in range(width, len(self.path), width)]
+        return RequirementNode.objects.filter(path__in=prefixes, **self.owner_filter()).order_by("depth")
+
+    def subtree_courses(self):
+        """NodeCourse rows anywhere under this node."""
+        path_range = {f"node__{k}": v for k, v in self.subtree_path_range().items()}
+        return NodeCourse.objects.filter(**self.owner_filter("node__"), **path_range)
+
 
 class NodeCourse(models.Model):
     node = models.ForeignKey(RequirementNode, on_delete=models.CASCADE, related_name="courses")
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # "which requirement nodes list this course" (top_level_groups_for_course, audit rollups)
+            models.Index(fields=["course", "node"]),
+        ]
+
     def __str__(self):
         return f"{self.course} in {self.node}"
 
 
-class StudentRecord(models.Model):
+class TranscriptRecord(models.Model):
+    """Fields shared by the live transcript table and its archive of closed terms."""
     id = models.AutoField(primary_key=True)
     student = models.ForeignKey(Student, to_field="student_id", on_delete=models.CASCADE)
     high_school_grad = models.IntegerField()
@@ -79,16 +233,46 @@ class StudentRecord(models.Model):
     counts_toward_major = models.BooleanField(default=False, null=True)
     ft_term_cnt = models.IntegerField(default=0)
 
+    class Meta:
+        abstract = True
+
     def __str__(self):
         return f"{self.student.student_id} - {self.course.course_id} ({self.grade})"
 
+
+class StudentRecord(TranscriptRecord):
     class Meta:
+        constraints = [
+            # One row per course per term on a transcript; also the index for duplicate checks
+            # and every per-student lookup.
+            models.UniqueConstraint(fields=["student", "term", "course"], name="unique_student_term_course"),
+        ]
         indexes = [
-            models.Index(fields=['student']),
-            models.Index(fields=['term']),
+            models.Index(fields=["term", "student"]),
+        ]
+
+
+class ArchivedStudentRecord(TranscriptRecord):
+    """
+    StudentRecord rows of closed terms (see src/archive.py). Same columns as the live table,
+    so rows move between the two with a plain INSERT ... SELECT.
+    """
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "term", "course"], name="unique_archived_student_term_course"),
         ]
 
 
+class ArchivedTerm(models.Model):
+    """A term whose StudentRecord rows live in ArchivedStudentRecord."""
+    term = models.IntegerField(unique=True)
+    record_count = models.IntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Term {self.term} ({self.record_count} records archived)"
+
+
 class StudentAudit(models.Model):
     student = models.ForeignKey(Student, to_field="student_id", on_delete=models.CASCADE)
     term = models.IntegerField()
@@ -103,6 +287,9 @@ class StudentAudit(models.Model):
 
     class Meta:
         unique_together = ('student', 'term')
+        indexes = [
+            models.Index(fields=["term"]),
+        ]
 
     def __str__(self):
         status = "Eligible" if self.eligible else "Ineligible"
@@ -117,6 +304,32 @@ class StudentAudit(models.Model):
         )
 
 
+class StudentTermSummary(models.Model):
+    """
+    Per-student, per-term totals derived from the transcript (live and archived rows), kept
+    current by the importer through eligibility.refresh_term_summaries(). The audit's term,
+    academic-year and GPA checks read these instead of re-aggregating records.
+    """
+    student = models.ForeignKey(
+        Student, to_field="student_id", on_delete=models.CASCADE, related_name="term_summaries"
+    )
+    term = models.IntegerField()
+    major = models.ForeignKey("MajorMapping", null=True, blank=True, on_delete=models.SET_NULL)
+    attempted_credits = models.IntegerField(default=0)
+    passed_credits = models.IntegerField(default=0)
+    gpa_points = models.FloatField(default=0)  # sum of grade points x credits
+    gpa_credits = models.IntegerField(default=0)  # credits with a grade that counts toward GPA
+    da_credits = models.IntegerField(default=0)  # passed credits flagged counts_toward_major
+    ft_term_cnt = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("student", "term")
+
+    def __str__(self):
+        return f"{self.student_id} - Term {self.term}: {self.passed_credits}/{self.attempted_credits} credits"
+
+
 class AuditFlag(models.Model):
     ERROR = "error"
     WARNING = "warning"
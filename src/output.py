@@ -1,4 +1,12 @@
+from collections import defaultdict
+from contextlib import nullcontext
+
+from django.db.models import Min, Subquery
+
+from src.metrics import stage
 from src.models import Student, StudentRecord, StudentAudit, AuditFlag, MajorMapping
+from src.snapshot import memory_snapshot
+from src.storage import storage_profile
 import pandas as pd
 
 
@@ -10,38 +18,56 @@ def eligible_column_output(b: bool):
     return "X" if b else ""
 
 
-def create_dataframe(term):
-    student_ids = (
+def create_dataframe(term, snapshot=False):
+    """snapshot=True reads from an in-memory copy of the database (see src/snapshot.py)."""
+    reads = memory_snapshot() if snapshot else nullcontext("default")
+    with reads as alias, storage_profile("read", using=alias), stage("dataframe"):
+        return _create_dataframe(term)
+
+
+def _create_dataframe(term):
+    student_ids = list(
         StudentRecord.objects
         .filter(term=term)
         .values_list('student_id', flat=True)
         .distinct()
     )
 
+    # Everything the report needs, in a fixed number of queries regardless of cohort size.
+    students = Student.objects.select_related('major').in_bulk(student_ids)
+    audits = {sa.student_id: sa for sa in StudentAudit.objects.filter(term=term, student_id__in=student_ids)}
+    # The first stored record of each student carries their first term and attributes.
+    first_ids = (
+        StudentRecord.objects
+        .filter(student_id__in=student_ids)
+        .values('student_id')
+        .annotate(first_id=Min('id'))
+        .values('first_id')
+    )
+    first_records = {
+        sid: (first_term, attributes)
+        for sid, first_term, attributes in (
+            StudentRecord.objects
+            .filter(id__in=Subquery(first_ids))
+            .values_list('student_id', 'first_term', 'student_attributes')
+        )
+    }
+    flags_by_audit = defaultdict(list)
+    for f in AuditFlag.objects.filter(student_audit__in=audits.values()).order_by('id'):
+        flags_by_audit[f.student_audit_id].append(f)
+
     data_to_output = []
 
     for sid in student_ids:
-        student = Student.objects.filter(student_id=sid).first()
-        sa = StudentAudit.objects.filter(student=sid).first()
+        student = students.get(sid)
+        sa = audits.get(sid)
+        if sa is None:
+            continue  # not audited for this term yet
         major = student.major if student else None
+        first_term, ft_term_cnt = first_records.get(sid, (None, None))
 
-        first_term = (
-            StudentRecord.objects
-            .filter(student_id=sid)
-            .values_list('first_term', flat=True)
-            .first()
-        )
-
-        ft_term_cnt = (
-            StudentRecord.objects
-            .filter(student_id=sid)
-            .values_list('student_attributes', flat=True)
-            .first()
-        )
-
-        flags = AuditFlag.objects.filter(student_audit=sa)
         flag_messages = "; ".join(
-            f"[{f.level.upper()}] {f.code}: {f.message or ''}" for f in flags
+            f"[{f.level.upper()}] {f.code}: {f.message or ''}" for f in flags_by_audit[sa.id]
         )
 
         sd = [
@@ -70,22 +96,23 @@ def create_dataframe(term):
 
         data_to_output.append(sd)
 
-    df = pd.DataFrame(data_to_output)
-    df.columns = [
+    df = pd.DataFrame(data_to_output, columns=[
         "Valid", "T#", "Name", "Sport", "First FT Term", "Degree", "Program",
         "DA Credits", "Total", "PTC", "6", "9", "18", "24", "GPA", "GPA check",
         "PTC check", "6_DA", "18_Taken", "FT_TERM_CNT", "Notes"
-    ]
+    ])
     df.set_index("T#", inplace=True)
     return df
 
 
-def output_to_csv(term):
-    df = create_dataframe(term)
-    df.to_csv(str(term) + ".csv")
+def output_to_csv(term, snapshot=False):
+    df = create_dataframe(term, snapshot=snapshot)
+    with stage("write"):
+        df.to_csv(str(term) + ".csv")
 
 
-def output_to_xlsx(term):
-    df = create_dataframe(term)
+def output_to_xlsx(term, snapshot=False):
+    df = create_dataframe(term, snapshot=snapshot)
     filepath = str(term) + ".xlsx"
-    df.to_excel(filepath)
+    with stage("write"):
+        df.to_excel(filepath)
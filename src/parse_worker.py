@@ -0,0 +1,35 @@
+"""
+HTML -> payload conversion for catalog program pages.
+
+This module deliberately avoids importing Django models at import time so that it can be
+loaded by ProcessPoolExecutor workers regardless of the multiprocessing start method.
+"""
+import os
+
+
+def init_parse_worker():
+    # Worker processes started with "spawn" do not inherit django.setup() from the parent.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+    import django
+    django.setup()
+
+
+def parse_program_html(html, meta, major_name_web, catalog_year):
+    """
+    Parses a downloaded program page and returns the populate_catalog_from_payload() payload.
+    The payload only contains plain dicts/lists so it can be pickled back from a worker process.
+    """
+    from src.course_parser import parse_course_structure_as_tree
+    from src.suu_scraper import fetch_total_credits
+    from src.utils import prepare_django_inserts
+
+    total_credits = fetch_total_credits(html)
+    structure = parse_course_structure_as_tree(html)
+
+    return prepare_django_inserts(
+        parsed_tree=structure,
+        match_result=meta,
+        major_name_web=major_name_web,
+        total_credits_required=total_credits,
+        catalog_year=catalog_year
+    )
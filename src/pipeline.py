@@ -0,0 +1,222 @@
+"""
+Cached stage runner for the scrape -> import -> audit -> export pipeline.
+
+Each Stage declares its inputs and how to fingerprint its output. A stage's input
+fingerprint covers its own inputs plus the output fingerprints of the stages it depends on;
+when that matches the last recorded StageRun and the output still looks like what that run
+produced, the stage is skipped. Stages whose dependencies are done run concurrently on a
+thread pool (e.g. the audits or exports of different terms).
+"""
+import hashlib
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import Callable, Tuple
+
+from django.db import connection
+
+from src.metrics import stage as metrics_stage
+from src.profiling import profile_stage
+from src.models import StageRun
+
+
+def fingerprint(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def file_fingerprint(path):
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], object]
+    inputs: Callable[[], object] = lambda: None  # JSON-serializable description of what the run reads
+    output: Callable[[], object] = lambda: None  # JSON-serializable summary of what the run produced
+    deps: Tuple[str, ...] = ()
+
+
+def _check_graph(stages):
+    for stage in stages.values():
+        missing = [dep for dep in stage.deps if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages: {', '.join(missing)}")
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle through {name!r}")
+        visiting.add(name)
+        for dep in stages[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in stages:
+        visit(name)
+
+
+def _run_stage(stage):
+    try:
+        with metrics_stage(stage.name), profile_stage(stage.name):
+            return stage.run()
+    finally:
+        # Worker threads open their own connections; don't leave them behind.
+        connection.close()
+
+
+def run_pipeline(stages, force=False, max_workers=4):
+    """
+    Runs `stages` in dependency order, skipping unchanged ones unless `force`.
+    Returns {stage name: "ran" | "skipped" | "failed" | "blocked"}.
+    """
+    stages = {stage.name: stage for stage in stages}
+    _check_graph(stages)
+    recorded = {run.stage: run for run in StageRun.objects.filter(stage__in=list(stages))}
+
+    outputs = {}
+    status = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(status) < len(stages):
+            in_flight = {name for name, _ in running.values()}
+            for name, stage in stages.items():
+                if name in status or name in in_flight:
+                    continue
+                if any(status.get(dep) in ("failed", "blocked") for dep in stage.deps):
+                    status[name] = "blocked"
+                    print(f"⛔ {name}: blocked by a failed dependency")
+                    continue
+                if not all(dep in outputs for dep in stage.deps):
+                    continue
+
+                input_fp = fingerprint({
+                    "inputs": stage.inputs(),
+                    "upstream": {dep: outputs[dep] for dep in stage.deps},
+                })
+                previous = recorded.get(name)
+                if not force and previous and previous.input_fingerprint == input_fp:
+                    current = fingerprint(stage.output())
+                    if current == previous.output_fingerprint:
+                        outputs[name] = current
+                        status[name] = "skipped"
+                        print(f"⏭️  {name}: unchanged, skipped")
+                        continue
+                print(f"▶️  {name}")
+                # Run in a copy of this context so the stage's metrics nest under the run.
+                running[pool.submit(copy_context().run, _run_stage, stage)] = (name, input_fp)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, input_fp = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    status[name] = "failed"
+                    print(f"❌ {name}: {e}")
+                    continue
+                outputs[name] = fingerprint(stages[name].output())
+                StageRun.objects.update_or_create(
+                    stage=name,
+                    defaults={"input_fingerprint": input_fp, "output_fingerprint": outputs[name]}
+                )
+                status[name] = "ran"
+                print(f"✅ {name}")
+    return status
+
+
+def catalog_state():
+    from src.models import MajorMapping
+    return list(
+        MajorMapping.objects
+        .order_by("major_code", "catalog_year")
+        .values_list("major_code", "catalog_year", "catalog_version", "requirement_tree_id")
+    )
+
+
+def transcript_state():
+    from django.db.models import Count, Max
+    from src.models import ArchivedStudentRecord, Student, StudentRecord
+    return {
+        "records": StudentRecord.objects.aggregate(n=Count("id"), last=Max("id")),
+        "archived": ArchivedStudentRecord.objects.aggregate(n=Count("id"), last=Max("id")),
+        "majors": fingerprint(list(Student.objects.order_by("student_id").values_list("student_id", "major_id"))),
+    }
+
+
+def audit_state(term):
+    from src.eligibility import AUDIT_FIELDS
+    from src.models import AuditFlag, StudentAudit
+    audits = StudentAudit.objects.filter(term=term).order_by("student_id").values_list("student_id", *AUDIT_FIELDS)
+    flags = AuditFlag.objects.filter(student_audit__term=term).order_by("student_audit__student_id", "code")
+    return {
+        "audits": fingerprint(list(audits)),
+        "flags": fingerprint(list(flags.values_list("student_audit__student_id", "code", "message"))),
+    }
+
+
+def build_stages(csv_path, terms, scrape=None, export_format="xlsx", snapshot=False, defer_indexes=None):
+    """
+    The standard pipeline: catalog -> import -> audit:<term> -> export:<term> for each term.
+    `scrape` holds batch_scrape_all_catalogs() keyword arguments; None reuses the catalogs
+    already in the database (the catalog stage then only tracks their state).
+    """
+    def run_catalog():
+        if scrape is not None:
+            from src.batch import batch_scrape_all_catalogs
+            batch_scrape_all_catalogs(**scrape)
+
+    def catalog_inputs():
+        if scrape is None:
+            return None
+        return {**scrape, "majors": file_fingerprint(scrape.get("majors_file", "majors.txt"))}
+
+    def run_import():
+        from src.data import import_student_data_from_csv
+        result = import_student_data_from_csv(csv_path, defer_indexes=defer_indexes)
+        print(result["message"])
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+
+    stages = [
+        Stage("catalog", run_catalog, inputs=catalog_inputs, output=catalog_state),
+        Stage("import", run_import, inputs=lambda: file_fingerprint(csv_path), output=transcript_state,
+              deps=("catalog",)),
+    ]
+    for term in terms:
+        stages += [
+            Stage(f"audit:{term}", _audit_runner(term, snapshot),
+                  output=(lambda t=term: audit_state(t)), deps=("catalog", "import")),
+            Stage(f"export:{term}", _export_runner(term, export_format, snapshot),
+                  inputs=(lambda: export_format), output=(lambda t=term: file_fingerprint(f"{t}.{export_format}")),
+                  deps=(f"audit:{term}",)),
+        ]
+    return stages
+
+
+def _audit_runner(term, snapshot):
+    def run():
+        from src.eligibility import run_audit
+        run_audit(term, snapshot=snapshot)
+    return run
+
+
+def _export_runner(term, export_format, snapshot):
+    def run():
+        from src.output import output_to_csv, output_to_xlsx
+        export = output_to_xlsx if export_format == "xlsx" else output_to_csv
+        export(term, snapshot=snapshot)
+    return run
@@ -0,0 +1,205 @@
+"""
+Profiling mode for the command-line entry points.
+
+    python main.py --profile run-all --csv Bogus_data_2.csv --term 202430 --skip-scrape
+
+Each stage (the command itself, and every pipeline stage of run-all) runs under cProfile and
+tracemalloc. When the run ends, logs/profile_<command>_<timestamp>/ holds, per stage:
+
+    <stage>.pstats         load with pstats / snakeviz
+    <stage>.collapsed.txt  "frame;frame;frame microseconds" lines for flamegraph.pl / speedscope
+and summary.json with each stage's time, tracemalloc peak and top allocation sites.
+
+cProfile only sees the thread that enabled it, so each stage is profiled on the thread that
+runs it (helper threads a stage starts, e.g. catalog downloads, aren't covered). The command's
+own profile therefore shows little more than waiting when its work runs in pipeline stages;
+summary.json lists those under its "nested_stages". tracemalloc is process-wide, which is why
+run-all runs its stages one at a time in this mode; a stage resets the peak when it starts, so
+the peak reached so far is first credited to the stages enclosing it.
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+TOP_ALLOCATIONS = 15
+MIN_STACK_MICROSECONDS = 1
+MAX_STACK_DEPTH = 80
+
+_session = None
+_local = threading.local()
+
+
+class ProfileSession:
+    def __init__(self, name, log_dir="logs"):
+        self.name = name
+        self.started_at = datetime.now()
+        self.dir = os.path.join(log_dir, f"profile_{_safe(name)}_{self.started_at:%Y%m%d_%H%M%S}")
+        os.makedirs(self.dir, exist_ok=True)
+        self.stages = {}
+        self.open_stages = []
+        self._lock = threading.Lock()
+
+    def _fold_peak(self):
+        _, peak = tracemalloc.get_traced_memory()
+        for stage in self.open_stages:
+            stage.peak = max(stage.peak, peak)
+
+    def enter(self, stage):
+        """Opens `stage` with a fresh tracemalloc peak; the stages around it keep the peak so far."""
+        with self._lock:
+            self._fold_peak()
+            for outer in self.open_stages:
+                outer.nested.append(stage.name)
+            self.open_stages.append(stage)
+            tracemalloc.reset_peak()
+
+    def leave(self, stage):
+        with self._lock:
+            self._fold_peak()
+            self.open_stages.remove(stage)
+
+    def add(self, stage, summary):
+        with self._lock:
+            self.stages[stage] = summary
+
+    def write_summary(self):
+        path = os.path.join(self.dir, "summary.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "run": self.name,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "stages": self.stages,
+            }, f, indent=2)
+        return path
+
+
+def _safe(name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == "~":
+        return name  # built-ins, e.g. <built-in method time.sleep>
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collapsed_stacks(stats):
+    """
+    Folds pstats data into collapsed-stack lines. cProfile only keeps caller -> callee edges,
+    so each callee's time is split across the paths leading to it in proportion to the time
+    spent under each caller (the usual approximation of flame graphs built from cProfile).
+    """
+    entries = stats.stats  # func -> (primitive calls, calls, self time, cumulative time, callers)
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    folded = Counter()
+
+    def walk(func, path, seen, scale):
+        path = path + (_label(func).replace(";", ","),)
+        self_us = entries[func][2] * scale * 1e6
+        if self_us >= MIN_STACK_MICROSECONDS:
+            folded[";".join(path)] += self_us
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            callee_time = entries[callee][3]
+            share = scale * edge_time / callee_time if callee_time else 0
+            if callee in seen or share * callee_time * 1e6 < MIN_STACK_MICROSECONDS:
+                continue
+            walk(callee, path, seen | {callee}, share)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, (), {func}, 1.0)
+    return [f"{stack} {int(round(us))}" for stack, us in sorted(folded.items())]
+
+
+def _top_allocations(before, after):
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),  # the profiler's own bookkeeping
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {"site": str(stat.traceback[0]), "size_bytes": stat.size_diff, "count": stat.count_diff}
+        for stat in diff[:TOP_ALLOCATIONS]
+        if stat.size_diff > 0
+    ]
+
+
+class _ProfiledStage:
+    def __init__(self, session, name):
+        self.session = session
+        self.name = name
+        self.peak = 0
+        self.nested = []
+
+    def __enter__(self):
+        _local.active = True
+        self.session.enter(self)
+        self.memory_before, _ = tracemalloc.get_traced_memory()
+        self.snapshot = tracemalloc.take_snapshot()
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        seconds = time.perf_counter() - self.started
+        memory_after, _ = tracemalloc.get_traced_memory()
+        self.session.leave(self)
+        snapshot = tracemalloc.take_snapshot()
+        _local.active = False
+
+        base = os.path.join(self.session.dir, _safe(self.name))
+        self.profiler.dump_stats(base + ".pstats")
+        with open(base + ".collapsed.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(collapsed_stacks(pstats.Stats(self.profiler))) + "\n")
+        self.session.add(self.name, {
+            "seconds": round(seconds, 4),
+            "failed": exc_info[0] is not None,
+            "memory_peak_bytes": self.peak,
+            "memory_peak_increase_bytes": self.peak - self.memory_before,
+            "memory_retained_bytes": memory_after - self.memory_before,
+            "top_allocations": _top_allocations(self.snapshot, snapshot),
+            "nested_stages": self.nested,
+        })
+        return False
+
+
+def profile_stage(name):
+    """Profiles one stage on the current thread; a no-op outside profile_run() or inside another stage."""
+    session = _session
+    if session is None or getattr(_local, "active", False):
+        return nullcontext()
+    return _ProfiledStage(session, name)
+
+
+@contextmanager
+def profile_run(name, log_dir="logs"):
+    """Profiles the block as stage `name`; stages started inside it get their own profiles."""
+    global _session
+    session = _session = ProfileSession(name, log_dir)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        with profile_stage(name):
+            yield session
+    finally:
+        _session = None
+        if started_tracing:
+            tracemalloc.stop()
+        print(f"🔬 Profiles written to {session.dir} ({session.write_summary()})")
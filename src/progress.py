@@ -0,0 +1,117 @@
+"""
+Console logging, rate-limited progress and the structured per-item debug log.
+
+Modules log through logging.getLogger(__name__) (the "src.*" hierarchy); configure_logging()
+sends that to stdout at the chosen level. Per-student and per-row detail goes to DETAIL, a
+separate logger that never reaches the console: it is only enabled when a debug log file is
+configured, and then writes one JSON object per line. Hot loops check detail_enabled() once
+and skip building detail records altogether when it is off.
+
+    log = logging.getLogger(__name__)
+    progress = Progress("Auditing", total=len(student_ids), logger=log)
+    detail = detail_enabled()
+    for sid in student_ids:
+        ...
+        if detail:
+            DETAIL.debug("audit", extra={"data": {"student_id": sid, ...}})
+        progress.advance()
+    progress.finish()
+"""
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+DETAIL = logging.getLogger("src.detail")
+DETAIL.propagate = False
+DETAIL.setLevel(logging.CRITICAL + 1)  # off until configure_logging(debug_log=...)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "data", None) or {})
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level="INFO", debug_log=None):
+    """
+    Console output of the "src" loggers at `level`. With debug_log (a path), every DEBUG
+    record of the src loggers, including DETAIL, is also written there as JSON lines.
+    Calling it again replaces the previous configuration.
+    """
+    root = logging.getLogger("src")
+    for logger in (root, DETAIL):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(level if isinstance(level, int) else level.upper())
+    console.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(console)
+    root.setLevel(console.level)
+    DETAIL.setLevel(logging.CRITICAL + 1)
+
+    if debug_log:
+        os.makedirs(os.path.dirname(debug_log) or ".", exist_ok=True)
+        file_handler = logging.FileHandler(debug_log, encoding="utf-8")
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JsonLinesFormatter())
+        root.addHandler(file_handler)
+        root.setLevel(logging.DEBUG)
+        DETAIL.addHandler(file_handler)
+        DETAIL.setLevel(logging.DEBUG)
+
+
+def detail_enabled():
+    return DETAIL.isEnabledFor(logging.DEBUG)
+
+
+class Progress:
+    """
+    Counts work items and logs "label: done/total (rate/s, ETA)" at most every `interval`
+    seconds. advance() is a counter bump plus a clock read; nothing is formatted between reports.
+    """
+
+    def __init__(self, label, total=None, logger=None, interval=2.0, clock=time.monotonic):
+        self.label = label
+        self.total = total
+        self.logger = logger or logging.getLogger("src")
+        self.interval = interval
+        self.clock = clock
+        self.done = 0
+        self.started = clock()
+        self._next_report = self.started + interval
+
+    def advance(self, n=1):
+        self.done += n
+        now = self.clock()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self._report(now)
+
+    def finish(self):
+        self._report(self.clock(), final=True)
+
+    def _report(self, now, final=False):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        line = f"{self.label}: {self.done}" + (f"/{self.total}" if self.total is not None else "")
+        line += f" ({rate:,.0f}/s"
+        if final:
+            line += f", {elapsed:.1f}s)"
+        elif self.total and rate:
+            line += f", ETA {(self.total - self.done) / rate:.0f}s)"
+        else:
+            line += ")"
+        self.logger.info(line)
@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Dict, Generator, List, Optional
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from src.models import NodeCourse, RequirementNode
+from src.versions import data_version
+
+
+@dataclass
+class TreeNode:
+    id: int
+    parent_id: Optional[int]
+    name: str
+    type: str
+    required_credits: Optional[int]
+    course_ids: List[int] = field(default_factory=list)  # Course ids (not codes)
+    children: List['TreeNode'] = field(default_factory=list)
+
+
+class RequirementTree:
+    """
+    A major's requirement tree held in memory: all RequirementNode and NodeCourse rows are
+    fetched in two queries and linked up in Python, so walking the tree costs no queries.
+    Use get_requirement_tree() to share loaded trees between callers.
+    """
+
+    def __init__(self, nodes: List[TreeNode], course_codes: Optional[Dict[int, str]] = None):
+        self.nodes: Dict[int, TreeNode] = {node.id: node for node in nodes}
+        self.roots: List[TreeNode] = []
+        for node in nodes:
+            parent = self.nodes.get(node.parent_id)
+            if parent is not None:
+                parent.children.append(node)
+            else:
+                self.roots.append(node)
+        self.course_ids = frozenset(cid for node in nodes for cid in node.course_ids)
+        self.course_codes = course_codes or {}  # Course id -> "SUBJ-CRSE", for display
+        self._requirements = None
+
+    @classmethod
+    def load(cls, major):
+        node_rows = major.requirement_nodes().order_by("id").values_list(
+            "id", "parent_id", "name", "type", "required_credits"
+        )
+        nodes = [TreeNode(*row) for row in node_rows]
+        by_id = {node.id: node for node in nodes}
+
+        course_codes = {}
+        node_courses = major.node_courses().order_by("id").values_list("node_id", "course_id", "course__course_id")
+        for node_id, course_id, code in node_courses:
+            by_id[node_id].course_ids.append(course_id)
+            course_codes[course_id] = code
+
+        return cls(nodes, course_codes)
+
+    def walk(self) -> Generator[TreeNode, None, None]:
+        stack = list(reversed(self.roots))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def requirements(self):
+        """(required_credits, course id set) for every node that has a credit requirement."""
+        if self._requirements is None:
+            self._requirements = [
+                (node.required_credits, frozenset(node.course_ids))
+                for node in sorted(self.nodes.values(), key=lambda n: n.id)
+                if node.required_credits is not None
+            ]
+        return self._requirements
+
+
+# ("tree", CatalogTree id) or ("major", MajorMapping id) -> RequirementTree. Shared trees are
+# content-addressed and never modified, so their entries are reused by every major and catalog
+# year pointing at them; only majors still owning legacy nodes are cached per major.
+_trees = {}
+_synced_version = None
+
+
+def _cache_key(major):
+    if major.requirement_tree_id:
+        return ("tree", major.requirement_tree_id)
+    return ("major", major.pk)
+
+
+def get_requirement_tree(major) -> RequirementTree:
+    key = _cache_key(major)
+    tree = _trees.get(key)
+    if tree is None:
+        tree = _trees[key] = RequirementTree.load(major)
+    return tree
+
+
+def invalidate_requirement_trees(major_ids=(), tree_ids=()):
+    """Called by catalog imports and garbage collection; with no arguments clears everything."""
+    if not major_ids and not tree_ids:
+        _trees.clear()
+        return
+    for major_id in major_ids:
+        _trees.pop(("major", major_id), None)
+    for tree_id in tree_ids:
+        _trees.pop(("tree", tree_id), None)
+
+
+def sync_requirement_trees(catalog_version=None):
+    """
+    Drops the cached trees when the catalog changed since the last sync, including catalog loads
+    made by other processes. Called where audits, imports and service reads start, not per lookup;
+    catalog_version is data_version().catalog when the caller already has it.
+    """
+    global _synced_version
+    if catalog_version is None:
+        catalog_version = data_version().catalog
+    if catalog_version != _synced_version:
+        _trees.clear()
+        _synced_version = catalog_version
+
+
+@receiver([post_save, post_delete], sender=RequirementNode)
+@receiver([post_save, post_delete], sender=NodeCourse)
+def _invalidate_on_row_change(sender, **kwargs):
+    # Catalog imports write in bulk and invalidate precisely; one-off ORM edits just drop the cache.
+    invalidate_requirement_trees()
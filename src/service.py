@@ -0,0 +1,285 @@
+"""
+Resident audit service: a stdlib HTTP/JSON server with warm in-memory caches.
+
+    python main.py serve --port 8765 --warm-term 202430
+
+Reads are answered from memory once a term is warm:
+
+    GET  /students/<id>/audit?term=202430   live audit of one student (not stored)
+    GET  /students/<id>/groups              passed credits per top-level requirement group
+    GET  /terms/<term>/report               stored StudentAudit rows of a term
+    GET  /terms/<term>/flags                stored AuditFlags of a term
+    GET  /majors/match?name=<web name>      registrar match from the warm major code index
+                                            (repeat `name` to match several in one batch)
+    GET  /jobs/<id>                         status of a queued job
+
+Writes go through a single-writer job queue, so imports and audits never contend with each
+other for SQLite while reads keep being served:
+
+    POST /jobs/import   {"csv": "Bogus_data_2.csv"}
+    POST /jobs/audit    {"term": 202430}
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.db import connection
+
+from src.eligibility import AUDIT_FIELDS, audit_student, credits_by_requirement_group, run_audit
+from src.models import AuditFlag, MajorMapping, Student, StudentAudit, StudentTermSummary
+from src.requirement_tree import get_requirement_tree, sync_requirement_trees
+from src.transcripts import TranscriptStore
+from src.versions import data_version
+
+
+class TermCache:
+    """Everything a live audit of one term needs: students, term summaries and transcripts."""
+
+    def __init__(self, term):
+        self.term = term
+        student_ids = list(
+            StudentTermSummary.objects.filter(term=term).values_list("student_id", flat=True)
+        )
+        self.students = Student.objects.select_related("major").in_bulk(student_ids)
+        self.summaries = defaultdict(list)
+        for summary in StudentTermSummary.objects.filter(student_id__in=student_ids):
+            self.summaries[summary.student_id].append(summary)
+        self.records = TranscriptStore.build([sid for sid, s in self.students.items() if s.major_id])
+
+
+class JobQueue:
+    """
+    Runs write jobs (imports, audits) one at a time on a single worker thread, in submission
+    order. `on_done` is called after every job, e.g. to drop caches the job made stale.
+    """
+
+    def __init__(self, on_done=None, start=True):
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._queue = queue.Queue()
+        self._on_done = on_done
+        if start:
+            threading.Thread(target=self._worker, name="audit-writer", daemon=True).start()
+
+    def submit(self, kind, func, *args):
+        job_id = next(self._ids)
+        self.jobs[job_id] = {"id": job_id, "kind": kind, "status": "queued", "submitted": time.time()}
+        self._queue.put((job_id, func, args))
+        return self.jobs[job_id]
+
+    def drain(self):
+        """Runs every queued job on the calling thread (for tests and one-shot use)."""
+        while not self._queue.empty():
+            self._run(*self._queue.get())
+
+    def _worker(self):
+        while True:
+            self._run(*self._queue.get())
+            connection.close()
+
+    def _run(self, job_id, func, args):
+        job = self.jobs[job_id]
+        job["status"] = "running"
+        try:
+            job["result"] = func(*args)
+            job["status"] = "done"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        job["finished"] = time.time()
+        if self._on_done:
+            self._on_done(job)
+
+
+class AuditService:
+    def __init__(self, major_codes_file="major_codes.csv", start_writer=True):
+        self.major_codes_file = major_codes_file
+        self.major_code_df = None
+        self._terms = {}
+        self._version = None  # data_version().transcripts the cached terms were built at
+        self._lock = threading.Lock()
+        self.jobs = JobQueue(on_done=self._after_write, start=start_writer)
+
+    def warm(self, terms=()):
+        """Loads the major code index, every major's requirement tree and the given terms."""
+        from src.utils import get_registrar_index, load_major_code_lookup
+        self.major_code_df = load_major_code_lookup(self.major_codes_file)
+        get_registrar_index(self.major_code_df)
+        for major in MajorMapping.objects.all():
+            get_requirement_tree(major)
+        for term in terms:
+            self.term_cache(term)
+
+    def term_cache(self, term):
+        """
+        The warm TermCache of `term`. Costs one version query per call, so writes made by other
+        processes (CLI imports, the watcher) are picked up on the next read.
+        """
+        version = data_version()
+        sync_requirement_trees(version.catalog)
+        with self._lock:
+            if version.transcripts != self._version:
+                self._terms = {}
+                self._version = version.transcripts
+            cache = self._terms.get(term)
+            if cache is None:
+                cache = self._terms[term] = TermCache(term)
+        return cache
+
+    def _after_write(self, job):
+        # Imports and audits change transcripts and summaries; rebuild terms lazily on next read.
+        # Under the lock, so a build that read the database before the write can't land afterwards.
+        with self._lock:
+            self._terms = {}
+
+    # --- reads -----------------------------------------------------------------------------
+
+    def student_audit(self, student_id, term):
+        cache = self.term_cache(term)
+        student = cache.students.get(student_id)
+        if student is None:
+            return 404, {"error": f"No records for student {student_id} in term {term}."}
+        audit, flags = audit_student(student, cache.summaries[student_id], cache.records[student_id], term)
+        return 200, {
+            "student_id": student_id,
+            "term": term,
+            "major": student.major.major_code if student.major else None,
+            **{field: getattr(audit, field) for field in AUDIT_FIELDS},
+            "flags": [{"code": code, "level": level, "message": message} for code, level, message in flags],
+        }
+
+    def requirement_groups(self, student_id):
+        # Rolled up in SQL over the requirement paths; not part of the warm term caches.
+        student = Student.objects.select_related("major").filter(student_id=student_id).first()
+        if student is None:
+            return 404, {"error": f"No student {student_id}."}
+        if student.major is None:
+            return 200, {"student_id": student_id, "major": None, "groups": {}}
+        return 200, {
+            "student_id": student_id,
+            "major": student.major.major_code,
+            "groups": credits_by_requirement_group(student.major, student_id),
+        }
+
+    def term_report(self, term):
+        audits = StudentAudit.objects.filter(term=term).order_by("student_id")
+        return 200, {"term": term, "audits": list(audits.values("student_id", *AUDIT_FIELDS))}
+
+    def term_flags(self, term):
+        flags = AuditFlag.objects.filter(student_audit__term=term).order_by("student_audit__student_id", "id")
+        return 200, {
+            "term": term,
+            "flags": list(flags.values("student_audit__student_id", "code", "level", "message")),
+        }
+
+    def match_majors(self, names):
+        """One match for a single name; {"matches": [...]} in request order for several."""
+        from src.utils import load_major_code_lookup, match_major_name_web_to_registrar
+        from src.utils import match_major_names_web_to_registrar
+        if self.major_code_df is None:
+            self.major_code_df = load_major_code_lookup(self.major_codes_file)
+        if len(names) == 1:
+            return 200, match_major_name_web_to_registrar(names[0], self.major_code_df)
+        return 200, {"matches": match_major_names_web_to_registrar(names, self.major_code_df)}
+
+    # --- writes ----------------------------------------------------------------------------
+
+    def submit_import(self, csv_path):
+        from src.data import import_student_data_from_csv
+        return 202, self.jobs.submit("import", import_student_data_from_csv, csv_path, None, self.major_code_df)
+
+    def submit_audit(self, term):
+        return 202, self.jobs.submit("audit", run_audit, term)
+
+    # --- routing ---------------------------------------------------------------------------
+
+    def handle(self, method, url, body=None):
+        """Dispatches one request; returns (HTTP status, JSON-serializable payload)."""
+        parsed = urlparse(url)
+        parts = [p for p in parsed.path.split("/") if p]
+        query = parse_qs(parsed.query)
+        params = {key: values[-1] for key, values in query.items()}
+        try:
+            match method, parts:
+                case "GET", ["students", student_id, "audit"]:
+                    return self.student_audit(student_id, int(params["term"]))
+                case "GET", ["students", student_id, "groups"]:
+                    return self.requirement_groups(student_id)
+                case "GET", ["terms", term, "report"]:
+                    return self.term_report(int(term))
+                case "GET", ["terms", term, "flags"]:
+                    return self.term_flags(int(term))
+                case "GET", ["majors", "match"]:
+                    return self.match_majors(query["name"])
+                case "GET", ["jobs", job_id]:
+                    job = self.jobs.jobs.get(int(job_id))
+                    return (200, job) if job else (404, {"error": f"No job {job_id}."})
+                case "POST", ["jobs", "import"]:
+                    return self.submit_import(body["csv"])
+                case "POST", ["jobs", "audit"]:
+                    return self.submit_audit(int(body["term"]))
+        except (KeyError, ValueError, TypeError) as e:
+            return 400, {"error": f"Bad request: {e}"}
+        return 404, {"error": f"No route for {method} {parsed.path}."}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, method):
+            body = None
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError:
+                    body = None
+            try:
+                status, payload = service.handle(method, self.path, body)
+            finally:
+                connection.close()  # request threads are short-lived; don't leak their connections
+            data = json.dumps(payload, default=_json_default).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8765, warm_terms=(), major_codes_file="major_codes.csv"):
+    # Connections run in WAL mode (src.storage), so request threads keep reading while the
+    # writer thread commits.
+    service = AuditService(major_codes_file=major_codes_file)
+    started = time.perf_counter()
+    service.warm(warm_terms)
+    print(f"🔥 Warmed catalogs and terms {list(warm_terms)} in {time.perf_counter() - started:.2f}s")
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"🌐 Serving audits on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
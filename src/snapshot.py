@@ -0,0 +1,82 @@
+"""
+In-memory, read-only database snapshots for audit and export runs.
+
+memory_snapshot() copies the database into a private in-memory SQLite database through the
+sqlite3 backup API and, while the block runs, SnapshotRouter sends every ORM read on this
+thread there. Writes keep going to the real database, so a long audit only holds the file
+lock for the duration of the copy and of its final bulk write.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from uuid import uuid4
+
+from django.db import connections
+from django.db.transaction import TransactionManagementError
+from django.db.utils import load_backend
+
+_active_alias = ContextVar("active_snapshot_alias", default=None)
+
+
+class SnapshotRouter:
+    """Routes reads to the active snapshot, if any. Listed in settings.DATABASE_ROUTERS."""
+
+    def db_for_read(self, model, **hints):
+        return _active_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Instances read from a snapshot are related to (and saved as) rows of the real database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db.startswith("snapshot_") else None
+
+
+def _open(alias, source):
+    # The wrapper only lives in this thread's slot of the connection handler; nothing is added
+    # to settings.DATABASES, so concurrent snapshots on other threads don't see each other.
+    settings_dict = {**source.settings_dict, "NAME": f"file:{alias}?mode=memory&cache=shared"}
+    connection = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, alias)
+    connections[alias] = connection
+    return connection
+
+
+def _close(alias):
+    connection = connections[alias]
+    # Django keeps in-memory databases open on close(); drop the underlying handle explicitly.
+    if connection.connection is not None:
+        connection.connection.close()
+        connection.connection = None
+    del connections[alias]
+
+
+@contextmanager
+def memory_snapshot(using="default"):
+    """
+    Copies `using` into memory and routes this thread's reads there until the block exits.
+    Yields the snapshot alias. Not SQLite: nothing is copied and the alias is `using` itself.
+    The copy only sees committed data, so it can't be taken inside transaction.atomic().
+    """
+    source = connections[using]
+    if source.vendor != "sqlite":
+        yield using
+        return
+    if source.in_atomic_block:
+        # The backup API would wait forever on this connection's own open write transaction.
+        raise TransactionManagementError("memory_snapshot() can't be used inside an atomic block.")
+
+    alias = f"snapshot_{uuid4().hex[:12]}"
+    target = _open(alias, source)
+    token = None
+    try:
+        source.ensure_connection()
+        target.ensure_connection()
+        source.connection.backup(target.connection)
+        token = _active_alias.set(alias)
+        yield alias
+    finally:
+        if token is not None:
+            _active_alias.reset(token)
+        _close(alias)
@@ -0,0 +1,136 @@
+"""
+SQLite storage profiles.
+
+A profile is a set of PRAGMAs applied to a connection. settings.SQLITE_STORAGE_PROFILE picks
+the profile every new connection starts with (see SrcConfig.ready); storage_profile() switches
+the current connection temporarily, e.g. "bulk_load" around imports and "read" around audits.
+
+The journal mode isn't part of any profile: it is stored in the database file, so it is set
+once per new connection (settings.SQLITE_JOURNAL_MODE, WAL by default) and left alone after.
+In WAL mode audits and exports keep reading while an import commits.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_JOURNAL_MODE = "WAL"
+
+PROFILES = {
+    "default": {},
+    # Imports: no fsync per commit, big page cache.
+    "bulk_load": {
+        "synchronous": "OFF",
+        "cache_size": -262144,  # negative = KiB, i.e. 256 MiB
+        "temp_store": "MEMORY",
+    },
+    # Audits and exports: memory-mapped reads, and any stray write fails loudly.
+    "read": {
+        "mmap_size": 1 << 30,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+        "query_only": "ON",
+    },
+}
+
+# SQLite refuses to change these inside a transaction, so they are skipped there.
+TRANSACTION_SENSITIVE = {"synchronous", "temp_store"}
+
+
+def _is_sqlite(connection):
+    return connection.vendor == "sqlite"
+
+
+def _apply(connection, pragmas):
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if name in TRANSACTION_SENSITIVE and connection.in_atomic_block:
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def _read(connection, names):
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            if row is not None:
+                values[name] = row[0]
+    return values
+
+
+def apply_default_profile(sender, connection, **kwargs):
+    """
+    connection_created receiver: sets the journal mode and applies settings.SQLITE_STORAGE_PROFILE
+    to new connections. Switching an already-WAL file to WAL is a no-op; in-memory databases
+    keep their "memory" journal.
+    """
+    if not _is_sqlite(connection):
+        return
+    journal_mode = getattr(settings, "SQLITE_JOURNAL_MODE", DEFAULT_JOURNAL_MODE)
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+    profile = getattr(settings, "SQLITE_STORAGE_PROFILE", "default")
+    if PROFILES[profile]:
+        _apply(connection, PROFILES[profile])
+
+
+@contextmanager
+def storage_profile(name, using="default"):
+    """Applies a profile to the current thread's connection and restores the previous PRAGMAs after."""
+    connection = connections[using]
+    pragmas = PROFILES[name]
+    if not _is_sqlite(connection) or not pragmas:
+        yield
+        return
+
+    connection.ensure_connection()
+    previous = _read(connection, pragmas)
+    _apply(connection, pragmas)
+    try:
+        yield
+    finally:
+        # query_only goes first, otherwise restoring the rest would be refused as a write
+        restore = {"query_only": previous.pop("query_only")} if "query_only" in previous else {}
+        restore.update(previous)
+        _apply(connection, restore)
+
+
+@contextmanager
+def deferred_indexes(*models, using="default"):
+    """
+    Drops the non-unique secondary indexes of the given models' tables and rebuilds them on
+    exit, so a bulk load writes the table once and builds each index in one sorted pass
+    instead of updating it per row. Unique indexes stay, since they enforce correctness.
+    """
+    connection = connections[using]
+    if not _is_sqlite(connection):
+        yield
+        return
+
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables
+        )
+        indexes = [(name, sql) for name, sql in cursor.fetchall() if not sql.upper().startswith("CREATE UNIQUE")]
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    try:
+        yield
+    except BaseException:
+        # Inside a transaction the rollback brings the indexes back (SQLite DDL is transactional),
+        # and the broken transaction would refuse the CREATE INDEX and hide the real error.
+        if not connection.in_atomic_block:
+            _create_indexes(connection, indexes)
+        raise
+    _create_indexes(connection, indexes)
+
+
+def _create_indexes(connection, indexes):
+    with connection.cursor() as cursor:
+        for _, sql in indexes:
+            cursor.execute(sql)
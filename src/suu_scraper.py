@@ -1,7 +1,13 @@
+import hashlib
+import html as html_lib
 import requests
 import re
 from bs4 import BeautifulSoup
 
+PROGRAM_SUMMARY_RE = re.compile(r"<h2[^>]*>(?:(?!</h2>).)*?Program Summary", re.IGNORECASE | re.DOTALL)
+PAGE_FOOTER_RE = re.compile(r"Print this Page", re.IGNORECASE)
+NON_CONTENT_RE = re.compile(r"<(script|style)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+
 
 def get_catalog_years(base_url="https://www.suu.edu/academics/catalog/"):
     """
@@ -65,3 +71,22 @@ def fetch_total_credits(html):
                 return int(match.group(1))
     print("WARN: Total credits not found in page — defaulting to 120.")
     return 120
+
+
+def program_summary_fingerprint(html):
+    """
+    Returns a sha256 hex digest of the normalized "Program Summary" section of a program page.
+    Only visible text is hashed (tags, attributes, scripts and the page footer are dropped) so
+    per-request markup such as popup ids does not register as a change. This is a cheap regex
+    pass, meant to run before the full BeautifulSoup parse.
+    """
+    start = PROGRAM_SUMMARY_RE.search(html)
+    content = html[start.start():] if start else html
+    footer = PAGE_FOOTER_RE.search(content)
+    if footer:
+        content = content[:footer.start()]
+
+    content = NON_CONTENT_RE.sub(" ", content)
+    content = re.sub(r"<[^>]+>", " ", content)
+    content = re.sub(r"\s+", " ", html_lib.unescape(content)).strip()
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,123 @@
+"""
+Compact, array-backed transcripts for in-process audits.
+
+TranscriptStore.build() reads every record of the given students in one ordered values_list
+cursor (live table, plus the archive once terms have been archived) into typed `array`
+columns grouped by student, CSR style: student i owns rows offsets[i]:offsets[i + 1], ordered
+by (term, id) like load_transcripts(). Courses are stored by their integer id and grades are
+interned to small integers, so a record costs 11 bytes (term int32, course int32, grade uint8,
+credits int16) instead of two Django model instances.
+
+    store = TranscriptStore.build(student_ids)
+    for term, course_id, credits, course_credits in store[sid].passed():
+        ...
+"""
+from array import array
+
+from src.models import ArchivedStudentRecord, ArchivedTerm, StudentRecord
+
+_COLUMNS = ("student_id", "term", "id", "course_id", "grade", "credits", "course__credits")
+_ORDER = ("student_id", "term", "id")
+
+
+class Transcript:
+    """One student's rows of a TranscriptStore."""
+    __slots__ = ("store", "start", "stop")
+
+    def __init__(self, store, start, stop):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def rows(self):
+        """(term, Course id, grade, credits) per record."""
+        s = self.store
+        for i in range(self.start, self.stop):
+            yield s.terms[i], s.courses[i], s.grade_names[s.grades[i]], s.credits[i]
+
+    def passed(self):
+        """(term, Course id, credits, catalog credits of the course) per record with a passing grade."""
+        s = self.store
+        grade_passed = s.grade_passed
+        for i in range(self.start, self.stop):
+            if grade_passed[s.grades[i]]:
+                course = s.courses[i]
+                yield s.terms[i], course, s.credits[i], s.course_credits[course]
+
+
+class TranscriptStore:
+    def __init__(self):
+        self.student_index = {}  # student id -> i
+        self.offsets = array("q", [0])
+        self.terms = array("i")
+        self.courses = array("i")
+        self.grades = array("B")
+        self.credits = array("h")
+        self.course_credits = {}  # Course id -> catalog credits
+        # Interned grades; `grades` holds indexes into these.
+        self.grade_names = []
+        self.grade_passed = array("b")
+        self._grade_index = {}
+
+    @classmethod
+    def build(cls, student_ids):
+        """
+        Loads the transcripts of `student_ids` (a list, or a queryset of student ids, which
+        stays a subquery and so works for any number of students).
+        """
+        from src.eligibility import passed
+
+        live = StudentRecord.objects.filter(student_id__in=student_ids).values_list(*_COLUMNS)
+        if ArchivedTerm.objects.exists():
+            # Students whose history doesn't reach an archived term simply have no rows there.
+            archived = ArchivedStudentRecord.objects.filter(student_id__in=student_ids).values_list(*_COLUMNS)
+            rows = live.union(archived, all=True).order_by(*_ORDER)
+        else:
+            rows = live.order_by(*_ORDER)
+
+        store = cls()
+        student_index, course_credits, grade_index = store.student_index, store.course_credits, store._grade_index
+        terms, courses, grades, credits = store.terms, store.courses, store.grades, store.credits
+        current = None
+        for sid, term, _, course, grade, record_credits, catalog_credits in rows.iterator(chunk_size=10000):
+            if sid != current:
+                if current is not None:
+                    store.offsets.append(len(terms))
+                current = sid
+                student_index[sid] = len(student_index)
+            if course not in course_credits:
+                course_credits[course] = catalog_credits
+            grade_id = grade_index.get(grade)
+            if grade_id is None:
+                grade_id = grade_index[grade] = len(store.grade_names)
+                store.grade_names.append(grade)
+                store.grade_passed.append(passed(grade))
+            terms.append(term)
+            courses.append(course)
+            grades.append(grade_id)
+            credits.append(record_credits)
+        if current is not None:
+            store.offsets.append(len(terms))
+        return store
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, student_id):
+        return student_id in self.student_index
+
+    def __getitem__(self, student_id):
+        """The student's Transcript; empty for students without records."""
+        i = self.student_index.get(student_id)
+        if i is None:
+            return Transcript(self, 0, 0)
+        return Transcript(self, self.offsets[i], self.offsets[i + 1])
+
+    @property
+    def nbytes(self):
+        """Bytes held by the per-record and per-student columns."""
+        columns = (self.offsets, self.terms, self.courses, self.grades, self.credits)
+        return sum(column.itemsize * len(column) for column in columns)
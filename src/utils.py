@@ -1,4 +1,9 @@
+import hashlib
+import json
 import re
+import weakref
+
+import numpy as np
 import pandas as pd
 from collections import namedtuple, deque
 from rapidfuzz import process, fuzz
@@ -25,46 +30,93 @@ def extract_credits(text, prefer="min"):
 CourseData = namedtuple("CourseData", ["subject", "number", "name", "credits"])
 
 
+class RegistrarNameIndex:
+    """
+    Registrar names from a major code lookup, normalized once and ready for fuzzy matching.
+    Use get_registrar_index() to reuse the index for the same DataFrame across calls.
+    """
+
+    def __init__(self, major_code_df: pd.DataFrame):
+        self.rows = []
+        current_base_code = None
+        registrar_names = major_code_df["Major Name Registrar"].tolist()
+        for position, (raw_name, code) in enumerate(zip(registrar_names, major_code_df["Major Code"].tolist())):
+            name = normalize_major_name_registrar(raw_name)
+            is_conc = "concentration" in name.lower()
+            if not is_conc:
+                current_base_code = code
+            self.rows.append({
+                "position": position,
+                "normalized_name": name,
+                "major_code": code,
+                "is_concentration": is_conc,
+                "base_major_code": current_base_code,
+                "major_name_registrar": raw_name
+            })
+        self.choices = [row["normalized_name"] for row in self.rows]
+
+    def result(self, idx, score):
+        row = self.rows[idx]
+        return {
+            "major_code": row["major_code"],
+            "base_major_code": row["base_major_code"],
+            "major_name_registrar": row["major_name_registrar"],
+            "score": score
+        }
+
+
+# id(DataFrame) -> (weakref to the DataFrame, RegistrarNameIndex). DataFrames are unhashable,
+# so the weakref guards against a recycled id() handing back another frame's index; entries are
+# dropped when their DataFrame is collected.
+_registrar_indexes = {}
+
+
+def get_registrar_index(major_code_df: pd.DataFrame) -> RegistrarNameIndex:
+    cached = _registrar_indexes.get(id(major_code_df))
+    if cached and cached[0]() is major_code_df:
+        return cached[1]
+    index = RegistrarNameIndex(major_code_df)
+    _registrar_indexes[id(major_code_df)] = (weakref.ref(major_code_df), index)
+    weakref.finalize(major_code_df, _registrar_indexes.pop, id(major_code_df), None)
+    return index
+
+
 def match_major_name_web_to_registrar(web_name, major_code_df, scorer=fuzz.WRatio):
     """
     Match a major_name_web to the closest major_name_registrar using RapidFuzz.
     Returns a dictionary with major_code, base_major_code, major_name_registrar, and score.
     """
-    web_name = normalize_major_name_web(web_name)
-
-    # Create a list of tuples: (index, normalized_name, major_code, is_concentration, base_major_code)
-    enriched = []
-    current_base_code = None
-    for idx, row in major_code_df.iterrows():
-        name = normalize_major_name_registrar(row["Major Name Registrar"])
-        code = row["Major Code"]
-        is_conc = "concentration" in name.lower()
-        if not is_conc:
-            current_base_code = code
-        enriched.append({
-            "index": idx,
-            "normalized_name": name,
-            "major_code": code,
-            "is_concentration": is_conc,
-            "base_major_code": current_base_code
-        })
-
-    # Match against all normalized registrar names
+    index = get_registrar_index(major_code_df)
     match, score, idx = process.extractOne(
-        query=web_name,
-        choices=[row["normalized_name"] for row in enriched],
+        query=normalize_major_name_web(web_name),
+        choices=index.choices,
         scorer=scorer
     )
+    return index.result(idx, score)
 
-    matched_row = enriched[idx]
-    raw_row = major_code_df.iloc[matched_row["index"]]
 
-    return {
-        "major_code": matched_row["major_code"],
-        "base_major_code": matched_row["base_major_code"],
-        "major_name_registrar": raw_row["Major Name Registrar"],
-        "score": score
-    }
+def match_major_names_web_to_registrar(web_names, major_code_df, scorer=fuzz.WRatio, score_cutoff=0, workers=-1):
+    """
+    Batch version of match_major_name_web_to_registrar().
+    Scores every web name against every registrar name in one process.cdist call spread over
+    `workers` threads (-1 = all cores). Returns one result dict per web name, in order, or None
+    where the best score is below score_cutoff.
+    """
+    index = get_registrar_index(major_code_df)
+    queries = [normalize_major_name_web(name) for name in web_names]
+    if not queries or not index.choices:
+        return [None] * len(queries)
+
+    scores = process.cdist(
+        queries, index.choices, scorer=scorer, score_cutoff=score_cutoff, dtype=np.float64, workers=workers
+    )
+    best = scores.argmax(axis=1)  # first best match on ties, same as extractOne
+
+    results = []
+    for row, idx in enumerate(best):
+        score = float(scores[row, idx])
+        results.append(index.result(int(idx), score) if score >= score_cutoff else None)
+    return results
 
 
 def normalize_major_name_web(name):
@@ -99,28 +151,28 @@ def annotate_major_code_base_names(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(result)
 
 
-from src.course_parser import walk_tree
-
 def prepare_django_inserts(parsed_tree, match_result, major_name_web, total_credits_required, catalog_year):
     """
     Converts a parsed tree into a payload for populate_catalog_from_payload().
     Accepts match_result from match_major_name_web_to_registrar(), which includes
     both major_code and base_major_code.
+
+    Single breadth-first pass: node and node-course rows are emitted in BFS order, and each
+    course's metadata comes from its first occurrence in depth-first (walk_tree) order. The
+    DFS order is tracked by each node's path of sibling indexes, since comparing those paths
+    lexicographically is exactly pre-order.
     """
     requirement_nodes = []
     node_courses = []
-    course_set = set()
+    first_seen = {}  # course_id -> (node path, CourseData)
 
     id_counter = 0
-    node_id_map = {}
-
-    queue = deque([(node, None) for node in parsed_tree])
+    queue = deque([(node, None, (i,)) for i, node in enumerate(parsed_tree)])
 
     while queue:
-        node, parent_id = queue.popleft()
+        node, parent_id, path = queue.popleft()
 
         node_id = id_counter
-        node_id_map[id(node)] = node_id
         id_counter += 1
 
         # Convert RequirementNodeData → dict for DB
@@ -134,30 +186,28 @@ def prepare_django_inserts(parsed_tree, match_result, major_name_web, total_cred
 
         for course in node.courses:
             course_id = f"{course.subject}-{course.number}"
-            course_set.add(course_id)
+            seen = first_seen.get(course_id)
+            if seen is None or path < seen[0]:
+                first_seen[course_id] = (path, course)
             node_courses.append({
                 "node_id": node_id,
                 "course_id": course_id
             })
 
-        for child in node.children:
-            queue.append((child, node_id))
+        for i, child in enumerate(node.children):
+            queue.append((child, node_id, path + (i,)))
 
     # Build Course entries
     course_data = []
-    for cid in sorted(course_set):
-        subj, num = cid.split("-")
-        for node in walk_tree(parsed_tree):
-            for course in node.courses:
-                if course.subject == subj and course.number == num:
-                    course_data.append({
-                        "course_id": cid,
-                        "subject": course.subject,
-                        "course_number": course.number,
-                        "course_name": course.name,
-                        "credits": course.credits
-                    })
-                    break
+    for cid in sorted(first_seen):
+        course = first_seen[cid][1]
+        course_data.append({
+            "course_id": cid,
+            "subject": course.subject,
+            "course_number": course.number,
+            "course_name": course.name,
+            "credits": course.credits
+        })
 
     # Final payload
     return {
@@ -175,6 +225,23 @@ def prepare_django_inserts(parsed_tree, match_result, major_name_web, total_cred
     }
 
 
+def requirement_tree_hash(payload) -> str:
+    """
+    Canonical sha256 of the requirement structure in a prepare_django_inserts() payload.
+    Major metadata and course names are left out so identical trees from different majors
+    or catalog years hash the same.
+    """
+    canonical = {
+        "requirement_nodes": [
+            [n["id"], n["parent_id"], n["name"], n["type"], n["required_credits"]]
+            for n in payload["requirement_nodes"]
+        ],
+        "node_courses": [[nc["node_id"], nc["course_id"]] for nc in payload["node_courses"]],
+    }
+    encoded = json.dumps(canonical, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
 def normalize_catalog_term(term: int) -> int:
     """
     Given a catalog term like 202510 (Spring) or 202520 (Summer),
@@ -0,0 +1,33 @@
+"""
+Cheap fingerprints of the data behind the in-process caches, so a long-running process (the
+audit service, the watcher) notices imports, audits and catalog loads made by other processes.
+
+data_version() reads both in one query of indexed MAX/COUNT lookups:
+    transcripts  changes when records or term summaries are written (summaries are rewritten,
+                 never updated in place, and ids are AUTOINCREMENT, so the max id only grows)
+    catalog      changes when majors are added or their requirement tree is swapped, or when
+                 requirement nodes / node courses are inserted
+"""
+from collections import namedtuple
+
+from django.db import connection
+
+from src.models import ArchivedStudentRecord, MajorMapping, NodeCourse, RequirementNode, StudentRecord
+from src.models import StudentTermSummary
+
+DataVersion = namedtuple("DataVersion", ["transcripts", "catalog"])
+
+
+def data_version():
+    def max_id(model):
+        return f'(SELECT MAX(id) FROM "{model._meta.db_table}")'
+
+    majors = MajorMapping._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {max_id(StudentTermSummary)}, {max_id(StudentRecord)}, {max_id(ArchivedStudentRecord)}, "
+            f'(SELECT COUNT(*) FROM "{majors}"), (SELECT SUM(catalog_version) FROM "{majors}"), '
+            f"{max_id(MajorMapping)}, {max_id(RequirementNode)}, {max_id(NodeCourse)}"
+        )
+        row = cursor.fetchone()
+    return DataVersion(transcripts=row[:3], catalog=row[3:])
@@ -0,0 +1,165 @@
+"""
+Watch-folder ingestion: registrar extracts dropped into an inbox are imported and the affected
+students re-audited automatically.
+
+    python main.py watch inbox/ --interval 5 --settle 10
+
+Writers should copy into a hidden or *.tmp / *.part name and rename into place once the file
+is complete; the rename is atomic, so a visible *.csv is always whole. For writers that copy
+in place, a file is only picked up once its size and mtime have stayed unchanged for
+`settle_seconds`. Files are processed one at a time in the order they arrived and are then
+moved to inbox/processed/ (or inbox/failed/). Every run appends its latency - from the watcher
+first seeing the file to its audits being written - to logs/ingest_latency.jsonl.
+"""
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.metrics import stage
+from src.models import StudentAudit
+
+PARTIAL_SUFFIXES = (".tmp", ".part", ".partial", ".crdownload")
+LATENCY_LOG = os.path.join("logs", "ingest_latency.jsonl")
+
+
+@dataclass
+class PendingFile:
+    path: Path
+    seen_at: float  # self.clock() when the file first showed up, like every other timestamp here
+    signature: tuple
+    stable_since: float
+
+
+def affected_audits(affected):
+    """
+    {term: [student ids]} from the importer -> {term: student ids} to re-audit: the newest
+    imported term for every affected student, plus any already audited term at or after the
+    earliest term that changed (their cumulative figures include the new records).
+    """
+    if not affected:
+        return {}
+    newest = max(affected)
+    earliest = min(affected)
+    students = {sid for ids in affected.values() for sid in ids}
+
+    to_audit = {newest: set(affected[newest])}
+    for sid, term in (
+        StudentAudit.objects
+        .filter(student_id__in=students, term__gte=earliest)
+        .values_list("student_id", "term")
+    ):
+        to_audit.setdefault(term, set()).add(sid)
+    return {term: sorted(ids) for term, ids in sorted(to_audit.items())}
+
+
+class InboxWatcher:
+    def __init__(self, inbox, pattern="*.csv", settle_seconds=5.0, poll_interval=2.0,
+                 latency_log=LATENCY_LOG, major_code_df=None, clock=time.time):
+        self.inbox = Path(inbox)
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.latency_log = latency_log
+        self.major_code_df = major_code_df
+        self.clock = clock
+        self.processed_dir = self.inbox / "processed"
+        self.failed_dir = self.inbox / "failed"
+        self._pending = {}
+
+    def _candidates(self):
+        for path in self.inbox.glob(self.pattern):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            if path.name.lower().endswith(PARTIAL_SUFFIXES):
+                continue
+            yield path
+
+    def scan(self):
+        """Updates the pending set; returns the files that have settled, oldest arrival first."""
+        now = self.clock()
+        seen = set()
+        for path in self._candidates():
+            seen.add(path)
+            stat = path.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+            pending = self._pending.get(path)
+            if pending is None:
+                self._pending[path] = PendingFile(path, now, signature, now)
+            elif pending.signature != signature:
+                # Still being written: restart the debounce window.
+                pending.signature = signature
+                pending.stable_since = now
+
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]  # removed or renamed away before it settled
+
+        ready = [
+            p for p in self._pending.values()
+            if p.signature[0] > 0 and now - p.stable_since >= self.settle_seconds
+        ]
+        return sorted(ready, key=lambda p: (p.seen_at, p.path.name))
+
+    def process(self, pending):
+        """Imports one settled file and re-audits the students it touched. Returns the run report."""
+        from src.data import import_student_data_from_csv
+        from src.eligibility import run_audit
+
+        started = time.perf_counter()
+        with stage("import"):
+            result = import_student_data_from_csv(str(pending.path), major_lookup_df=self.major_code_df)
+        imported = time.perf_counter()
+
+        audited = {}
+        if result["success"]:
+            for term, student_ids in affected_audits(result.get("affected")).items():
+                with stage(f"audit:{term}"):
+                    audited[term] = run_audit(term, student_ids=student_ids)
+        finished = time.perf_counter()
+
+        target_dir = self.processed_dir if result["success"] else self.failed_dir
+        target_dir.mkdir(exist_ok=True)
+        shutil.move(str(pending.path), str(target_dir / pending.path.name))
+        del self._pending[pending.path]
+
+        report = {
+            "file": pending.path.name,
+            "success": result["success"],
+            "message": result["message"],
+            "audited": {str(term): n for term, n in audited.items()},
+            "import_seconds": round(imported - started, 3),
+            "audit_seconds": round(finished - imported, 3),
+            # From the file landing in the inbox to its audits being written.
+            "latency_seconds": round(self.clock() - pending.seen_at, 3),
+            "finished_at": self.clock(),
+        }
+        self._log(report)
+        return report
+
+    def _log(self, report):
+        icon = "✅" if report["success"] else "❌"
+        print(
+            f"{icon} {report['file']}: {report['message']} "
+            f"(import {report['import_seconds']:.2f}s, audit {report['audit_seconds']:.2f}s, "
+            f"latency {report['latency_seconds']:.1f}s)"
+        )
+        if self.latency_log:
+            os.makedirs(os.path.dirname(self.latency_log) or ".", exist_ok=True)
+            with open(self.latency_log, "a") as f:
+                f.write(json.dumps(report) + "\n")
+
+    def poll_once(self):
+        """One scan; processes every settled file in arrival order. Returns their reports."""
+        return [self.process(pending) for pending in self.scan()]
+
+    def run_forever(self):
+        print(f"👀 Watching {self.inbox} for {self.pattern} (settle {self.settle_seconds}s)")
+        try:
+            while True:
+                self.poll_once()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,92 @@
+"""
+Query budgets for tests: catch N+1 patterns, not just wrong results.
+
+    class ImportBudgetTests(QueryBudgetMixin, TestCase):
+        def test_import(self):
+            with self.assertQueryBudget(30):
+                import_student_data_from_csv(path)
+
+            self.assertQueriesDoNotScale(lambda size: ..., sizes=(5, 50))
+
+Statements are grouped by shape: the SQL with its parameters left as placeholders and IN
+lists / multi-row VALUES collapsed, so "the same query once per row" shows up as one shape
+repeated many times whatever the ids were.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+SMALL, LARGE = 5, 40
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_VALUES_ROWS = re.compile(r"VALUES (\((?:%s, )*%s\))(?:, \((?:%s, )*%s\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def sql_shape(sql):
+    sql = _WHITESPACE.sub(" ", sql.strip())
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _VALUES_ROWS.sub(r"VALUES \1, ...", sql)
+
+
+class QueryLog:
+    """execute_wrapper that records every statement run on a connection."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def shapes(self):
+        return Counter(sql_shape(sql) for sql in self.statements)
+
+    def repeated(self, max_repeats):
+        """Shapes run more than max_repeats times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes().most_common() if n > max_repeats]
+
+
+@contextmanager
+def count_queries(using="default"):
+    log = QueryLog()
+    with connections[using].execute_wrapper(log):
+        yield log
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_repeats=3, using="default"):
+        """Fails if the block runs more than max_queries statements or repeats one shape too often."""
+        with count_queries(using) as log:
+            yield log
+        problems = []
+        if len(log) > max_queries:
+            problems.append(f"{len(log)} queries, budget is {max_queries}.")
+        for shape, n in log.repeated(max_repeats):
+            problems.append(f"Repeated {n}x (likely N+1): {shape[:300]}")
+        if problems:
+            self.fail("\n".join(problems))
+
+    def assertQueriesDoNotScale(self, prepare, sizes=(SMALL, LARGE), slack=0, max_repeats=3):
+        """
+        prepare(size) builds a dataset of `size` students and returns the call under test.
+        Runs it at every size (each inside a rolled-back savepoint) and fails if the number
+        of queries grows with the dataset by more than `slack`. Returns {size: queries}.
+        """
+        counts = {}
+        for size in sizes:
+            with transaction.atomic():
+                call = prepare(size)
+                with self.assertQueryBudget(float("inf"), max_repeats=max_repeats) as log:
+                    call()
+                counts[size] = len(log)
+                transaction.set_rollback(True)
+        if max(counts.values()) - min(counts.values()) > slack:
+            self.fail(f"Query count scales with dataset size: {counts}")
+        return counts
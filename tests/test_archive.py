@@ -0,0 +1,78 @@
+from django.test import TestCase
+
+from src.archive import archive_closed_terms, load_transcripts, restore_terms
+from src.eligibility import audit_student, calculate_gpa, refresh_term_summaries
+from src.models import ArchivedStudentRecord, ArchivedTerm, Course, MajorMapping, NodeCourse, RequirementNode
+from src.models import Student, StudentRecord
+from src.transcripts import TranscriptStore
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        course = Course.objects.create(course_id="KIN-3050", subject="KIN", course_number="3050", credits=3)
+        other = Course.objects.create(course_id="KIN-2000", subject="KIN", course_number="2000", credits=3)
+        veteran = Student.objects.create(student_id="T00000001")
+        freshman = Student.objects.create(student_id="T00000002")
+        rows = [
+            (veteran, 202130, 202130, course, "F"),
+            (veteran, 202130, 202430, other, "A"),
+            (freshman, 202430, 202430, course, "B"),
+        ]
+        for student, first_term, term, crse, grade in rows:
+            StudentRecord.objects.create(
+                student=student, high_school_grad=2020, first_term=first_term, term=term,
+                course=crse, grade=grade, credits=3, institution="SUU"
+            )
+
+    def test_archive_and_restore_closed_terms(self):
+        self.assertEqual(archive_closed_terms(202430), [202130])
+        self.assertEqual(StudentRecord.objects.count(), 2)
+        self.assertEqual(ArchivedStudentRecord.objects.count(), 1)
+        self.assertEqual(ArchivedTerm.objects.get().record_count, 1)
+
+        restore_terms([202130])
+        self.assertEqual(StudentRecord.objects.count(), 3)
+        self.assertFalse(ArchivedTerm.objects.exists())
+
+    def test_cumulative_gpa_reads_archive(self):
+        archive_closed_terms(202430)
+        refresh_term_summaries(["T00000001"])
+        self.assertEqual(calculate_gpa("T00000001"), 2.0)
+        self.assertEqual([r.term for r in load_transcripts(["T00000001"])["T00000001"]], [202130, 202430])
+
+    def test_archive_skipped_for_students_after_archived_terms(self):
+        archive_closed_terms(202430)
+        # live records + archived term list, no archive query
+        with self.assertNumQueries(2):
+            transcripts = load_transcripts(["T00000002"])
+        self.assertEqual(len(transcripts["T00000002"]), 1)
+
+
+class TranscriptOrderTests(TestCase):
+    """Records fill requirements in (term, id) order, whatever order they were imported in."""
+
+    def setUp(self):
+        major = MajorMapping.objects.create(
+            major_code="EXSC", catalog_year=202430, major_name_web="Exercise Science (B.S.)",
+            major_name_registrar="Exercise Science", total_credits_required=120
+        )
+        node = RequirementNode.objects.create(major=major, name="Core", type="credits", required_credits=3)
+        self.student = Student.objects.create(student_id="T00000001", major=major)
+        # The current term's course is imported before an earlier term's, so it has the lower id.
+        for number, term in (("3050", 202430), ("2000", 202420)):
+            course = Course.objects.create(course_id=f"KIN-{number}", subject="KIN", course_number=number, credits=3)
+            NodeCourse.objects.create(node=node, course=course)
+            StudentRecord.objects.create(
+                student=self.student, high_school_grad=2020, first_term=202130, term=term, course=course,
+                grade="A", credits=3, institution="SUU", ft_term_cnt=6
+            )
+        refresh_term_summaries(["T00000001"])
+
+    def test_earlier_term_fills_the_requirement_first(self):
+        self.assertEqual([r.term for r in load_transcripts(["T00000001"])["T00000001"]], [202420, 202430])
+
+        summaries = list(self.student.term_summaries.all())
+        records = TranscriptStore.build(["T00000001"])["T00000001"]
+        audit, _ = audit_student(self.student, summaries, records, 202430)
+        # The requirement was complete after 202420, so the current term adds no degree-applicable credits.
+        self.assertEqual((audit.da_credits, audit.total_term_credits), (3, 0))
@@ -1,5 +1,6 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from src.models import Student, Course, MajorMapping, StudentRecord, StudentAudit, AuditFlag
+from src.eligibility import AUDIT_FIELDS, run_audit
 
 class AuditFlagTests(TestCase):
     def setUp(self):
@@ -71,3 +72,53 @@ class AuditFlagTests(TestCase):
         # Delete the audit → should also delete the flag
         self.audit.delete()
         self.assertEqual(AuditFlag.objects.count(), 0)
+
+
+class RunAuditTests(TestCase):
+    def setUp(self):
+        self.major = MajorMapping.objects.create(
+            major_code="EXSC",
+            catalog_year=202430,
+            major_name_web="Exercise Science (B.S.)",
+            major_name_registrar="Exercise Science",
+            total_credits_required=120
+        )
+        course = Course.objects.create(
+            course_id="KIN-3050", subject="KIN", course_number="3050", course_name="Motor Learning", credits=3
+        )
+        for sid, major in (("T00000001", self.major), ("T00000002", None)):
+            StudentRecord.objects.create(
+                student=Student.objects.create(student_id=sid, major=major),
+                high_school_grad=2022,
+                first_term=202310,
+                term=202430,
+                course=course,
+                grade="A",
+                credits=3,
+                institution="SUU",
+                ft_term_cnt=3
+            )
+
+    def test_rerun_updates_audits_and_replaces_flags(self):
+        run_audit(202430)
+        run_audit(202430)
+
+        self.assertEqual(StudentAudit.objects.count(), 2)
+        audit = StudentAudit.objects.get(student_id="T00000001")
+        self.assertEqual(audit.total_term_credits, 3)
+        self.assertEqual(audit.gpa, 4)
+        self.assertEqual(AuditFlag.objects.count(), 1)
+        self.assertEqual(AuditFlag.objects.get().student_audit.student_id, "T00000002")
+
+
+class RunAuditSnapshotTests(TransactionTestCase):
+    setUp = RunAuditTests.setUp
+
+    def test_snapshot_audit_matches(self):
+        run_audit(202430)
+        expected = list(StudentAudit.objects.order_by("student_id").values(*AUDIT_FIELDS))
+        StudentAudit.objects.all().delete()
+
+        run_audit(202430, snapshot=True)
+        self.assertEqual(list(StudentAudit.objects.order_by("student_id").values(*AUDIT_FIELDS)), expected)
+        self.assertEqual(AuditFlag.objects.count(), 1)
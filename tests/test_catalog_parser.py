@@ -1,8 +1,27 @@
+import gc
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
-from src.models import MajorMapping, RequirementNode
+from django.test.utils import CaptureQueriesContext
+from datetime import timedelta
+
+from src.batch import scrape_catalog_year
+from src.maintenance import collect_catalog_garbage, delete_majors
+from src.requirement_tree import RequirementTree, get_requirement_tree, invalidate_requirement_trees
+from src.requirement_tree import sync_requirement_trees
+from src.eligibility import credits_by_requirement_group
+from src.models import MajorMapping, RequirementNode, CatalogTree, CatalogSnapshot, NodeCourse
+from src.models import Course, Student, StudentRecord
 from src.course_parser import parse_course_structure_as_tree, print_requirement_tree
 from src.utils import prepare_django_inserts, load_major_code_lookup, match_major_name_web_to_registrar
-from src.data import populate_catalog_from_payload
+from src.utils import _registrar_indexes, get_registrar_index, match_major_names_web_to_registrar
+from src.data import populate_catalog_from_payload, populate_catalog_from_payloads
+from src.course_parser import CourseData, RequirementNodeData
+from src.parse_worker import init_parse_worker, parse_program_html
+from src.suu_scraper import program_summary_fingerprint
 
 
 class CatalogParseTest(TestCase):
@@ -53,7 +72,279 @@ class CatalogDBTest(TestCase):
         non_roots = nodes.exclude(parent__isnull=True)
         self.assertTrue(all(n.parent_id for n in non_roots), "Some nodes are missing a parent reference")
 
+    def test_requirement_tree_loads_in_two_queries(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        with self.assertNumQueries(2):
+            tree = RequirementTree.load(major)
+        self.assertEqual(len(tree.nodes), len(self.payload["requirement_nodes"]))
+        self.assertEqual(
+            sorted((n.name, tree.nodes[n.parent_id].name if n.parent_id else None) for n in tree.walk()),
+            sorted((n["name"], self.payload["requirement_nodes"][n["parent_id"]]["name"] if n["parent_id"] is not None else None)
+                   for n in self.payload["requirement_nodes"])
+        )
+        self.assertEqual(set(tree.course_codes.values()), {c["course_id"] for c in self.payload["courses"]})
+        self.assertEqual(tree.course_ids, set(tree.course_codes))
+
+    def test_requirement_tree_cached_until_import(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        invalidate_requirement_trees()
+        tree = get_requirement_tree(major)
+        with self.assertNumQueries(0):
+            self.assertIs(get_requirement_tree(major), tree)
+            print_requirement_tree(major)
+
+        changed = {
+            **self.payload,
+            "requirement_nodes": [{**n, "required_credits": 1} for n in self.payload["requirement_nodes"]]
+        }
+        populate_catalog_from_payload(changed)
+        major.refresh_from_db()
+        self.assertEqual({c for c, _ in get_requirement_tree(major).requirements()}, {1})
+
+    def test_requirement_trees_resync_after_catalog_loads_elsewhere(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        sync_requirement_trees()
+        tree = get_requirement_tree(major)
+        sync_requirement_trees()
+        self.assertIs(get_requirement_tree(major), tree)
+
+        # A queryset update sends no signals, like a catalog load in another process.
+        MajorMapping.objects.filter(pk=major.pk).update(catalog_version=major.catalog_version + 1)
+        sync_requirement_trees()
+        self.assertIsNot(get_requirement_tree(major), tree)
+
+    def test_materialized_paths_answer_subtree_and_ancestor_queries(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        tree = get_requirement_tree(major)
+        for node in major.requirement_nodes():
+            in_memory = tree.nodes[node.id]
+            expected_subtree = set()
+            stack = [in_memory]
+            while stack:
+                current = stack.pop()
+                expected_subtree.add(current.id)
+                stack.extend(current.children)
+            self.assertEqual(set(node.subtree().values_list("id", flat=True)), expected_subtree)
+
+            expected_ancestors = []
+            parent_id = in_memory.parent_id
+            while parent_id:
+                expected_ancestors.insert(0, parent_id)
+                parent_id = tree.nodes[parent_id].parent_id
+            self.assertEqual(list(node.ancestors().values_list("id", flat=True)), expected_ancestors)
+            self.assertEqual(node.depth, len(expected_ancestors))
+
+    def test_top_level_group_for_course(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        groups = major.top_level_groups_for_course("KIN-3050")
+        self.assertEqual([g.name for g in groups], ["Exercise Science Curriculum (47-56 Credits)"])
+        self.assertIn("KIN-3050", groups[0].subtree_courses().values_list("course__course_id", flat=True))
+
+    def test_paths_keep_fixed_width_past_six_digit_ids(self):
+        major = MajorMapping.objects.create(
+            major_code="BIG", catalog_year=202430, major_name_web="Big", major_name_registrar="Big",
+            total_credits_required=120
+        )
+        group = RequirementNode.objects.create(id=999_999, major=major, name="Core", type="group")
+        child = RequirementNode.objects.create(id=1_000_001, major=major, parent=group, name="Electives", type="credits")
+        NodeCourse.objects.create(node=child, course=Course.objects.get(course_id="KIN-3050"))
+        self.assertEqual(len(child.path), 2 * (RequirementNode.PATH_SEGMENT_WIDTH + 1))
+        self.assertEqual(list(major.top_level_groups_for_course("KIN-3050")), [group])
+        self.assertEqual(list(group.subtree_courses().values_list("node_id", flat=True)), [child.id])
+        with self.assertRaises(ValueError):
+            RequirementNode.path_segment(10 ** RequirementNode.PATH_SEGMENT_WIDTH)
+
+    def test_credits_rolled_up_by_top_level_group(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        student = Student.objects.create(student_id="T00000001", major=major)
+        for course_id, grade in [("KIN-3050", "A"), ("KIN-3060", "B"), ("KIN-3070", "F")]:
+            StudentRecord.objects.create(
+                student=student, high_school_grad=2022, first_term=202330, term=202430,
+                course=Course.objects.get(course_id=course_id), grade=grade, credits=3, institution="SUU"
+            )
+        self.assertEqual(
+            credits_by_requirement_group(major, student.student_id),
+            {"Exercise Science Curriculum (47-56 Credits)": 6}
+        )
+
+    def test_reimport_replaces_in_place(self):
+        node_count = RequirementNode.objects.count()
+        populate_catalog_from_payload(self.payload)
+        self.assertEqual(MajorMapping.objects.count(), 1)
+        self.assertEqual(RequirementNode.objects.count(), node_count)
+
+    def test_identical_tree_shared_across_years(self):
+        next_year = {**self.payload, "major": {**self.payload["major"], "catalog_year": 202530}}
+        result = populate_catalog_from_payload(next_year)
+        self.assertTrue(result["tree_reused"])
+        self.assertEqual(CatalogTree.objects.count(), 1)
+        majors = MajorMapping.objects.filter(major_code=self.major_code)
+        self.assertEqual({m.requirement_tree_id for m in majors}, {result["tree"].id})
+
+    def test_changed_tree_swaps_version_and_old_one_is_collected(self):
+        major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
+        old_tree_id = major.requirement_tree_id
+        changed = {
+            **self.payload,
+            "requirement_nodes": [{**n, "required_credits": 1} for n in self.payload["requirement_nodes"]]
+        }
+        populate_catalog_from_payload(changed)
+
+        major.refresh_from_db()
+        self.assertEqual(major.catalog_version, 2)
+        self.assertNotEqual(major.requirement_tree_id, old_tree_id)
+        self.assertEqual(major.requirement_nodes().count(), len(self.payload["requirement_nodes"]))
+
+        # The superseded version survives while inside the grace period
+        self.assertEqual(collect_catalog_garbage(keep_versions=0), 0)
+        self.assertEqual(collect_catalog_garbage(keep_versions=0, grace=timedelta(0)), 1)
+        self.assertFalse(CatalogTree.objects.filter(id=old_tree_id).exists())
+        self.assertFalse(RequirementNode.objects.filter(tree_id=old_tree_id).exists())
+        self.assertFalse(NodeCourse.objects.filter(node__tree_id=old_tree_id).exists())
+        self.assertEqual(list(CatalogSnapshot.objects.values_list("version", flat=True)), [2])
+
+    def test_bulk_load_inserts_one_statement_per_level(self):
+        payloads = []
+        for year in (202530, 202630):
+            nodes = [{**n, "name": f"{n['name']} {year}"} for n in self.payload["requirement_nodes"]]
+            payloads.append({
+                **self.payload,
+                "major": {**self.payload["major"], "catalog_year": year},
+                "requirement_nodes": nodes
+            })
+
+        depths = {}
+        for n in self.payload["requirement_nodes"]:
+            depths[n["id"]] = 0 if n["parent_id"] is None else depths[n["parent_id"]] + 1
+
+        with CaptureQueriesContext(connection) as ctx:
+            results = populate_catalog_from_payloads(payloads)
+
+        node_inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "src_requirementnode"')]
+        self.assertEqual(len(node_inserts), max(depths.values()) + 1)
+        self.assertEqual(CatalogTree.objects.count(), 3)
+        for result in results:
+            self.assertFalse(result["tree_reused"])
+            nodes = result["major"].requirement_nodes()
+            self.assertEqual(nodes.count(), len(self.payload["requirement_nodes"]))
+            self.assertEqual(
+                result["major"].node_courses().count(), len(self.payload["node_courses"])
+            )
+
     def test_requirement_nodes_linked_to_major(self):
         major = MajorMapping.objects.get(major_code=self.major_code, catalog_year=202430)
-        node_count = RequirementNode.objects.filter(major=major).count()
+        node_count = major.requirement_nodes().count()
         self.assertGreater(node_count, 0, f"No requirement nodes linked to major {self.major_code}")
+
+
+class PrepareInsertsTest(TestCase):
+    def test_course_listed_in_several_nodes_uses_first_seen_metadata(self):
+        tree = [
+            RequirementNodeData("Core", "credits", 6, children=[
+                RequirementNodeData("Labs", "credits", 1, courses=[CourseData("KIN", "3050", "Motor Lab", 1)])
+            ]),
+            RequirementNodeData("Electives", "credits", 3, courses=[CourseData("KIN", "3050", "Motor Learning", 3)]),
+        ]
+        payload = prepare_django_inserts(
+            parsed_tree=tree,
+            match_result={"major_code": "EXSC", "base_major_code": "EXSC", "major_name_registrar": "Exercise Science"},
+            major_name_web="Exercise Science (B.S.)",
+            total_credits_required=120,
+            catalog_year=202430
+        )
+        # "Electives" is visited before "Labs" breadth-first, but "Labs" comes first in the tree
+        self.assertEqual(
+            [nc["node_id"] for nc in payload["node_courses"]], [1, 2]
+        )
+        self.assertEqual(payload["courses"], [{
+            "course_id": "KIN-3050", "subject": "KIN", "course_number": "3050",
+            "course_name": "Motor Lab", "credits": 1
+        }])
+
+
+class ParseWorkerTest(TestCase):
+    def setUp(self):
+        self.html = open("tests/data/exercise_science.html", encoding="utf-8").read()
+        self.meta = {"major_code": "EXSC", "base_major_code": "EXSC", "major_name_registrar": "Exercise Science"}
+
+    def test_worker_payload_matches_inline_parse(self):
+        expected = prepare_django_inserts(
+            parsed_tree=parse_course_structure_as_tree(self.html),
+            match_result=self.meta,
+            major_name_web="Exercise Science (B.S.)",
+            total_credits_required=120,
+            catalog_year=202430
+        )
+        with ProcessPoolExecutor(max_workers=1, initializer=init_parse_worker) as pool:
+            payload = pool.submit(
+                parse_program_html, self.html, self.meta, "Exercise Science (B.S.)", 202430
+            ).result()
+
+        self.assertIsInstance(payload, dict)
+        self.assertEqual(payload["requirement_nodes"], expected["requirement_nodes"])
+        self.assertEqual(payload["node_courses"], expected["node_courses"])
+        self.assertEqual(payload["courses"], expected["courses"])
+
+
+class ProgramFingerprintTest(TestCase):
+    def setUp(self):
+        self.html = open("tests/data/exercise_science.html", encoding="utf-8").read()
+
+    def test_markup_only_changes_keep_fingerprint(self):
+        reshuffled = self.html.replace("aria-expanded=\"false\"", "aria-expanded=\"true\"")
+        self.assertEqual(program_summary_fingerprint(self.html), program_summary_fingerprint(reshuffled))
+
+    def test_content_change_changes_fingerprint(self):
+        edited = self.html.replace("Motor Learning", "Motor Control")
+        self.assertNotEqual(program_summary_fingerprint(self.html), program_summary_fingerprint(edited))
+
+
+class RescrapeTest(TestCase):
+    def setUp(self):
+        self.major_code_df = load_major_code_lookup("major_codes.csv")
+        html = open("tests/data/exercise_science.html", encoding="utf-8").read()
+        # The catalog site is replaced by the saved program page.
+        for target, value in [
+            ("src.batch.pull_catalog_year", "catalog"),
+            ("src.batch.find_all_programs_link", "programs"),
+            ("src.batch.find_degree", "https://catalog.example/exsc"),
+            ("src.batch.requests.get", SimpleNamespace(text=html)),
+        ]:
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def scrape(self):
+        results = scrape_catalog_year("2024-2025", ["Exercise Science (B.S.)"], self.major_code_df)
+        return [r["status"] for r in results]
+
+    def test_unchanged_program_skipped_until_its_major_is_deleted(self):
+        self.assertEqual(self.scrape(), ["imported"])
+        self.assertEqual(self.scrape(), ["unchanged"])
+
+        delete_majors(202430)
+        self.assertEqual(self.scrape(), ["imported"])
+        self.assertTrue(MajorMapping.objects.filter(major_code="EXSC", catalog_year=202430).exists())
+
+
+class MajorNameMatchTest(TestCase):
+    def setUp(self):
+        self.major_code_df = load_major_code_lookup("major_codes.csv")
+        with open("majors.txt") as f:
+            self.web_names = [line.strip() for line in f if line.strip()]
+
+    def test_batch_matches_single_lookups(self):
+        expected = [match_major_name_web_to_registrar(n, self.major_code_df) for n in self.web_names]
+        self.assertEqual(match_major_names_web_to_registrar(self.web_names, self.major_code_df), expected)
+
+    def test_registrar_index_dropped_with_its_dataframe(self):
+        df = load_major_code_lookup("major_codes.csv")
+        key = id(df)
+        self.assertIs(get_registrar_index(df), get_registrar_index(df))
+        del df
+        gc.collect()
+        self.assertNotIn(key, _registrar_indexes)
+
+    def test_score_cutoff_returns_none(self):
+        results = match_major_names_web_to_registrar(["Qqqq Zzzz"], self.major_code_df, score_cutoff=95)
+        self.assertEqual(results, [None])
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+from django.test import SimpleTestCase
+
+from src.cli import build_parser, cmd_audit, cmd_export, cmd_run_all
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds from interpreter start to a subcommand's handler imports being done, best of 3.
+# Measured at ~0.35s for `audit` (the old main.py needed ~1.0s before doing anything).
+IMPORT_BUDGET = {"audit": 0.8, "export": 1.5}
+HEAVY_MODULES = {
+    "audit": ["pandas", "numpy", "bs4", "requests", "rapidfuzz"],
+    "export": ["bs4", "requests", "rapidfuzz"],
+}
+HANDLER_IMPORTS = {
+    "audit": "from src.eligibility import run_audit",
+    "export": "from src.output import output_to_csv, output_to_xlsx",
+}
+PROBE = """
+import sys, time
+start = time.perf_counter()
+from src import cli
+cli.setup_django()
+{imports}
+elapsed = time.perf_counter() - start
+print(elapsed, *[m for m in {heavy!r} if m in sys.modules])
+"""
+
+
+def probe(command):
+    code = PROBE.format(imports=HANDLER_IMPORTS[command], heavy=HEAVY_MODULES[command])
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[0]), out[1:]
+
+
+class CLIParserTests(SimpleTestCase):
+    def test_subcommands(self):
+        parser = build_parser()
+        args = parser.parse_args(["audit", "202430", "--snapshot"])
+        self.assertEqual((args.handler, args.term, args.snapshot), (cmd_audit, 202430, True))
+
+        args = parser.parse_args(["export", "202430", "--format", "csv"])
+        self.assertEqual((args.handler, args.format, args.snapshot), (cmd_export, "csv", False))
+
+        args = parser.parse_args(["run-all", "--csv", "extract.csv", "--term", "202410", "202430", "--years", "2024-2025"])
+        self.assertEqual((args.handler, args.csv, args.terms), (cmd_run_all, "extract.csv", [202410, 202430]))
+        self.assertEqual((args.years, args.force), (["2024-2025"], False))
+        self.assertIsNone(args.defer_indexes)
+
+
+class CLIImportBudgetTests(SimpleTestCase):
+    def test_handler_imports_stay_light_and_within_budget(self):
+        for command, budget in IMPORT_BUDGET.items():
+            with self.subTest(command=command):
+                runs = [probe(command) for _ in range(3)]
+                self.assertEqual(runs[0][1], [], f"{command} imported heavy modules")
+                self.assertLess(min(elapsed for elapsed, _ in runs), budget)
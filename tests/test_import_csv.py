@@ -37,7 +37,7 @@ class CSVImportTests(TestCase):
         NodeCourse.objects.create(node=self.node, course=self.course)
 
         self.columns = [
-            "ID", "HS_GRAD", "FT_SEM", "FT_TERM_CNT", "MAJOR", "CONC", "CATALOG", "TERM", "SUBJ",
+            "ID", "HS_GRAD", "FT_TERM", "FT_TERM_CNT", "MAJOR", "CONC", "CATALOG", "TERM", "SUBJ",
             "CRSE", "GRADE", "CREDITS", "CRSE_ATTR", "INSTITUTION"
         ]
 
@@ -146,6 +146,24 @@ class CSVImportTests(TestCase):
         self.assertTrue(result["success"])
         self.assertEqual(Course.objects.filter(course_id="KIN-3050").count(), 1)
 
+    def test_new_course_shared_by_rows_in_one_file(self):
+        rows = []
+        for student_id, term in [("T00000001", 202430), ("T00000002", 202430), ("T00000001", 202430)]:
+            row = self.row.copy()
+            row[self.columns.index("ID")] = student_id
+            row[self.columns.index("TERM")] = term
+            row[self.columns.index("CRSE")] = "4999"
+            rows.append(row)
+        path = self._save_temp_csv(pd.DataFrame(rows, columns=self.columns))
+
+        result = import_student_data_from_csv(path)
+        self.assertTrue(result["success"])
+        course = Course.objects.get(course_id="KIN-4999")
+        self.assertEqual((course.subject, course.course_number), ("KIN", "4999"))
+        # The repeated row is still recognised as a duplicate before the course has an id.
+        self.assertEqual(StudentRecord.objects.filter(course=course).count(), 2)
+        self.assertFalse(StudentRecord.objects.filter(course=course, counts_toward_major=True).exists())
+
     def test_declared_major_defaults_to_major_if_no_concentration(self):
         df = pd.DataFrame([self.row], columns=self.columns)
         path = self._save_temp_csv(df)
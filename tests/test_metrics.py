@@ -0,0 +1,32 @@
+import json
+import tempfile
+
+from django.test import TestCase
+
+from src.metrics import metrics_run, stage
+from src.models import Student
+
+
+class MetricsTests(TestCase):
+    def test_stage_is_a_shared_no_op_outside_a_run(self):
+        self.assertIs(stage("a"), stage("b"))
+
+    def test_run_records_nested_stages_and_queries(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            with metrics_run("audit", log_dir=log_dir) as recorder:
+                with stage("load"):
+                    Student.objects.count()
+                for _ in range(3):
+                    with stage("student"):
+                        Student.objects.filter(student_id="T00000001").exists()
+
+            with open(recorder.path) as f:
+                metrics = json.load(f)
+
+        stages = metrics["stages"]
+        self.assertEqual(metrics["run"], "audit")
+        self.assertEqual((stages["audit/load"]["calls"], stages["audit/load"]["queries"]), (1, 1))
+        self.assertEqual((stages["audit/student"]["calls"], stages["audit/student"]["queries"]), (3, 3))
+        self.assertEqual(stages["audit"]["queries"], 4)
+        self.assertGreaterEqual(stages["audit"]["wall_seconds"], stages["audit/student"]["wall_seconds"])
+        self.assertIs(stage("after"), stage("run"))
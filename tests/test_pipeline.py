@@ -0,0 +1,72 @@
+import threading
+
+from django.test import TestCase
+
+from src.models import StageRun
+from src.pipeline import Stage, run_pipeline
+
+
+class PipelineTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.state = {"csv": "v1", "records": 0}
+
+    def stage(self, name, deps=(), inputs=lambda: None, output=None, run=None):
+        def default_run():
+            self.calls.append(name)
+        return Stage(name, run or default_run, inputs=inputs, output=output or (lambda: name), deps=deps)
+
+    def stages(self):
+        def run_import():
+            self.calls.append("import")
+            self.state["records"] += 1
+        return [
+            self.stage("import", inputs=lambda: self.state["csv"], output=lambda: self.state["records"], run=run_import),
+            self.stage("audit:202410", deps=("import",)),
+            self.stage("audit:202430", deps=("import",)),
+        ]
+
+    def test_rerun_skips_unchanged_stages(self):
+        self.assertEqual(set(run_pipeline(self.stages()).values()), {"ran"})
+        self.calls.clear()
+
+        status = run_pipeline(self.stages())
+        self.assertEqual(set(status.values()), {"skipped"})
+        self.assertEqual(self.calls, [])
+        self.assertEqual(StageRun.objects.count(), 3)
+
+    def test_changed_input_reruns_downstream(self):
+        run_pipeline(self.stages())
+        self.calls.clear()
+
+        self.state["csv"] = "v2"
+        run_pipeline(self.stages())
+        self.assertEqual(sorted(self.calls), ["audit:202410", "audit:202430", "import"])
+
+    def test_output_drift_reruns_stage(self):
+        run_pipeline(self.stages())
+        self.calls.clear()
+
+        self.state["records"] = 99  # someone changed the data behind the pipeline's back
+        status = run_pipeline(self.stages())
+        self.assertEqual(status["import"], "ran")
+
+    def test_independent_stages_run_concurrently(self):
+        # Each stage waits for the other; run one after the other, both would time out.
+        barrier = threading.Barrier(2, timeout=5)
+        stages = [
+            self.stage("export:202410", run=barrier.wait),
+            self.stage("export:202430", run=barrier.wait),
+        ]
+        self.assertEqual(set(run_pipeline(stages).values()), {"ran"})
+
+    def test_failure_blocks_dependents(self):
+        def fail():
+            raise RuntimeError("bad extract")
+        stages = [self.stage("import", run=fail), self.stage("audit:202430", deps=("import",))]
+        self.assertEqual(run_pipeline(stages), {"import": "failed", "audit:202430": "blocked"})
+        self.assertFalse(StageRun.objects.exists())
+
+    def test_cycle_rejected(self):
+        with self.assertRaises(ValueError):
+            run_pipeline([self.stage("a", deps=("b",)), self.stage("b", deps=("a",))])
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from src.profiling import profile_run, profile_stage
+
+
+def _work():
+    return sorted(str(i) * 3 for i in range(20000))
+
+
+class ProfilingTests(SimpleTestCase):
+    def test_stage_is_a_no_op_outside_a_run(self):
+        with profile_stage("audit") as stage:
+            self.assertIsNone(stage)
+
+    def test_run_writes_profiles_and_memory_summary(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            with profile_run("export", log_dir=log_dir) as session:
+                _work()
+            files = sorted(os.listdir(session.dir))
+            with open(os.path.join(session.dir, "summary.json")) as f:
+                summary = json.load(f)
+            with open(os.path.join(session.dir, "export.collapsed.txt")) as f:
+                stacks = f.read().splitlines()
+
+        self.assertEqual(files, ["export.collapsed.txt", "export.pstats", "summary.json"])
+        stage = summary["stages"]["export"]
+        self.assertGreater(stage["memory_peak_increase_bytes"], 0)
+        self.assertTrue(all(not site["site"].startswith(os.path.abspath("src/profiling.py"))
+                            for site in stage["top_allocations"]))
+        self.assertTrue(any("_work (test_profiling.py" in line for line in stacks))
+        for line in stacks:
+            stack, micros = line.rsplit(" ", 1)
+            self.assertTrue(micros.isdigit(), line)
+
+    def test_nested_stage_keeps_the_enclosing_stage_peak(self):
+        def pipeline_stage():
+            with profile_stage("import"):
+                bytearray(1 << 20)
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            with profile_run("run-all", log_dir=log_dir) as session:
+                bytearray(16 << 20)  # the command's own peak, before its stages run
+                worker = threading.Thread(target=pipeline_stage)
+                worker.start()
+                worker.join()
+
+        outer, inner = session.stages["run-all"], session.stages["import"]
+        self.assertGreaterEqual(outer["memory_peak_increase_bytes"], 16 << 20)
+        self.assertLess(inner["memory_peak_increase_bytes"], 16 << 20)
+        self.assertEqual(outer["nested_stages"], ["import"])
@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from src.progress import DETAIL, Progress, configure_logging, detail_enabled
+
+
+class ProgressTests(SimpleTestCase):
+    def test_reports_are_rate_limited(self):
+        now = [0.0]
+        logger = logging.getLogger("src.tests.progress")
+        with self.assertLogs(logger, level="INFO") as logs:
+            progress = Progress("Audited", total=100, logger=logger, interval=10.0, clock=lambda: now[0])
+            for _ in range(100):
+                now[0] += 0.5  # 2 items/s: one report every 20 items
+                progress.advance()
+            progress.finish()
+
+        self.assertEqual(len(logs.output), 5 + 1)
+        self.assertIn("Audited: 20/100 (2/s, ETA 40s)", logs.output[0])
+        self.assertIn("Audited: 100/100 (2/s, 50.0s)", logs.output[-1])
+
+
+class DetailLogTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self._reset_logging)
+
+    def _reset_logging(self):
+        for logger in (logging.getLogger("src"), DETAIL):
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+        logging.getLogger("src").setLevel(logging.NOTSET)
+        DETAIL.setLevel(logging.CRITICAL + 1)
+
+    def test_detail_only_goes_to_the_debug_log(self):
+        configure_logging("WARNING")
+        self.assertFalse(detail_enabled())
+
+        path = os.path.join(self.tmp.name, "debug.jsonl")
+        configure_logging("WARNING", debug_log=path)
+        self.assertTrue(detail_enabled())
+        with self.assertNoLogs(logging.getLogger("src"), level="DEBUG"):
+            DETAIL.debug("student_audit", extra={"data": {"student_id": "T00000001", "eligible": True}})
+
+        with open(path) as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(
+            (entry["event"], entry["student_id"], entry["eligible"]), ("student_audit", "T00000001", True)
+        )
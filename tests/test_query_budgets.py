@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+import pandas as pd
+from django.test import TestCase
+
+from src.data import import_student_data_from_csv
+from src.eligibility import run_audit
+from src.models import Course, MajorMapping, NodeCourse, RequirementNode
+from src.output import create_dataframe
+from src.requirement_tree import invalidate_requirement_trees
+from src.utils import normalize_catalog_term
+from tests.query_budget import LARGE, SMALL, QueryBudgetMixin, sql_shape
+
+COLUMNS = [
+    "ID", "HS_GRAD", "FT_TERM", "FT_TERM_CNT", "MAJOR", "CONC", "CATALOG", "TERM", "SUBJ",
+    "CRSE", "GRADE", "CREDITS", "CRSE_ATTR", "INSTITUTION"
+]
+COURSES = [("KIN", "3050"), ("KIN", "2000"), ("ENGL", "1010")]
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        for code, name in (("EXSC", "Exercise Science (B.S.)"), ("PSY", "Psychology (B.A., B.S.)")):
+            major = MajorMapping.objects.create(
+                major_code=code, base_major_code=code, catalog_year=normalize_catalog_term(202430),
+                major_name_web=name, major_name_registrar=name, total_credits_required=120
+            )
+            node = RequirementNode.objects.create(major=major, name="Core", type="credits", required_credits=34)
+            subject, number = ("KIN", "3050") if code == "EXSC" else ("PSY", "1010")
+            course = Course.objects.create(
+                course_id=f"{subject}-{number}", subject=subject, course_number=number, credits=3
+            )
+            NodeCourse.objects.create(node=node, course=course)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _extract(self, size):
+        """`size` students, alternating majors, three courses each over two terms; one new course per student."""
+        rows = []
+        for i in range(size):
+            sid = f"T{i:08d}"
+            major = ("EXSC", "PSY")[i % 2]
+            for term, (subject, number) in zip((202410, 202430, 202430), COURSES):
+                rows.append([sid, 2023, 202410, 2, major, "", 202430, term, subject, number, "B", 3, "", "SUU"])
+            rows.append([sid, 2023, 202410, 2, major, "", 202430, 202430, "ART", f"{1000 + i}", "A", 1, "", "SUU"])
+        path = os.path.join(self.tmp.name, f"extract_{size}.csv")
+        pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+        return path
+
+    def _import(self, size):
+        invalidate_requirement_trees()
+        result = import_student_data_from_csv(self._extract(size), defer_indexes=False)
+        self.assertTrue(result["success"], result)
+
+    def test_sql_shape_collapses_parameter_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT "a" FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            sql_shape('SELECT "a" FROM "t" WHERE "id" IN (%s)'),
+        )
+        self.assertEqual(
+            sql_shape('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (%s, %s), ...',
+        )
+
+    def test_import_does_not_scale_with_rows(self):
+        def prepare(size):
+            path = self._extract(size)
+            invalidate_requirement_trees()
+            return lambda: import_student_data_from_csv(path, defer_indexes=False)
+
+        # bulk_create splits the larger file's records into two batches (SQLite's parameter limit).
+        counts = self.assertQueriesDoNotScale(prepare, slack=1)
+        self.assertLessEqual(counts[LARGE], 35)
+
+    def test_audit_does_not_scale_with_students(self):
+        def prepare(size):
+            self._import(size)
+            invalidate_requirement_trees()
+            return lambda: run_audit(202430)
+
+        counts = self.assertQueriesDoNotScale(prepare)
+        self.assertLessEqual(counts[LARGE], 30)
+
+    def test_export_does_not_scale_with_students(self):
+        def prepare(size):
+            self._import(size)
+            run_audit(202430)
+            return lambda: create_dataframe(202430)
+
+        counts = self.assertQueriesDoNotScale(prepare)
+        self.assertLessEqual(counts[SMALL], 25)
@@ -0,0 +1,58 @@
+import re
+
+from django.test import TestCase
+
+from src.models import Course, MajorMapping, NodeCourse, RequirementNode, StudentAudit, StudentRecord
+
+# "SCAN src_studentrecord" is a full table walk; "SCAN ... USING INDEX" walks a whole index.
+# Only SEARCH steps (and temp b-trees for DISTINCT/ORDER BY) are acceptable on a hot path.
+FULL_SCAN = re.compile(r"\bSCAN\b")
+
+
+class HotQueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN for every hot lookup must use an index search, never a full scan."""
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        scans = [line for line in plan.splitlines() if FULL_SCAN.search(line)]
+        self.assertFalse(scans, f"full scan in plan for:\n{queryset.query}\n{plan}")
+
+    def test_student_record_duplicate_check(self):
+        self.assertNoFullScan(StudentRecord.objects.filter(student_id="T00000001", term=202430, course_id=1))
+
+    def test_student_records_by_student(self):
+        self.assertNoFullScan(StudentRecord.objects.filter(student_id__in=["T00000001", "T00000002"]))
+
+    def test_students_in_term(self):
+        self.assertNoFullScan(
+            StudentRecord.objects.filter(term=202430).values_list("student_id", flat=True).distinct()
+        )
+
+    def test_records_in_terms(self):
+        self.assertNoFullScan(
+            StudentRecord.objects.filter(term__in=[202410, 202430]).values_list("student_id", "term", "course_id")
+        )
+
+    def test_audits_by_term(self):
+        self.assertNoFullScan(StudentAudit.objects.filter(term=202430))
+
+    def test_audit_by_student_and_term(self):
+        self.assertNoFullScan(StudentAudit.objects.filter(student_id="T00000001", term=202430))
+
+    def test_node_courses_by_course_and_major(self):
+        self.assertNoFullScan(NodeCourse.objects.filter(course_id=1, node__major_id=1))
+
+    def test_node_courses_by_course_and_tree(self):
+        self.assertNoFullScan(NodeCourse.objects.filter(course_id=1, node__tree_id=1))
+
+    def test_course_by_code(self):
+        self.assertNoFullScan(Course.objects.filter(course_id="KIN-3050"))
+
+    def test_requirement_subtree(self):
+        self.assertNoFullScan(RequirementNode(tree_id=1, path=RequirementNode.path_segment(1)).subtree())
+
+    def test_major_by_code_and_year(self):
+        self.assertNoFullScan(MajorMapping.objects.filter(major_code="EXSC", catalog_year=202430))
+
+    def test_majors_by_year(self):
+        self.assertNoFullScan(MajorMapping.objects.filter(catalog_year=202430))
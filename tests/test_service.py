@@ -0,0 +1,84 @@
+from urllib.parse import urlencode
+
+from django.test import TestCase
+
+from src.eligibility import refresh_term_summaries
+from src.models import Course, MajorMapping, NodeCourse, RequirementNode, Student, StudentAudit, StudentRecord
+from src.service import AuditService
+
+
+class AuditServiceTests(TestCase):
+    def setUp(self):
+        major = MajorMapping.objects.create(
+            major_code="EXSC",
+            catalog_year=202430,
+            major_name_web="Exercise Science (B.S.)",
+            major_name_registrar="Exercise Science",
+            total_credits_required=120
+        )
+        course = Course.objects.create(course_id="KIN-3050", subject="KIN", course_number="3050", credits=3)
+        for sid, student_major in (("T00000001", major), ("T00000002", None)):
+            StudentRecord.objects.create(
+                student=Student.objects.create(student_id=sid, major=student_major),
+                high_school_grad=2022, first_term=202410, term=202430, course=course,
+                grade="A", credits=3, institution="SUU", ft_term_cnt=2
+            )
+        refresh_term_summaries(["T00000001", "T00000002"])
+        self.service = AuditService(start_writer=False)
+
+    def test_student_audit_served_from_warm_term(self):
+        self.service.warm([202430])
+        with self.assertNumQueries(1):  # only the data version check
+            status, payload = self.service.handle("GET", "/students/T00000001/audit?term=202430")
+        self.assertEqual(status, 200)
+        self.assertEqual((payload["major"], payload["total_term_credits"], payload["gpa"]), ("EXSC", 3, 4.0))
+
+        status, payload = self.service.handle("GET", "/students/T00000002/audit?term=202430")
+        self.assertEqual(payload["flags"][0]["code"], "missing_major")
+
+    def test_writes_by_other_processes_reach_warm_terms(self):
+        self.service.warm([202430])
+        # Written as the CLI or the watcher would, without going through the service's job queue.
+        course = Course.objects.create(course_id="KIN-3051", subject="KIN", course_number="3051", credits=1)
+        StudentRecord.objects.create(
+            student_id="T00000001", high_school_grad=2022, first_term=202410, term=202430, course=course,
+            grade="A", credits=1, institution="SUU", ft_term_cnt=2
+        )
+        refresh_term_summaries(["T00000001"])
+
+        payload = self.service.handle("GET", "/students/T00000001/audit?term=202430")[1]
+        self.assertEqual(payload["total_term_credits"], 4)
+
+    def test_requirement_group_rollup(self):
+        major = MajorMapping.objects.get(major_code="EXSC")
+        group = RequirementNode.objects.create(major=major, name="Core", type="group")
+        NodeCourse.objects.create(node=group, course=Course.objects.get(course_id="KIN-3050"))
+        self.assertEqual(
+            self.service.handle("GET", "/students/T00000001/groups"),
+            (200, {"student_id": "T00000001", "major": "EXSC", "groups": {"Core": 3}})
+        )
+        self.assertEqual(self.service.handle("GET", "/students/T00000002/groups")[1]["groups"], {})
+        self.assertEqual(self.service.handle("GET", "/students/T99999999/groups")[0], 404)
+
+    def test_audit_job_is_queued_then_reports_and_flags(self):
+        status, job = self.service.handle("POST", "/jobs/audit", {"term": 202430})
+        self.assertEqual((status, job["status"]), (202, "queued"))
+        self.assertFalse(StudentAudit.objects.exists())
+
+        self.service.jobs.drain()
+        self.assertEqual(self.service.handle("GET", f"/jobs/{job['id']}")[1]["status"], "done")
+        report = self.service.handle("GET", "/terms/202430/report")[1]
+        self.assertEqual([a["student_id"] for a in report["audits"]], ["T00000001", "T00000002"])
+        flags = self.service.handle("GET", "/terms/202430/flags")[1]["flags"]
+        self.assertEqual([f["code"] for f in flags], ["missing_major"])
+
+    def test_major_match_batches_repeated_names(self):
+        names = ["Exercise Science (B.S.)", "Accounting (B.A., B.S.)"]
+        single = [self.service.handle("GET", "/majors/match?" + urlencode({"name": n}))[1] for n in names]
+        status, payload = self.service.handle("GET", "/majors/match?" + urlencode({"name": names}, doseq=True))
+        self.assertEqual((status, payload["matches"]), (200, single))
+        self.assertEqual([m["major_code"] for m in single], ["EXSC", "ACCT"])
+
+    def test_unknown_route_and_bad_request(self):
+        self.assertEqual(self.service.handle("GET", "/nope")[0], 404)
+        self.assertEqual(self.service.handle("GET", "/students/T00000001/audit")[0], 400)
@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+from django.db import OperationalError, connection, connections, transaction
+from django.db.transaction import TransactionManagementError
+from django.test import TestCase, TransactionTestCase
+
+from src.data import populate_catalog_from_payloads
+from src.models import Course, NodeCourse, StudentRecord
+from src.snapshot import memory_snapshot
+from src.storage import deferred_indexes, storage_profile
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def index_names(table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [table])
+        return {row[0] for row in cursor.fetchall()}
+
+
+class StorageProfileTests(TestCase):
+    def test_read_profile_rejects_writes_and_restores(self):
+        cache_size = pragma("cache_size")
+        with storage_profile("read"):
+            self.assertEqual(pragma("query_only"), 1)
+            with self.assertRaises(OperationalError), transaction.atomic():
+                Course.objects.create(course_id="KIN-3050", subject="KIN", course_number="3050", credits=3)
+
+        self.assertEqual(pragma("query_only"), 0)
+        self.assertEqual(pragma("cache_size"), cache_size)
+        Course.objects.create(course_id="KIN-3050", subject="KIN", course_number="3050", credits=3)
+
+    def test_profiles_leave_the_journal_mode_alone(self):
+        journal_mode = pragma("journal_mode")
+        for name in ("bulk_load", "read"):
+            with storage_profile(name):
+                self.assertEqual(pragma("journal_mode"), journal_mode)
+            self.assertEqual(pragma("journal_mode"), journal_mode)
+
+    def test_new_connections_use_wal(self):
+        path = os.path.join(tempfile.mkdtemp(), "wal.sqlite3")
+        default = connections["default"]
+        wrapper = type(default)({**default.settings_dict, "NAME": path}, "wal_check")
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], "wal")
+        finally:
+            wrapper.close()
+
+    def test_deferred_indexes_are_rebuilt(self):
+        table = StudentRecord._meta.db_table
+        before = index_names(table)
+        with deferred_indexes(StudentRecord):
+            self.assertLess(len(index_names(table)), len(before))
+        self.assertEqual(index_names(table), before)
+
+    def test_failed_catalog_load_keeps_deferred_indexes(self):
+        table = NodeCourse._meta.db_table
+        before = index_names(table)
+        with self.assertRaises(KeyError):
+            populate_catalog_from_payloads([{"courses": []}], defer_indexes=True)
+        self.assertEqual(index_names(table), before)
+
+    def test_deferred_indexes_keep_the_original_error(self):
+        table = StudentRecord._meta.db_table
+        before = index_names(table)
+        with self.assertRaisesMessage(ValueError, "bad row"):
+            with transaction.atomic(), deferred_indexes(StudentRecord):
+                # a failed inner block without a savepoint leaves the transaction unusable
+                with transaction.atomic(savepoint=False):
+                    raise ValueError("bad row")
+        self.assertEqual(index_names(table), before)
+
+
+class MemorySnapshotTests(TransactionTestCase):
+    # The backup API copies committed data only, so these tests can't run inside a transaction.
+    def test_reads_come_from_snapshot_and_writes_go_to_disk(self):
+        Course.objects.create(course_id="KIN-3050", subject="KIN", course_number="3050", credits=3)
+        with memory_snapshot() as alias:
+            self.assertNotEqual(alias, "default")
+            course = Course.objects.get(course_id="KIN-3050")
+            self.assertEqual(course._state.db, alias)
+
+            Course.objects.create(course_id="KIN-2000", subject="KIN", course_number="2000", credits=3)
+            # the snapshot doesn't see later writes...
+            self.assertFalse(Course.objects.filter(course_id="KIN-2000").exists())
+        # ...which landed in the real database
+        self.assertTrue(Course.objects.filter(course_id="KIN-2000").exists())
+        self.assertNotIn(alias, connections)
+
+    def test_refused_inside_atomic_block(self):
+        with transaction.atomic(), self.assertRaises(TransactionManagementError):
+            with memory_snapshot():
+                pass
@@ -0,0 +1,45 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from src.eligibility import calculate_gpa, refresh_term_summaries
+from src.models import Course, Student, StudentRecord, StudentTermSummary
+
+
+class StudentTermSummaryTests(TestCase):
+    def setUp(self):
+        student = Student.objects.create(student_id="T00000001")
+        rows = [
+            ("KIN-3050", 202410, "A", 3, True),
+            ("KIN-2000", 202410, "F", 4, True),
+            ("ENGL-1010", 202430, "B", 3, False),
+            ("ART-1010", 202430, "P", 1, False),
+        ]
+        for course_id, term, grade, credits, counts in rows:
+            subject, number = course_id.split("-")
+            StudentRecord.objects.create(
+                student=student, high_school_grad=2022, first_term=202410, term=term,
+                course=Course.objects.create(course_id=course_id, subject=subject, course_number=number, credits=credits),
+                grade=grade, credits=credits, institution="SUU", counts_toward_major=counts, ft_term_cnt=term % 100 // 10
+            )
+
+    def test_refresh_aggregates_per_term(self):
+        self.assertEqual(refresh_term_summaries(["T00000001"]), 2)
+        spring, fall = StudentTermSummary.objects.order_by("term")
+        self.assertEqual(
+            (spring.attempted_credits, spring.passed_credits, spring.gpa_credits, spring.da_credits), (7, 3, 7, 3)
+        )
+        self.assertEqual((fall.attempted_credits, fall.passed_credits, fall.gpa_credits), (4, 3, 3))
+        self.assertEqual(fall.ft_term_cnt, 3)
+        self.assertEqual(calculate_gpa("T00000001"), round((12 + 9) / 10, 2))
+
+    def test_rebuild_command_repairs_drift(self):
+        refresh_term_summaries(["T00000001"])
+        StudentTermSummary.objects.filter(term=202410).update(passed_credits=99)
+        StudentTermSummary.objects.filter(term=202430).delete()
+
+        call_command("rebuild_term_summaries", stdout=StringIO())
+        self.assertEqual(
+            dict(StudentTermSummary.objects.values_list("term", "passed_credits")), {202410: 3, 202430: 3}
+        )
@@ -0,0 +1,52 @@
+from django.test import TestCase
+
+from src.archive import archive_closed_terms
+from src.models import Course, Student, StudentRecord
+from src.transcripts import TranscriptStore
+
+
+class TranscriptStoreTests(TestCase):
+    def setUp(self):
+        self.kin = kin = Course.objects.create(course_id="KIN-3050", subject="KIN", course_number="3050", credits=3)
+        self.lab = lab = Course.objects.create(course_id="KIN-3051", subject="KIN", course_number="3051", credits=1)
+        veteran = Student.objects.create(student_id="T00000001")
+        freshman = Student.objects.create(student_id="T00000002")
+        Student.objects.create(student_id="T00000003")
+        rows = [
+            (veteran, 202130, 202430, kin, "A", 3),
+            (veteran, 202130, 202130, lab, "F", 1),
+            (veteran, 202130, 202130, kin, "B", 3),
+            (freshman, 202430, 202430, lab, "W", 1),
+        ]
+        for student, first_term, term, course, grade, credits in rows:
+            StudentRecord.objects.create(
+                student=student, high_school_grad=2020, first_term=first_term, term=term,
+                course=course, grade=grade, credits=credits, institution="SUU"
+            )
+
+    def test_rows_grouped_by_student_in_term_order(self):
+        store = TranscriptStore.build(["T00000001", "T00000002", "T00000003"])
+        self.assertEqual(len(store), 4)
+        kin, lab = self.kin.id, self.lab.id
+        self.assertEqual(list(store["T00000001"].rows()), [
+            (202130, lab, "F", 1),
+            (202130, kin, "B", 3),
+            (202430, kin, "A", 3),
+        ])
+        self.assertEqual(list(store["T00000001"].passed()), [
+            (202130, kin, 3, 3),
+            (202430, kin, 3, 3),
+        ])
+        self.assertEqual(list(store["T00000002"].passed()), [])
+        self.assertNotIn("T00000003", store)
+        self.assertEqual(len(store["T00000003"]), 0)
+
+    def test_includes_archived_terms(self):
+        archive_closed_terms(202430)
+        store = TranscriptStore.build(Student.objects.values("student_id"))
+        self.assertEqual([row[0] for row in store["T00000001"].rows()], [202130, 202130, 202430])
+
+    def test_compact_columns(self):
+        store = TranscriptStore.build(["T00000001", "T00000002"])
+        self.assertLessEqual(store.nbytes / len(store), 24)
+        self.assertEqual(store.course_credits, {self.kin.id: 3, self.lab.id: 1})
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+from django.test import TestCase
+
+from src.models import Course, MajorMapping, NodeCourse, RequirementNode, StudentAudit
+from src.utils import normalize_catalog_term
+from src.watcher import InboxWatcher
+
+COLUMNS = [
+    "ID", "HS_GRAD", "FT_TERM", "FT_TERM_CNT", "MAJOR", "CONC", "CATALOG", "TERM", "SUBJ",
+    "CRSE", "GRADE", "CREDITS", "CRSE_ATTR", "INSTITUTION"
+]
+
+
+class InboxWatcherTests(TestCase):
+    def setUp(self):
+        major = MajorMapping.objects.create(
+            major_code="EXSC", base_major_code="EXSC", catalog_year=normalize_catalog_term(202430),
+            major_name_web="Exercise Science (B.S.)", major_name_registrar="Exercise Science",
+            total_credits_required=120
+        )
+        node = RequirementNode.objects.create(major=major, name="Core", type="credits", required_credits=34)
+        for number in ("3050", "2000"):
+            course = Course.objects.create(course_id=f"KIN-{number}", subject="KIN", course_number=number, credits=3)
+            NodeCourse.objects.create(node=node, course=course)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = self.tmp.name
+        self.now = time.time()
+        self.watcher = InboxWatcher(
+            self.inbox, settle_seconds=5, latency_log=os.path.join(self.inbox, "latency.jsonl"),
+            clock=lambda: self.now
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _drop(self, name, rows):
+        pd.DataFrame(rows, columns=COLUMNS).to_csv(os.path.join(self.inbox, name), index=False)
+
+    def _row(self, sid, term, number="3050"):
+        return [sid, 2022, 202410, 2, "EXSC", "", 202430, term, "KIN", number, "A", 3, "", "SUU"]
+
+    def test_waits_for_files_to_settle_and_skips_partial_names(self):
+        self._drop("extract.csv.tmp", [self._row("T00000001", 202430)])
+        self._drop("extract.csv", [self._row("T00000001", 202430)])
+        self.assertEqual(self.watcher.poll_once(), [])
+
+        self.now += 5
+        reports = self.watcher.poll_once()
+        self.assertEqual([r["file"] for r in reports], ["extract.csv"])
+        self.assertTrue(reports[0]["success"], reports[0])
+        self.assertEqual(reports[0]["audited"], {"202430": 1})
+        self.assertTrue(os.path.exists(os.path.join(self.inbox, "processed", "extract.csv")))
+        self.assertTrue(os.path.exists(os.path.join(self.inbox, "extract.csv.tmp")))
+
+    def test_latency_measured_on_the_watcher_clock(self):
+        self._drop("extract.csv", [self._row("T00000001", 202430)])
+        os.utime(os.path.join(self.inbox, "extract.csv"), (0, 0))  # a copy that kept an old mtime
+        self.watcher.poll_once()
+
+        self.now += 7
+        (report,) = self.watcher.poll_once()
+        self.assertEqual(report["latency_seconds"], 7)
+        with open(os.path.join(self.inbox, "latency.jsonl")) as f:
+            self.assertEqual(json.loads(f.readline())["latency_seconds"], 7)
+
+    def test_reaudits_only_affected_students(self):
+        self.watcher.settle_seconds = 0
+        self._drop("first.csv", [self._row("T00000001", 202430), self._row("T00000002", 202430)])
+        self.watcher.poll_once()
+        self.assertEqual(StudentAudit.objects.filter(term=202430).count(), 2)
+
+        self._drop("second.csv", [self._row("T00000002", 202430, number="2000")])
+        (report,) = self.watcher.poll_once()
+        self.assertEqual(report["audited"], {"202430": 1})
+        self.assertEqual(
+            StudentAudit.objects.get(student_id="T00000002", term=202430).total_term_credits, 6
+        )
+        with open(os.path.join(self.inbox, "latency.jsonl")) as f:
+            self.assertEqual(len(f.readlines()), 2)